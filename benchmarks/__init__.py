@@ -0,0 +1 @@
+"""Benchmarks for the finbrain hot paths, run against a local mock of the OpenAI API."""
@@ -0,0 +1,120 @@
+"""Measures how long importing finbrain takes in a fresh interpreter.
+
+### Overview:
+----
+Each target is imported in a new Python process, several times, and the
+median is reported. The script also checks that none of the heavy
+dependencies, like `openai` or `jsonschema`, are loaded by the import,
+and exits with 1 when a target is over `--max-ms` or pulls one in.
+
+### Usage:
+----
+    $ python -m benchmarks.import_time
+    $ python -m benchmarks.import_time --repeat 10 --max-ms 80
+"""
+
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# The statements timed, from the bare package to the full client.
+TARGETS = {
+    "package": "import finbrain",
+    "prompt": "from finbrain import Prompt",
+    "client": "import finbrain.client"
+}
+
+# The modules an import of finbrain must not load. asyncio is left out, the
+# async counterparts in finbrain.utils, finbrain.thread and finbrain.client
+# import it at module level.
+HEAVY_MODULES = ("openai", "jsonschema", "httpx")
+
+# Runs inside the child process and prints the timing and loaded modules.
+_PROBE = """
+import sys
+import json
+import time
+start = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "ms": elapsed * 1000,
+    "loaded": [name for name in {heavy!r} if name in sys.modules]
+}}))
+"""
+
+
+def measure(statement: str, repeat: int) -> dict:
+    """Times an import statement in fresh interpreters.
+
+    ### Parameters:
+    ----
+    statement: str
+        The import statement to time.
+
+    repeat: int
+        How many interpreters to start.
+
+    ### Returns:
+    ----
+    dict :
+        The median, best and worst milliseconds, and the heavy
+        modules the import loaded.
+    """
+
+    timings = []
+    loaded = set()
+
+    for _ in range(repeat):
+
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        probe = json.loads(output.stdout.strip().splitlines()[-1])
+
+        timings.append(probe["ms"])
+        loaded.update(probe["loaded"])
+
+    return {
+        "statement": statement,
+        "median_ms": statistics.median(timings),
+        "min_ms": min(timings),
+        "max_ms": max(timings),
+        "heavy_modules": sorted(loaded)
+    }
+
+
+def main() -> int:
+    """Measures every target and returns the exit code."""
+
+    parser = argparse.ArgumentParser(description="Measure the import time of finbrain.")
+    parser.add_argument("--repeat", type=int, default=5, help="Interpreters started per target.")
+    parser.add_argument("--max-ms", type=float, default=0.0, help="Fail when a median is above this.")
+    args = parser.parse_args()
+
+    failures = []
+
+    for name, statement in TARGETS.items():
+
+        result = measure(statement=statement, repeat=args.repeat)
+        print(f"{name}: {json.dumps(result, indent=4)}")
+
+        if result["heavy_modules"]:
+            failures.append(f"{name} loads {', '.join(result['heavy_modules'])}")
+
+        if args.max_ms and result["median_ms"] > args.max_ms:
+            failures.append(f"{name} took {result['median_ms']:.1f} ms, over {args.max_ms:.1f} ms")
+
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,563 @@
+"""This module contains a local stand-in for the OpenAI API, used by the benchmarks."""
+
+import re
+import json
+import time
+import random
+import logging
+import itertools
+import threading
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
+from http.server import ThreadingHTTPServer
+from http.server import BaseHTTPRequestHandler
+
+# A summary that passes the `summary_prompt` schema, used as every assistant reply.
+SAMPLE_SUMMARY = {
+    "company_name": "Example Corp",
+    "document_title": "Form 10-K Annual Report",
+    "filing_date": "2019-11-01",
+    "period_covered": "Fiscal year ended September 28, 2019",
+    "cik": "0000320193",
+    "sic": "3571",
+    "fiscal_year_end": "0928",
+    "purpose": "Annual report on the business and financial condition of the company.",
+    "document_type": "Form 10-K",
+    "sections_summary": {
+        "business": "Designs, manufactures and sells hardware and services.",
+        "risk_factors": "Competition, supply chain and currency risks.",
+        "md&a": "Net sales were flat, with growth in services.",
+        "financial_statements": "Audited statements with an unqualified opinion."
+    },
+    "key_financial_metrics": {
+        "revenue": "$260.2 billion",
+        "net_income": "$55.3 billion",
+        "eps": "$11.89",
+        "total_assets": "$338.5 billion",
+        "total_liabilities": "$248.0 billion",
+        "cash_flows": {
+            "operating_activities": "$69.4 billion",
+            "investing_activities": "$45.9 billion",
+            "financing_activities": "-$90.9 billion"
+        }
+    },
+    "management_outlook": "Continued investment in services and new products.",
+    "risk_factors": ["Competition", "Supply chain", "Currency"]
+}
+
+# Pulls the file name out of a multipart upload.
+_FILENAME = re.compile(rb'filename="([^"]*)"')
+
+
+class MockOpenAIServer:
+
+    """A threaded HTTP server that mimics the Files, Assistants, Threads, Messages and Runs endpoints.
+
+    ### Overview:
+    ----
+    Every request sleeps for `latency` seconds, plus up to `jitter`
+    seconds, and fails with `error_status` with probability `error_rate`,
+    so the retry and backoff paths get exercised too. Runs finish after
+    `run_steps` status requests and then post `reply` as the assistant
+    message. Point a client at it with `base_url`, or with the
+    `OPENAI_BASE_URL` environment variable for code that builds its own
+    client.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        run_steps: int = 2,
+        poll_after_ms: int = 50,
+        reply: str = None,
+        port: int = 0,
+        seed: int = 0
+    ) -> None:
+        """Initializes the MockOpenAIServer object.
+
+        ### Parameters:
+        ----
+        latency: float (optional, default=0.0)
+            The seconds every request takes.
+
+        jitter: float (optional, default=0.0)
+            The most extra seconds added to a request at random.
+
+        error_rate: float (optional, default=0.0)
+            The share of requests that fail, between 0 and 1.
+
+        error_status: int (optional, default=500)
+            The status code of a failed request. A 429 also sends a
+            `retry-after` header.
+
+        run_steps: int (optional, default=2)
+            The number of status requests before a run completes.
+
+        poll_after_ms: int (optional, default=50)
+            The poll interval suggested to the SDK by `create_and_poll`.
+
+        reply: str (optional, default=None)
+            The text of every assistant reply. If not provided, a summary
+            that passes the `summary_prompt` schema is used.
+
+        port: int (optional, default=0)
+            The port to listen on. If 0, a free port is picked.
+
+        seed: int (optional, default=0)
+            The seed of the error injection, so runs are repeatable.
+
+        ### Usage:
+        ----
+            >>> from benchmarks.mock_openai import MockOpenAIServer
+            >>> with MockOpenAIServer(latency=0.05, error_rate=0.01) as server:
+            ...     client = OpenAI(api_key="mock", base_url=server.base_url)
+        """
+
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError("error_rate must be between 0 and 1.")
+
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.run_steps = run_steps
+        self.poll_after_ms = poll_after_ms
+        self.reply = reply if reply is not None else json.dumps(SAMPLE_SUMMARY)
+
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._counts = {}
+        self._errors = 0
+        self._files = {}
+        self._assistants = {}
+        self._threads = {}
+        self._runs = {}
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._server.daemon_threads = True
+        self._server.mock = self
+        self._serve_thread = None
+
+    def __enter__(self) -> "MockOpenAIServer":
+        """Starts the server."""
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """Stops the server."""
+        self.stop()
+
+    @property
+    def base_url(self) -> str:
+        """Returns the base URL to give the OpenAI client."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def stats(self) -> dict:
+        """Returns the number of requests per endpoint and the number of injected errors."""
+
+        with self._lock:
+            return {
+                "requests": sum(self._counts.values()),
+                "errors": self._errors,
+                "endpoints": dict(self._counts)
+            }
+
+    def reset_stats(self) -> None:
+        """Zeroes the request and error counts."""
+
+        with self._lock:
+            self._counts = {}
+            self._errors = 0
+
+    def start(self) -> "MockOpenAIServer":
+        """Starts serving in a background thread."""
+
+        self._serve_thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="mock-openai",
+            daemon=True
+        )
+        self._serve_thread.start()
+        logging.info(f"Mock OpenAI server listening on {self.base_url}")
+
+        return self
+
+    def stop(self) -> None:
+        """Stops the server and closes its socket."""
+
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _new_id(self, prefix: str) -> str:
+        """Returns a new, unique object ID."""
+        return f"{prefix}_{next(self._ids):08d}"
+
+    def _should_fail(self) -> bool:
+        """Decides whether to inject an error into this request."""
+
+        with self._lock:
+            fail = self.error_rate > 0 and self._random.random() < self.error_rate
+            if fail:
+                self._errors += 1
+
+        return fail
+
+    def _count(self, method: str, route: str) -> None:
+        """Counts a request against its endpoint."""
+
+        with self._lock:
+            key = f"{method} {route}"
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def handle(self, method: str, path: str, query: dict, body: bytes) -> tuple:
+        """Routes a request to the fake API.
+
+        ### Parameters:
+        ----
+        method: str
+            The HTTP method.
+
+        path: str
+            The path, without the `/v1` prefix.
+
+        query: dict
+            The query string arguments.
+
+        body: bytes
+            The request body.
+
+        ### Returns:
+        ----
+        tuple :
+            The status code, the JSON response and any extra headers.
+        """
+
+        parts = [part for part in path.split("/") if part]
+
+        # Route on the shape of the path, with the IDs replaced.
+        route = "/" + "/".join(
+            part if index % 2 == 0 else "{id}" for index, part in enumerate(parts)
+        )
+        self._count(method=method, route=route)
+
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+        if self._should_fail():
+            headers = {"retry-after": "0.1"} if self.error_status == 429 else {}
+            return self.error_status, {"error": {"message": "Injected error.", "type": "server_error"}}, headers
+
+        payload = json.loads(body) if body and not route.startswith("/files") else {}
+        handler = getattr(self, f"_{method.lower()}_{'_'.join(parts[0::2])}", None)
+
+        if handler is None:
+            return 404, {"error": {"message": f"No route for {method} {route}."}}, {}
+
+        return handler(*parts[1::2], query=query, payload=payload, body=body)
+
+    def _post_files(self, query: dict, payload: dict, body: bytes) -> tuple:
+        """Uploads a file."""
+
+        match = _FILENAME.search(body[:4096])
+        file = {
+            "id": self._new_id("file"),
+            "object": "file",
+            "bytes": len(body),
+            "created_at": int(time.time()),
+            "filename": match.group(1).decode("utf-8", "replace") if match else "upload",
+            "purpose": "assistants",
+            "status": "processed"
+        }
+
+        with self._lock:
+            self._files[file["id"]] = file
+
+        return 200, file, {}
+
+    def _delete_files(self, file_id: str, query: dict, payload: dict, body: bytes) -> tuple:
+        """Deletes a file."""
+
+        with self._lock:
+            self._files.pop(file_id, None)
+
+        return 200, {"id": file_id, "object": "file", "deleted": True}, {}
+
+    def _post_assistants(self, assistant_id: str = None, query: dict = None, payload: dict = None, body: bytes = None) -> tuple:
+        """Creates or updates an assistant."""
+
+        with self._lock:
+            if assistant_id is None:
+                assistant = {
+                    "id": self._new_id("asst"),
+                    "object": "assistant",
+                    "created_at": int(time.time()),
+                    "name": None,
+                    "description": None,
+                    "instructions": None,
+                    "model": "gpt-4o-mini",
+                    "tools": [],
+                    "temperature": 1.0,
+                    "metadata": {}
+                }
+                self._assistants[assistant["id"]] = assistant
+            else:
+                assistant = self._assistants.get(assistant_id, None)
+                if assistant is None:
+                    return 404, {"error": {"message": f"No assistant {assistant_id}."}}, {}
+            assistant.update(payload)
+
+        return 200, assistant, {}
+
+    def _get_assistants(self, assistant_id: str, query: dict, payload: dict, body: bytes) -> tuple:
+        """Retrieves an assistant, creating it if the ID is unknown."""
+
+        with self._lock:
+            assistant = self._assistants.setdefault(assistant_id, {
+                "id": assistant_id,
+                "object": "assistant",
+                "created_at": int(time.time()),
+                "name": "FinBrain",
+                "instructions": "",
+                "model": "gpt-4o-mini",
+                "tools": [],
+                "temperature": 0.2,
+                "metadata": {}
+            })
+
+        return 200, assistant, {}
+
+    def _thread_object(self, thread_id: str) -> dict:
+        """Returns the API object of a thread."""
+
+        return {
+            "id": thread_id,
+            "object": "thread",
+            "created_at": int(time.time()),
+            "metadata": {},
+            "tool_resources": None
+        }
+
+    def _post_threads(self, thread_id: str = None, query: dict = None, payload: dict = None, body: bytes = None) -> tuple:
+        """Creates or updates a thread."""
+
+        with self._lock:
+            if thread_id is None:
+                thread_id = self._new_id("thread")
+            self._threads.setdefault(thread_id, [])
+
+        return 200, self._thread_object(thread_id=thread_id), {}
+
+    def _get_threads(self, thread_id: str, query: dict, payload: dict, body: bytes) -> tuple:
+        """Retrieves a thread, creating it if the ID is unknown."""
+
+        with self._lock:
+            self._threads.setdefault(thread_id, [])
+
+        return 200, self._thread_object(thread_id=thread_id), {}
+
+    def _delete_threads(self, thread_id: str, query: dict, payload: dict, body: bytes) -> tuple:
+        """Deletes a thread."""
+
+        with self._lock:
+            self._threads.pop(thread_id, None)
+
+        return 200, {"id": thread_id, "object": "thread.deleted", "deleted": True}, {}
+
+    def _message_object(self, thread_id: str, role: str, text: str, run_id: str = None, attachments: list = None) -> dict:
+        """Builds and stores a message."""
+
+        message = {
+            "id": self._new_id("msg"),
+            "object": "thread.message",
+            "created_at": int(time.time()),
+            "thread_id": thread_id,
+            "role": role,
+            "content": [{"type": "text", "text": {"value": text, "annotations": []}}],
+            "attachments": attachments or [],
+            "metadata": {},
+            "status": "completed",
+            "assistant_id": None,
+            "run_id": run_id,
+            "completed_at": None,
+            "incomplete_at": None,
+            "incomplete_details": None
+        }
+
+        with self._lock:
+            self._threads.setdefault(thread_id, []).append(message)
+
+        return message
+
+    def _post_threads_messages(self, thread_id: str, query: dict, payload: dict, body: bytes) -> tuple:
+        """Adds a message to a thread."""
+
+        content = payload.get("content", "")
+        if not isinstance(content, str):
+            content = json.dumps(content)
+
+        message = self._message_object(
+            thread_id=thread_id,
+            role=payload.get("role", "user"),
+            text=content,
+            attachments=payload.get("attachments", None)
+        )
+
+        return 200, message, {}
+
+    def _get_threads_messages(self, thread_id: str, query: dict, payload: dict, body: bytes) -> tuple:
+        """Lists the messages of a thread, one page at a time."""
+
+        order = query.get("order", "desc")
+        limit = int(query.get("limit", 20))
+
+        with self._lock:
+            messages = list(self._threads.get(thread_id, []))
+
+        if order == "desc":
+            messages.reverse()
+
+        if "run_id" in query:
+            messages = [msg for msg in messages if msg["run_id"] == query["run_id"]]
+
+        if "after" in query:
+            ids = [msg["id"] for msg in messages]
+            start = ids.index(query["after"]) + 1 if query["after"] in ids else len(ids)
+            messages = messages[start:]
+
+        page = messages[:limit]
+
+        return 200, {
+            "object": "list",
+            "data": page,
+            "first_id": page[0]["id"] if page else None,
+            "last_id": page[-1]["id"] if page else None,
+            "has_more": len(messages) > limit
+        }, {}
+
+    def _delete_threads_messages(self, thread_id: str, message_id: str, query: dict, payload: dict, body: bytes) -> tuple:
+        """Deletes a message."""
+
+        with self._lock:
+            self._threads[thread_id] = [
+                msg for msg in self._threads.get(thread_id, []) if msg["id"] != message_id
+            ]
+
+        return 200, {"id": message_id, "object": "thread.message.deleted", "deleted": True}, {}
+
+    def _run_object(self, run: dict) -> dict:
+        """Returns the API object of a run."""
+
+        completed = run["status"] == "completed"
+        prompt_tokens = run["prompt_tokens"]
+
+        return {
+            "id": run["id"],
+            "object": "thread.run",
+            "created_at": run["created_at"],
+            "thread_id": run["thread_id"],
+            "assistant_id": run["assistant_id"],
+            "status": run["status"],
+            "model": "gpt-4o-mini",
+            "instructions": "",
+            "tools": [],
+            "parallel_tool_calls": True,
+            "metadata": {},
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(self.reply) // 4,
+                "total_tokens": prompt_tokens + len(self.reply) // 4
+            } if completed else None
+        }
+
+    def _post_threads_runs(self, thread_id: str, query: dict, payload: dict, body: bytes) -> tuple:
+        """Starts a run."""
+
+        with self._lock:
+            prompt_tokens = sum(
+                len(msg["content"][0]["text"]["value"]) // 4
+                for msg in self._threads.get(thread_id, [])
+            )
+            run = {
+                "id": self._new_id("run"),
+                "thread_id": thread_id,
+                "assistant_id": payload.get("assistant_id", ""),
+                "created_at": int(time.time()),
+                "status": "queued",
+                "polls": 0,
+                "prompt_tokens": prompt_tokens
+            }
+            self._runs[run["id"]] = run
+
+        return 200, self._run_object(run=run), {"openai-poll-after-ms": str(self.poll_after_ms)}
+
+    def _get_threads_runs(self, thread_id: str, run_id: str, query: dict, payload: dict, body: bytes) -> tuple:
+        """Retrieves a run, moving it one step closer to completion."""
+
+        post_reply = False
+
+        with self._lock:
+            run = self._runs.get(run_id, None)
+            if run is None:
+                return 404, {"error": {"message": f"No run {run_id}."}}, {}
+            if run["status"] != "completed":
+                run["polls"] += 1
+                if run["polls"] >= self.run_steps:
+                    run["status"] = "completed"
+                    post_reply = True
+                else:
+                    run["status"] = "in_progress"
+
+        if post_reply:
+            self._message_object(
+                thread_id=thread_id,
+                role="assistant",
+                text=self.reply,
+                run_id=run_id
+            )
+
+        return 200, self._run_object(run=run), {"openai-poll-after-ms": str(self.poll_after_ms)}
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    """Turns HTTP requests into calls to `MockOpenAIServer.handle`."""
+
+    protocol_version = "HTTP/1.1"
+
+    def _dispatch(self) -> None:
+        """Reads the request, routes it and writes the JSON response."""
+
+        url = urlsplit(self.path)
+        length = int(self.headers.get("content-length", 0) or 0)
+        body = self.rfile.read(length) if length else b""
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        path = url.path[3:] if url.path.startswith("/v1") else url.path
+
+        status, payload, headers = self.server.mock.handle(
+            method=self.command,
+            path=path,
+            query=query,
+            body=body
+        )
+
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = _dispatch
+    do_POST = _dispatch
+    do_DELETE = _dispatch
+
+    def log_message(self, format: str, *args) -> None:
+        """Keeps the request log out of the benchmark output."""
@@ -0,0 +1,333 @@
+"""Runs the finbrain benchmarks against the mock OpenAI server.
+
+### Overview:
+----
+Each benchmark reports its throughput and timings as a flat dictionary.
+Pass `--output` to save the results, and `--baseline` with an earlier
+results file to fail when any `*_per_sec` metric drops, or any
+`*_seconds` metric grows, by more than `--tolerance`.
+
+### Usage:
+----
+    $ python -m benchmarks.run_benchmarks
+    $ python -m benchmarks.run_benchmarks --latency 0.05 --error-rate 0.01 --output bench.json
+    $ python -m benchmarks.run_benchmarks --baseline bench.json --tolerance 0.2
+    $ python -m benchmarks.run_benchmarks --only end_to_end --metrics metrics.prom
+"""
+
+import os
+import sys
+import json
+import time
+import pathlib
+import argparse
+import tempfile
+
+from openai import OpenAI
+
+from benchmarks.mock_openai import SAMPLE_SUMMARY
+from benchmarks.mock_openai import MockOpenAIServer
+
+from finbrain.utils import Files
+from finbrain.thread import Thread
+from finbrain.prompts import Prompt
+from finbrain.metrics import JsonExporter
+from finbrain.metrics import PrometheusExporter
+from finbrain.metrics import default_metrics
+from finbrain.validator import Validator
+from finbrain.client import FinBrainAssistant
+
+# The folder of sample filings shipped with the repo.
+SEC_DOCS = pathlib.Path(__file__).resolve().parent.parent.joinpath("sec_docs")
+
+
+def _client(server: MockOpenAIServer) -> OpenAI:
+    """Returns an OpenAI client pointed at the mock server."""
+    return OpenAI(api_key="mock", base_url=server.base_url)
+
+
+def _make_documents(directory: pathlib.Path, count: int) -> pathlib.Path:
+    """Writes `count` distinct documents, built from the sample filings.
+
+    ### Overview:
+    ----
+    Each copy gets a unique trailer, so no two documents share a digest
+    and none of them are skipped as duplicates.
+    """
+
+    directory.mkdir(parents=True, exist_ok=True)
+    sources = sorted(SEC_DOCS.glob("*.html"))
+
+    for index in range(count):
+        source = sources[index % len(sources)]
+        data = source.read_bytes() + f"\n<!-- copy {index} -->\n".encode("utf-8")
+        directory.joinpath(f"{index:06d}_{source.name}").write_bytes(data)
+
+    return directory
+
+
+def bench_upload(server: MockOpenAIServer, workdir: pathlib.Path, count: int, workers: int) -> dict:
+    """Measures how many files per second `Files.upload_all` uploads."""
+
+    documents = _make_documents(directory=workdir.joinpath("upload"), count=count)
+
+    files = Files(client=_client(server=server))
+    files.add_directory(path=documents, pattern="*.html")
+
+    server.reset_stats()
+    start = time.perf_counter()
+    results = files.upload_all(max_workers=workers)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "files": len(results),
+        "failed": sum(1 for result in results if result["status"] != "success"),
+        "workers": workers,
+        "upload_seconds": elapsed,
+        "files_per_sec": len(results) / elapsed,
+        "requests": server.stats["requests"]
+    }
+
+
+def bench_polling(server: MockOpenAIServer, runs: int) -> dict:
+    """Measures the requests and time spent polling runs until they finish."""
+
+    thread = Thread(client=_client(server=server))
+    thread.assistant = _client(server=server).beta.assistants.create(model="gpt-4o-mini")
+
+    polls = 0
+    wait = 0.0
+
+    server.reset_stats()
+    start = time.perf_counter()
+
+    for _ in range(runs):
+        thread.add_message(role="user", message="Summarize the filing.")
+        thread.create_run(poll=False)
+        thread.poll_run_status(interval=server.poll_after_ms / 1000)
+        polls += thread.poll_count
+        wait += thread.poll_wait
+
+    elapsed = time.perf_counter() - start
+    thread.delete()
+
+    return {
+        "runs": runs,
+        "polls_per_run": polls / runs,
+        "poll_seconds": wait / runs,
+        "runs_per_sec": runs / elapsed,
+        "requests": server.stats["requests"]
+    }
+
+
+def bench_state(server: MockOpenAIServer, workdir: pathlib.Path, entries: int, changes: int) -> dict:
+    """Measures loading, journaling and saving a large state file with `FinBrainAssistant`."""
+
+    state_file = workdir.joinpath("state.json")
+    state = {
+        "assistant_id": "asst_benchmark",
+        "thread": "thread_benchmark",
+        "files": [
+            {
+                "file_id": f"file_{index:08d}",
+                "name": f"{index:08d}.html",
+                "is_uploaded": True,
+                "path": f"sec_docs/{index:08d}.html",
+                "size": 14679,
+                "creation_date": 1723262877.0,
+                "upload_date": 1723262877.0,
+                "digest": f"{index:064x}",
+                "upload_path": ""
+            }
+            for index in range(entries)
+        ]
+    }
+    state_file.write_text(json.dumps(state), encoding="utf-8")
+
+    start = time.perf_counter()
+    assistant = FinBrainAssistant(
+        api_key="mock",
+        save_state=True,
+        state_file=state_file.as_posix(),
+        autosave_interval=3600.0
+    )
+    load_seconds = time.perf_counter() - start
+
+    # Journal a few changes, the way uploads mark files as they finish.
+    files = assistant.files.list_files()[:changes]
+    start = time.perf_counter()
+    for file in files:
+        file._upload_date = time.time()
+        assistant._record_file(file=file, removed=False)
+    assistant.flush()
+    journal_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    assistant._write_state()
+    save_seconds = time.perf_counter() - start
+
+    # Close the journal now, the temporary folder is gone by the time the assistant is collected.
+    assistant._store.close()
+    assistant._store = None
+
+    return {
+        "entries": entries,
+        "changes": len(files),
+        "load_seconds": load_seconds,
+        "journal_seconds": journal_seconds,
+        "save_seconds": save_seconds,
+        "changes_per_sec": len(files) / journal_seconds if journal_seconds else 0.0
+    }
+
+
+def bench_validation(count: int) -> dict:
+    """Measures how many summaries per second are validated against the prompt schema."""
+
+    schema = Prompt().schema
+    validator = Validator()
+
+    # One in ten summaries is missing a required key, so the error path is measured too.
+    invalid = dict(SAMPLE_SUMMARY)
+    invalid.pop("company_name")
+    documents = [
+        json.dumps(invalid if index % 10 == 0 else SAMPLE_SUMMARY)
+        for index in range(count)
+    ]
+
+    start = time.perf_counter()
+    results = list(validator.validate_many(json_strings=documents, schema=schema))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "objects": count,
+        "invalid": sum(1 for result in results if result["status"] == "error"),
+        "validation_seconds": elapsed,
+        "objects_per_sec": count / elapsed
+    }
+
+
+def bench_end_to_end(server: MockOpenAIServer, concurrency: int) -> dict:
+    """Measures documents per second through `summarize_many` over the sample filings."""
+
+    assistant = FinBrainAssistant(api_key="mock")
+    assistant.files.add_directory(path=SEC_DOCS, pattern="*.html")
+    files = assistant.files.list_files()
+
+    server.reset_stats()
+    start = time.perf_counter()
+    results = assistant.summarize_many(files=files, concurrency=concurrency)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "documents": len(results),
+        "succeeded": sum(1 for result in results if result["status"] == "success"),
+        "concurrency": concurrency,
+        "end_to_end_seconds": elapsed,
+        "docs_per_sec": len(results) / elapsed,
+        "requests": server.stats["requests"]
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Lists the metrics that regressed against a baseline.
+
+    ### Parameters:
+    ----
+    results: dict
+        The results of this run.
+
+    baseline: dict
+        The results of an earlier run.
+
+    tolerance: float
+        The allowed change, as a share of the baseline.
+
+    ### Returns:
+    ----
+    list :
+        One message per regressed metric.
+    """
+
+    regressions = []
+
+    for name, metrics in results.items():
+        for key, value in metrics.items():
+
+            before = baseline.get(name, {}).get(key, None)
+            if not isinstance(before, (int, float)) or before == 0:
+                continue
+
+            if key.endswith("_per_sec") and value < before * (1 - tolerance):
+                regressions.append(f"{name}.{key} dropped from {before:.4g} to {value:.4g}")
+            elif key.endswith("_seconds") and value > before * (1 + tolerance):
+                regressions.append(f"{name}.{key} grew from {before:.4g} to {value:.4g}")
+
+    return regressions
+
+
+def main() -> int:
+    """Runs the suite and returns the exit code."""
+
+    parser = argparse.ArgumentParser(description="Benchmark finbrain against a mock OpenAI API.")
+    parser.add_argument("--latency", type=float, default=0.01, help="Seconds per mock request.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Most extra seconds per mock request.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of mock requests that fail.")
+    parser.add_argument("--uploads", type=int, default=200, help="Documents in the upload benchmark.")
+    parser.add_argument("--workers", type=int, default=8, help="Upload workers.")
+    parser.add_argument("--runs", type=int, default=20, help="Runs in the polling benchmark.")
+    parser.add_argument("--entries", type=int, default=50000, help="Files in the state benchmark.")
+    parser.add_argument("--changes", type=int, default=1000, help="Journaled changes in the state benchmark.")
+    parser.add_argument("--validations", type=int, default=5000, help="Summaries in the validation benchmark.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Documents in flight end to end.")
+    parser.add_argument("--only", nargs="*", default=None, help="Only run these benchmarks.")
+    parser.add_argument("--output", default="", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", default="", help="Compare against this results file.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression against the baseline.")
+    parser.add_argument("--metrics", default="", help="Export the per-call metrics, to JSON or a Prometheus `.prom` file.")
+    args = parser.parse_args()
+
+    results = {}
+
+    with MockOpenAIServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate) as server:
+
+        # Code that builds its own client, like `FinBrainAssistant`, picks the server up from here.
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+
+            workdir = pathlib.Path(temp_dir)
+            benchmarks = {
+                "upload": lambda: bench_upload(server=server, workdir=workdir, count=args.uploads, workers=args.workers),
+                "polling": lambda: bench_polling(server=server, runs=args.runs),
+                "state": lambda: bench_state(server=server, workdir=workdir, entries=args.entries, changes=args.changes),
+                "validation": lambda: bench_validation(count=args.validations),
+                "end_to_end": lambda: bench_end_to_end(server=server, concurrency=args.concurrency)
+            }
+
+            for name, benchmark in benchmarks.items():
+                if args.only and name not in args.only:
+                    continue
+                results[name] = benchmark()
+                print(f"{name}: {json.dumps(results[name], indent=4)}")
+
+    if args.metrics:
+        exporter = PrometheusExporter if args.metrics.endswith(".prom") else JsonExporter
+        default_metrics().export(exporter=exporter(path=args.metrics))
+
+    if args.output:
+        with open(file=args.output, mode="w+", encoding="utf-8") as file:
+            json.dump(results, file, indent=4)
+
+    if args.baseline:
+        with open(file=args.baseline, mode="r", encoding="utf-8") as file:
+            regressions = compare(results=results, baseline=json.load(file), tolerance=args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
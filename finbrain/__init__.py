@@ -0,0 +1,98 @@
+"""The public API of finbrain.
+
+### Overview:
+----
+Names are imported from their modules the first time they are used, so
+`import finbrain` stays cheap and never loads `openai` or `jsonschema`
+until a client or validator is actually needed.
+
+### Usage:
+----
+    >>> import finbrain
+    >>> assistant = finbrain.FinBrainAssistant(api_key=api_key)
+    >>> from finbrain import Prompt, Validator
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+# Maps every public name to the module it lives in.
+_EXPORTS = {
+    "FinBrainAssistant": "finbrain.client",
+    "AsyncFinBrainAssistant": "finbrain.client",
+    "File": "finbrain.utils",
+    "Files": "finbrain.utils",
+    "AsyncFiles": "finbrain.utils",
+    "UploadCache": "finbrain.utils",
+    "Preprocessor": "finbrain.utils",
+    "Thread": "finbrain.thread",
+    "ThreadPool": "finbrain.thread",
+    "AsyncThread": "finbrain.thread",
+    "AssistantCreator": "finbrain.assistant",
+    "AsyncAssistantCreator": "finbrain.assistant",
+    "Prompt": "finbrain.prompts",
+    "Validator": "finbrain.validator",
+    "SchemaRegistry": "finbrain.schemas",
+    "StateStore": "finbrain.state",
+    "RateLimiter": "finbrain.ratelimit",
+    "SummaryCache": "finbrain.cache",
+    "BatchRunner": "finbrain.batch",
+    "VectorStore": "finbrain.vector_store",
+    "SearchIndex": "finbrain.search",
+    "SectionChunker": "finbrain.chunking",
+    "Metrics": "finbrain.metrics",
+    "JsonExporter": "finbrain.metrics",
+    "PrometheusExporter": "finbrain.metrics",
+    "default_metrics": "finbrain.metrics"
+}
+
+__all__ = sorted(_EXPORTS)
+
+if TYPE_CHECKING:
+    from finbrain.client import FinBrainAssistant
+    from finbrain.client import AsyncFinBrainAssistant
+    from finbrain.utils import File
+    from finbrain.utils import Files
+    from finbrain.utils import AsyncFiles
+    from finbrain.utils import UploadCache
+    from finbrain.utils import Preprocessor
+    from finbrain.thread import Thread
+    from finbrain.thread import ThreadPool
+    from finbrain.thread import AsyncThread
+    from finbrain.assistant import AssistantCreator
+    from finbrain.assistant import AsyncAssistantCreator
+    from finbrain.prompts import Prompt
+    from finbrain.validator import Validator
+    from finbrain.schemas import SchemaRegistry
+    from finbrain.state import StateStore
+    from finbrain.ratelimit import RateLimiter
+    from finbrain.cache import SummaryCache
+    from finbrain.batch import BatchRunner
+    from finbrain.vector_store import VectorStore
+    from finbrain.search import SearchIndex
+    from finbrain.chunking import SectionChunker
+    from finbrain.metrics import Metrics
+    from finbrain.metrics import JsonExporter
+    from finbrain.metrics import PrometheusExporter
+    from finbrain.metrics import default_metrics
+
+
+def __getattr__(name: str):
+    """Imports a public name from its module on first access."""
+
+    module_name = _EXPORTS.get(name, None)
+
+    if module_name is None:
+        raise AttributeError(f"module 'finbrain' has no attribute '{name}'")
+
+    value = getattr(importlib.import_module(module_name), name)
+
+    # Cache it on the package, so later lookups skip this function.
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> list:
+    """Lists the public names alongside the module attributes."""
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -1,7 +1,22 @@
-"""This module contains the AssistantCreator class."""
+"""This module contains the AssistantCreator and AsyncAssistantCreator classes."""
 
-from openai import OpenAI
-from openai.types.beta import Assistant
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+    from openai import AsyncOpenAI
+    from openai.types.beta import Assistant
+
+# The configuration every FinBrain assistant is created with.
+ASSISTANT_CONFIG = {
+    "name": "FinanceAgent",
+    "instructions": "You are financial analyst who helps individuals answer questions related to their financials.",
+    "model": "gpt-4o-mini",
+    "tools": [{"type": "file_search"}],
+    "temperature": 0.2
+}
 
 
 class AssistantCreator:
@@ -48,13 +63,7 @@ class AssistantCreator:
     def _create_assistant(self) -> Assistant:
         """Creates an assistant on the OpenAI platform."""
 
-        return self._client.beta.assistants.create(
-            name="FinanceAgent",
-            instructions="You are financial analyst who helps individuals answer questions related to their financials.",
-            model="gpt-4o-mini",
-            tools=[{"type": "file_search"}],
-            temperature=0.2
-        )
+        return self._client.beta.assistants.create(**ASSISTANT_CONFIG)
 
     def _retrieve_assistant(self) -> Assistant:
         """Retrieves an assistant from the OpenAI platform."""
@@ -62,3 +71,64 @@ class AssistantCreator:
         return self._client.beta.assistants.retrieve(
             assistant_id=self._assistant_id
         )
+
+
+class AsyncAssistantCreator:
+
+    """A class to create and retrieve an assistant with an `AsyncOpenAI` client."""
+
+    def __init__(self, client: AsyncOpenAI, assistant_id: str = "") -> None:
+        """Initializes the AsyncAssistantCreator object.
+
+        ### Overview:
+        ----
+        Nothing is sent to the API until `initalize_assistant` is awaited,
+        or the object is built with `AsyncAssistantCreator.open`.
+
+        ### Parameters:
+        ----
+        client: AsyncOpenAI
+            The async OpenAI client object.
+
+        assistant_id: str (optional, default="")
+            The ID of the assistant to retrieve. If no ID is provided,
+            a new assistant will be created.
+
+        ### Usage:
+        ----
+            >>> from openai import AsyncOpenAI
+            >>> from finbrain.assistant import AsyncAssistantCreator
+            >>> client = AsyncOpenAI(api_key)
+            >>> assistant_creator = await AsyncAssistantCreator.open(client=client)
+            >>> assistant = assistant_creator.assistant
+        """
+
+        self._client = client
+        self._assistant_id = assistant_id
+        self._assistant = None
+
+    @classmethod
+    async def open(cls, client: AsyncOpenAI, assistant_id: str = "") -> "AsyncAssistantCreator":
+        """Creates the object and resolves its assistant."""
+
+        assistant_creator = cls(client=client, assistant_id=assistant_id)
+        await assistant_creator.initalize_assistant()
+
+        return assistant_creator
+
+    @property
+    def assistant(self) -> Assistant:
+        """Returns the assistant object."""
+        return self._assistant
+
+    async def initalize_assistant(self) -> Assistant:
+        """Creates or retrieves an assistant from the OpenAI platform."""
+
+        if self._assistant_id != "":
+            self._assistant = await self._client.beta.assistants.retrieve(
+                assistant_id=self._assistant_id
+            )
+        else:
+            self._assistant = await self._client.beta.assistants.create(**ASSISTANT_CONFIG)
+
+        return self._assistant
@@ -0,0 +1,274 @@
+"""This module contains the BatchRunner class."""
+
+from __future__ import annotations
+
+import json
+import pathlib
+import logging
+from typing import Iterable
+from typing import TYPE_CHECKING
+
+from finbrain.utils import File
+from finbrain.prompts import Prompt
+from finbrain.validator import Validator
+from finbrain.assistant import ASSISTANT_CONFIG
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+    from openai.types import Batch
+
+# The most requests the Batch API accepts in a single input file.
+MAX_BATCH_REQUESTS = 50000
+
+
+class BatchRunner:
+
+    """A class to summarize documents offline with the OpenAI Batch API."""
+
+    def __init__(self, client: OpenAI, prompt: Prompt, validator: Validator = None) -> None:
+        """Initializes the BatchRunner object.
+
+        ### Overview:
+        ----
+        The Batch API only serves the chat completions endpoint, so each
+        request carries the document text inline instead of relying on
+        file search. Preprocess the files first to keep the requests small.
+
+        ### Parameters:
+        ----
+        client: OpenAI
+            The OpenAI client object.
+
+        prompt: Prompt
+            The prompt used to build every request.
+
+        validator: Validator (optional, default=None)
+            The validator used on the results. If not provided, a new one
+            is created.
+
+        ### Usage:
+        ----
+            >>> from finbrain.batch import BatchRunner
+            >>> runner = BatchRunner(client=client, prompt=Prompt())
+            >>> runner.write_requests(files=files, requests_path="requests.jsonl")
+            >>> job = runner.submit(requests_path="requests.jsonl")
+        """
+
+        self._client = client
+        self._prompt = prompt
+        self._validator = validator or Validator()
+
+    def _build_request(self, file: File) -> dict:
+        """Builds the chat completion request for a single file.
+
+        ### Parameters:
+        ----
+        file: File
+            The file to summarize.
+
+        ### Returns:
+        ----
+        dict :
+            A single line of the batch input file.
+        """
+
+        document = file.upload_path.read_text(encoding="utf-8", errors="replace")
+
+        return {
+            "custom_id": file.name,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": ASSISTANT_CONFIG["model"],
+                "temperature": ASSISTANT_CONFIG["temperature"],
+                "response_format": {"type": "json_object"},
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": ASSISTANT_CONFIG["instructions"]
+                    },
+                    {
+                        "role": "user",
+                        "content": (
+                            self._prompt.create_prompt(file=file)
+                            + f"\n\n<DOCUMENT name=\"{file.name}\">\n{document}\n</DOCUMENT>"
+                        )
+                    }
+                ]
+            }
+        }
+
+    def write_requests(self, files: Iterable[File], requests_path: str) -> int:
+        """Writes the batch input file, one request per line.
+
+        ### Parameters:
+        ----
+        files: Iterable[File]
+            The files to summarize.
+
+        requests_path: str
+            The path of the JSONL file to write.
+
+        ### Returns:
+        ----
+        int :
+            The number of requests written.
+        """
+
+        count = 0
+
+        with open(file=requests_path, mode="w+", encoding="utf-8") as requests_file:
+            for file in files:
+                count += 1
+                if count > MAX_BATCH_REQUESTS:
+                    raise ValueError(
+                        f"A batch can hold at most {MAX_BATCH_REQUESTS} requests."
+                    )
+                requests_file.write(json.dumps(self._build_request(file=file)) + "\n")
+
+        logging.info(f"Wrote {count} batch requests to {requests_path}.")
+
+        return count
+
+    def submit(self, requests_path: str) -> dict:
+        """Uploads the batch input file and starts the batch.
+
+        ### Parameters:
+        ----
+        requests_path: str
+            The path of the JSONL file written by `write_requests`.
+
+        ### Returns:
+        ----
+        dict :
+            The job record, suitable for storing in the assistant state.
+        """
+
+        input_file = self._client.files.create(
+            file=pathlib.Path(requests_path),
+            purpose="batch"
+        )
+
+        batch = self._client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+
+        logging.info(f"Submitted batch {batch.id} from {requests_path}.")
+
+        return {
+            "id": batch.id,
+            "input_file_id": input_file.id,
+            "status": batch.status,
+            "created_at": batch.created_at,
+            "output_path": ""
+        }
+
+    def retrieve(self, batch_id: str) -> Batch:
+        """Retrieves a batch by ID.
+
+        ### Parameters:
+        ----
+        batch_id: str
+            The ID of the batch.
+        """
+        return self._client.batches.retrieve(batch_id=batch_id)
+
+    def collect(self, batch_id: str, output_path: str, schema: dict = None) -> dict:
+        """Streams the results of a completed batch through the validator.
+
+        ### Parameters:
+        ----
+        batch_id: str
+            The ID of the batch.
+
+        output_path: str
+            The path of the JSONL file the validated results are written to.
+
+        schema: dict (optional, default=None)
+            The JSON schema the summaries are validated against. If not
+            provided, the schema of the prompt is used.
+
+        ### Returns:
+        ----
+        dict :
+            The status of the batch and the number of results that were
+            valid, invalid or failed.
+
+        ### Raises:
+        ----
+        ValueError:
+            If the batch has not completed yet.
+        """
+
+        batch = self.retrieve(batch_id=batch_id)
+
+        if batch.status != "completed":
+            raise ValueError(
+                f"Batch {batch_id} is not complete, its status is {batch.status}."
+            )
+
+        schema = schema or self._prompt.schema
+        counts = {"status": batch.status, "success": 0, "error": 0, "failed": 0}
+
+        with open(file=output_path, mode="w+", encoding="utf-8") as output_file:
+
+            for file_id in (batch.output_file_id, batch.error_file_id):
+
+                if not file_id:
+                    continue
+
+                # Stream the results, so large batches are never held in memory.
+                with self._client.files.with_streaming_response.content(file_id=file_id) as response:
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        result = self._parse_result(line=line, schema=schema)
+                        counts[result["status"]] += 1
+                        output_file.write(json.dumps(result) + "\n")
+
+        logging.info(
+            f"Collected batch {batch_id}: {counts['success']} valid, "
+            f"{counts['error']} invalid, {counts['failed']} failed."
+        )
+
+        return counts
+
+    def _parse_result(self, line: str, schema: dict) -> dict:
+        """Validates a single line of a batch output file.
+
+        ### Parameters:
+        ----
+        line: str
+            A line of the batch output or error file.
+
+        schema: dict
+            The JSON schema the summary is validated against.
+
+        ### Returns:
+        ----
+        dict :
+            The validated result, with a `failed` status when the request
+            itself did not succeed.
+        """
+
+        record = json.loads(line)
+        response = record.get("response") or {}
+
+        if record.get("error") or response.get("status_code") != 200:
+            result = {
+                "status": "failed",
+                "message": json.dumps(record.get("error") or response.get("body")),
+                "object": None
+            }
+        else:
+            content = response["body"]["choices"][0]["message"]["content"]
+            result = self._validator.validate_json_schema(
+                json_string=content,
+                schema=schema
+            )
+
+        result["name"] = record["custom_id"]
+
+        return result
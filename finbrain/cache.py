@@ -0,0 +1,237 @@
+"""This module contains the SummaryCache class."""
+
+from __future__ import annotations
+
+import os
+import json
+import hashlib
+import pathlib
+import logging
+import threading
+
+from finbrain.assistant import ASSISTANT_CONFIG
+
+
+class SummaryCache:
+
+    """A local cache of validated summaries, stored as a folder of JSON files.
+
+    ### Overview:
+    ----
+    Each summary is keyed by the content digest of the document, the
+    digest of the rendered prompt, the schema, and the model, temperature
+    and instructions the assistant is created with, so a summary is only
+    reused when every input to the run is identical. The least recently
+    used entries are evicted once the cache grows past its entry or byte
+    limits.
+    """
+
+    def __init__(
+        self,
+        directory: str = ".finbrain/summaries",
+        max_entries: int = 100000,
+        max_bytes: int = 1024 * 1024 * 1024
+    ) -> None:
+        """Initializes the SummaryCache object.
+
+        ### Parameters:
+        ----
+        directory: str (optional, default=".finbrain/summaries")
+            The folder the summaries are stored in.
+
+        max_entries: int (optional, default=100000)
+            The most summaries kept before the oldest are evicted.
+
+        max_bytes: int (optional, default=1 GiB)
+            The most bytes kept before the oldest summaries are evicted.
+
+        ### Usage:
+        ----
+            >>> from finbrain.cache import SummaryCache
+            >>> cache = SummaryCache()
+            >>> results = assistant.summarize_many(files=assistant.files, cache=cache)
+            >>> cache.stats
+        """
+
+        self._directory = pathlib.Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        # Size the cache once, after that the totals are tracked as entries come and go.
+        self._entries = 0
+        self._bytes = 0
+        for path in self._directory.glob("*/*.json"):
+            self._entries += 1
+            self._bytes += path.stat().st_size
+
+    @property
+    def stats(self) -> dict:
+        """Returns the number of hits, misses, entries and bytes."""
+
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "entries": self._entries,
+            "bytes": self._bytes
+        }
+
+    @staticmethod
+    def key(
+        file_digest: str,
+        prompt: str,
+        config: dict = None,
+        schema: dict = None,
+        upload_digest: str = ""
+    ) -> str:
+        """Builds the cache key for a summary.
+
+        ### Parameters:
+        ----
+        file_digest: str
+            The SHA-256 digest of the document contents.
+
+        prompt: str
+            The rendered prompt sent with the document.
+
+        config: dict (optional, default=None)
+            The model, temperature and instructions of the assistant that
+            writes the summary. If not provided, `ASSISTANT_CONFIG` is
+            used, so building a key never needs the assistant itself.
+
+        schema: dict (optional, default=None)
+            The JSON schema the summary was validated against, so a
+            schema change never returns summaries of the old shape.
+
+        upload_digest: str (optional, default="")
+            The SHA-256 digest of the bytes that were uploaded, which
+            differs from `file_digest` when the document was preprocessed.
+            A change in preprocessing then misses the cache too.
+
+        ### Returns:
+        ----
+        str :
+            The hex digest that identifies the summary.
+        """
+
+        config = config or ASSISTANT_CONFIG
+
+        material = json.dumps(
+            {
+                "file": file_digest,
+                "upload": upload_digest or file_digest,
+                "prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+                "schema": hashlib.sha256(
+                    json.dumps(schema, sort_keys=True).encode("utf-8")
+                ).hexdigest(),
+                "model": config["model"],
+                "temperature": config["temperature"],
+                "instructions": config["instructions"]
+            },
+            sort_keys=True
+        )
+
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> pathlib.Path:
+        """Returns the path of an entry, sharded so no folder grows too large."""
+        return self._directory.joinpath(key[:2], f"{key}.json")
+
+    def get(self, key: str) -> dict:
+        """Returns a cached summary, or None.
+
+        ### Parameters:
+        ----
+        key: str
+            The key built by `SummaryCache.key`.
+        """
+
+        path = self._path(key=key)
+
+        try:
+            with open(file=path, mode="r", encoding="utf-8") as file:
+                result = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self._misses += 1
+            return None
+
+        # Touch the entry, so eviction treats it as recently used.
+        os.utime(path)
+
+        with self._lock:
+            self._hits += 1
+
+        return result
+
+    def put(self, key: str, result: dict) -> None:
+        """Stores a summary, evicting old ones if the cache is full.
+
+        ### Parameters:
+        ----
+        key: str
+            The key built by `SummaryCache.key`.
+
+        result: dict
+            The validated result to store.
+        """
+
+        path = self._path(key=key)
+        path.parent.mkdir(exist_ok=True)
+
+        previous = path.stat().st_size if path.exists() else None
+
+        temp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        with open(file=temp_path, mode="w+", encoding="utf-8") as file:
+            json.dump(result, file)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            if previous is None:
+                self._entries += 1
+            else:
+                self._bytes -= previous
+            self._bytes += path.stat().st_size
+
+        if self._entries > self._max_entries or self._bytes > self._max_bytes:
+            self.evict()
+
+    def evict(self) -> int:
+        """Removes the least recently used entries until the cache is back under 90% of its limits.
+
+        ### Returns:
+        ----
+        int :
+            The number of entries removed.
+        """
+
+        with self._lock:
+
+            entries = []
+            for path in self._directory.glob("*/*.json"):
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+            entries.sort()
+
+            self._entries = len(entries)
+            self._bytes = sum(size for _, size, _ in entries)
+
+            # Evict below the limits, so the next few puts do not evict again.
+            target_entries = int(self._max_entries * 0.9)
+            target_bytes = int(self._max_bytes * 0.9)
+            removed = 0
+
+            for _, size, path in entries:
+                if self._entries <= target_entries and self._bytes <= target_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                self._entries -= 1
+                self._bytes -= size
+                removed += 1
+
+        logging.info(f"Evicted {removed} summaries from the cache.")
+
+        return removed
@@ -0,0 +1,437 @@
+"""This module contains the SectionChunker class, which splits 10-K and 10-Q filings by Item."""
+
+import re
+import mmap
+import pathlib
+from typing import Iterator
+from finbrain.utils import File
+from finbrain.utils import _text_path
+
+# The section key of every 10-K Item. Keys that are not in the `sections_summary`
+# schema end up under its `other_sections`.
+FORM_10K_ITEMS = {
+    "1": "business",
+    "1A": "risk_factors",
+    "1B": "unresolved_staff_comments",
+    "1C": "cybersecurity",
+    "2": "properties",
+    "3": "legal_proceedings",
+    "4": "mine_safety_disclosures",
+    "5": "market_for_common_equity",
+    "6": "selected_financial_data",
+    "7": "md&a",
+    "7A": "market_risk_disclosures",
+    "8": "financial_statements",
+    "9": "changes_in_accountants",
+    "9A": "controls_and_procedures",
+    "9B": "other_information",
+    "9C": "foreign_jurisdiction_disclosures",
+    "10": "directors_and_governance",
+    "11": "executive_compensation",
+    "12": "security_ownership",
+    "13": "related_transactions",
+    "14": "accountant_fees",
+    "15": "exhibits",
+    "16": "form_10k_summary"
+}
+
+# The section key of every 10-Q Item. 10-Q Items restart in each Part, so they are keyed by both.
+FORM_10Q_ITEMS = {
+    ("I", "1"): "financial_statements",
+    ("I", "2"): "md&a",
+    ("I", "3"): "market_risk_disclosures",
+    ("I", "4"): "controls_and_procedures",
+    ("II", "1"): "legal_proceedings",
+    ("II", "1A"): "risk_factors",
+    ("II", "2"): "unregistered_sales",
+    ("II", "3"): "defaults_on_senior_securities",
+    ("II", "4"): "mine_safety_disclosures",
+    ("II", "5"): "other_information",
+    ("II", "6"): "exhibits"
+}
+
+# Matches a Part or Item heading at the start of a line of preprocessed text. The
+# number must be followed by punctuation or the end of the line, so prose like
+# "Item 7 of this report" is not mistaken for a heading.
+_HEADING_PATTERN = re.compile(
+    rb"^(?:#+ )?(?:part[ \t]+(?P<part>iv|i{1,3})|item[ \t]+(?P<item>\d{1,2}[a-c]?))"
+    rb"(?:[ \t]*(?:[.:|-]|\xe2\x80\x93|\xe2\x80\x94)(?P<title>[^\n]*)|[ \t]*$)",
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Finds the form type on the cover page.
+_FORM_PATTERN = re.compile(rb"form\s+10-?(?P<form>[kq])\b", re.IGNORECASE)
+
+# Titles are cut to this length, when a heading runs into the text that follows it.
+_MAX_TITLE_BYTES = 200
+
+# How much of the filing is searched for the form type.
+_COVER_BYTES = 65536
+
+
+class SectionChunk:
+
+    """A byte range of a filing that holds one section, or one piece of a long section."""
+
+    __slots__ = ("_path", "_key", "_item", "_part", "_title", "_start", "_end", "_piece")
+
+    def __init__(
+        self,
+        path: pathlib.Path,
+        key: str,
+        item: str,
+        part: str,
+        title: str,
+        start: int,
+        end: int,
+        piece: int = 0
+    ) -> None:
+        """Initializes the SectionChunk object.
+
+        ### Parameters:
+        ----
+        path: pathlib.Path
+            The preprocessed text the offsets point into.
+
+        key: str
+            The section key, for example `risk_factors`, or `cover` for
+            everything before the first Item.
+
+        item: str
+            The Item number, for example `1A`.
+
+        part: str
+            The Part the Item is in, for example `II`.
+
+        title: str
+            The title of the section, as written in the filing.
+
+        start: int
+            The offset of the first byte of the chunk.
+
+        end: int
+            The offset just past the last byte of the chunk.
+
+        piece: int (optional, default=0)
+            The position of the chunk in its section, when long sections
+            are split.
+        """
+
+        self._path = path
+        self._key = key
+        self._item = item
+        self._part = part
+        self._title = title
+        self._start = start
+        self._end = end
+        self._piece = piece
+
+    @property
+    def path(self) -> pathlib.Path:
+        """Returns the preprocessed text the offsets point into."""
+        return self._path
+
+    @property
+    def key(self) -> str:
+        """Returns the section key."""
+        return self._key
+
+    @property
+    def item(self) -> str:
+        """Returns the Item number."""
+        return self._item
+
+    @property
+    def part(self) -> str:
+        """Returns the Part the Item is in."""
+        return self._part
+
+    @property
+    def title(self) -> str:
+        """Returns the title of the section."""
+        return self._title
+
+    @property
+    def start(self) -> int:
+        """Returns the offset of the first byte of the chunk."""
+        return self._start
+
+    @property
+    def end(self) -> int:
+        """Returns the offset just past the last byte of the chunk."""
+        return self._end
+
+    @property
+    def piece(self) -> int:
+        """Returns the position of the chunk in its section."""
+        return self._piece
+
+    @property
+    def size(self) -> int:
+        """Returns the size of the chunk in bytes."""
+        return self._end - self._start
+
+    def read(self) -> str:
+        """Reads the text of the chunk, and nothing else of the filing."""
+
+        with open(file=self._path, mode="rb") as file:
+            file.seek(self._start)
+            return file.read(self.size).decode("utf-8", errors="replace")
+
+    def to_dict(self) -> dict:
+        """Returns the chunk as a dictionary, without its text."""
+
+        return {
+            "path": self._path.as_posix(),
+            "key": self._key,
+            "item": self._item,
+            "part": self._part,
+            "title": self._title,
+            "start": self._start,
+            "end": self._end,
+            "piece": self._piece
+        }
+
+    def __repr__(self) -> str:
+        return f"SectionChunk(key={self._key!r}, start={self._start}, end={self._end}, piece={self._piece})"
+
+
+class SectionChunker:
+
+    """Splits 10-K and 10-Q filings into their Items.
+
+    ### Overview:
+    ----
+    The preprocessed text of a filing is memory mapped, and a single
+    regular expression pass finds every Part and Item heading in it.
+    Filings list their Items twice, once in the table of contents and
+    once in the body, so every Item keeps only the heading that starts
+    its longest span of text; table of contents entries are one line
+    long. The sections are then yielded one by one as byte ranges, so
+    a multi-megabyte filing is never loaded into memory as a whole.
+    """
+
+    def __init__(self, max_chunk_bytes: int = None, text_dir: str = ".finbrain/preprocessed") -> None:
+        """Initializes the SectionChunker object.
+
+        ### Parameters:
+        ----
+        max_chunk_bytes: int (optional, default=None)
+            The most bytes in a chunk. Longer sections, usually the
+            financial statements, are split into pieces on line
+            boundaries. If not provided, sections are never split.
+
+        text_dir: str (optional, default=".finbrain/preprocessed")
+            The folder of the preprocessed text. Files that have not been
+            preprocessed yet are converted into it, the same way
+            `Preprocessor` does.
+
+        ### Usage:
+        ----
+            >>> from finbrain.chunking import SectionChunker
+            >>> chunker = SectionChunker(max_chunk_bytes=100000)
+            >>> for chunk in chunker.chunk_file(file=file):
+            ...     print(chunk.key, chunk.start, chunk.end)
+        """
+
+        if max_chunk_bytes is not None and max_chunk_bytes < 1:
+            raise ValueError("max_chunk_bytes must be at least 1.")
+
+        self._max_chunk_bytes = max_chunk_bytes
+        self._text_dir = pathlib.Path(text_dir)
+
+    @property
+    def max_chunk_bytes(self) -> int:
+        """Returns the most bytes in a chunk."""
+        return self._max_chunk_bytes
+
+    @staticmethod
+    def detect_form(data: bytes) -> str:
+        """Returns `10-K` or `10-Q`, from the form named on the cover page.
+
+        ### Parameters:
+        ----
+        data: bytes
+            The text of the filing, or a memory map of it.
+
+        ### Returns:
+        ----
+        str :
+            The form type, `10-K` if the cover page does not name one.
+        """
+
+        match = _FORM_PATTERN.search(data, 0, _COVER_BYTES)
+
+        if match is not None and match.group("form").upper() == b"Q":
+            return "10-Q"
+
+        return "10-K"
+
+    @staticmethod
+    def _section_key(form: str, part: str, item: str) -> str:
+        """Maps an Item to the key of its section."""
+
+        if form == "10-Q":
+            key = FORM_10Q_ITEMS.get((part, item), None)
+        else:
+            key = FORM_10K_ITEMS.get(item, None)
+
+        return key or f"item_{item.lower()}"
+
+    def _headings(self, data: bytes, form: str) -> list:
+        """Finds the heading that starts each Item in the body of the filing.
+
+        ### Parameters:
+        ----
+        data: bytes
+            The text of the filing, or a memory map of it.
+
+        form: str
+            The form type, `10-K` or `10-Q`.
+
+        ### Returns:
+        ----
+        list :
+            One `(offset, part, item, title)` tuple per Item, in the
+            order they appear.
+        """
+
+        # Step 1: Find every Part and Item heading, remembering the Part each Item is in.
+        headings = []
+        part = ""
+
+        for match in _HEADING_PATTERN.finditer(data):
+
+            if match.group("part") is not None:
+                part = match.group("part").upper().decode("ascii")
+                headings.append((match.start(), None, None, None))
+                continue
+
+            title = (match.group("title") or b"")[:_MAX_TITLE_BYTES]
+
+            # Table rows look like "Item 1. | Business | 3", keep the cell with the title.
+            cells = [cell.strip() for cell in title.split(b"|") if cell.strip()]
+            title = cells[0].decode("utf-8", errors="replace") if cells else ""
+
+            item = match.group("item").upper().decode("ascii")
+            headings.append((match.start(), part, item, title))
+
+        # Step 2: Keep the occurrence of each Item with the longest span, which drops the table of contents.
+        best = {}
+        ends = [offset for offset, _, _, _ in headings[1:]] + [len(data)]
+
+        for (offset, part, item, title), end in zip(headings, ends):
+
+            if item is None:
+                continue
+
+            key = (part, item) if form == "10-Q" else item
+            if key not in best or end - offset > best[key][0]:
+                best[key] = (end - offset, (offset, part, item, title))
+
+        return sorted(heading for _, heading in best.values())
+
+    def _pieces(self, data: bytes, start: int, end: int) -> Iterator[tuple]:
+        """Splits a byte range into pieces of at most `max_chunk_bytes`, on line boundaries."""
+
+        limit = self._max_chunk_bytes
+
+        while limit is not None and end - start > limit:
+
+            cut = data.rfind(b"\n", start, start + limit)
+            cut = start + limit if cut <= start else cut + 1
+
+            yield start, cut
+            start = cut
+
+        yield start, end
+
+    def iter_sections(self, path: str, form: str = None) -> Iterator[SectionChunk]:
+        """Yields the sections of a preprocessed filing, in order.
+
+        ### Parameters:
+        ----
+        path: str
+            The preprocessed text of the filing.
+
+        form: str (optional, default=None)
+            The form type, `10-K` or `10-Q`. If not provided, it is read
+            from the cover page.
+
+        ### Returns:
+        ----
+        Iterator[SectionChunk] :
+            The chunks, starting with the `cover` chunk for everything
+            before the first Item, if there is anything.
+        """
+
+        path = pathlib.Path(path)
+
+        # Check the arguments now, rather than when the first chunk is asked for.
+        if not path.exists():
+            raise FileNotFoundError(f"Filing `{path}` does not exist.")
+
+        if form is not None and form not in ("10-K", "10-Q"):
+            raise ValueError("form must be `10-K` or `10-Q`.")
+
+        return self._iter_sections(path=path, form=form)
+
+    def _iter_sections(self, path: pathlib.Path, form: str) -> Iterator[SectionChunk]:
+        """Yields the chunks of `iter_sections`, keeping the filing mapped while they are read."""
+
+        if path.stat().st_size == 0:
+            return
+
+        with open(file=path, mode="rb") as file:
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+
+                form = form or self.detect_form(data=data)
+                headings = self._headings(data=data, form=form)
+
+                # Everything before the first Item is the cover page and table of contents.
+                sections = []
+                first = headings[0][0] if headings else len(data)
+                if first > 0:
+                    sections.append((0, first, "", "", "Cover Page", "cover"))
+
+                ends = [offset for offset, _, _, _ in headings[1:]] + [len(data)]
+                for (offset, part, item, title), end in zip(headings, ends):
+                    key = self._section_key(form=form, part=part, item=item)
+                    sections.append((offset, end, part, item, title or f"Item {item}", key))
+
+                for start, end, part, item, title, key in sections:
+                    for piece, (piece_start, piece_end) in enumerate(self._pieces(data=data, start=start, end=end)):
+                        yield SectionChunk(
+                            path=path,
+                            key=key,
+                            item=item,
+                            part=part,
+                            title=title,
+                            start=piece_start,
+                            end=piece_end,
+                            piece=piece
+                        )
+
+    def chunk_file(self, file: File, form: str = None) -> Iterator[SectionChunk]:
+        """Yields the sections of a file, preprocessing it first if needed.
+
+        ### Parameters:
+        ----
+        file: File
+            The filing to split.
+
+        form: str (optional, default=None)
+            The form type, `10-K` or `10-Q`. If not provided, it is read
+            from the cover page.
+
+        ### Returns:
+        ----
+        Iterator[SectionChunk] :
+            The same chunks as `iter_sections`.
+        """
+
+        self._text_dir.mkdir(parents=True, exist_ok=True)
+        _, text_path = _text_path(file=file, output_dir=self._text_dir.as_posix())
+
+        return self.iter_sections(path=text_path, form=form)
@@ -1,24 +1,75 @@
 """This script demonstrates how to use the OpenAI File Assistant to process multiple files and save the responses to a file."""
 
+from __future__ import annotations
+
 import json
+import time
+import asyncio
 import pathlib
 import logging
+import threading
+from typing import Callable
+from typing import Iterable
+from typing import Union
+from typing import Iterator
+from typing import TYPE_CHECKING
+from contextlib import contextmanager
+from concurrent.futures import as_completed
+from concurrent.futures import ThreadPoolExecutor
 
-from openai import OpenAI
-
+from finbrain.utils import File
 from finbrain.utils import Files
+from finbrain.utils import AsyncFiles
+from finbrain.utils import UploadCache
+from finbrain.state import StateStore
+from finbrain.metrics import Metrics
+from finbrain.metrics import default_metrics
+from finbrain.ratelimit import RateLimiter
+from finbrain.batch import BatchRunner
+from finbrain.cache import SummaryCache
 from finbrain.thread import Thread
+from finbrain.thread import ThreadPool
+from finbrain.thread import AsyncThread
 from finbrain.prompts import Prompt
 from finbrain.validator import Validator
+from finbrain.vector_store import VectorStore
+from finbrain.search import SearchIndex
+from finbrain.chunking import SectionChunk
+from finbrain.chunking import SectionChunker
+from finbrain.assistant import ASSISTANT_CONFIG
 from finbrain.assistant import AssistantCreator
+from finbrain.assistant import AsyncAssistantCreator
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+    from openai import AsyncOpenAI
+    from openai.types.beta import Assistant
+
 
-# Create a logging object
-logging.basicConfig(filename="agent_log.log", level=logging.INFO)
+class _BaseAssistant:
 
+    """The state, files and helpers shared by `FinBrainAssistant` and `AsyncFinBrainAssistant`.
 
-class FinBrainAssistant:
+    ### Overview:
+    ----
+    Subclasses create their client in `_create_client`, and resolve the
+    assistant and the thread in `_resolve_assistant` and `_resolve_thread`.
+    Everything that talks to the API lives in the subclasses, so neither
+    carries methods that only work with the other's client.
+    """
 
-    def __init__(self, api_key: str, save_state: bool = False, state_file: str = "") -> None:
+    # The Files collection class used for this client.
+    _files_class = Files
+
+    def __init__(
+        self,
+        api_key: str,
+        save_state: bool = False,
+        state_file: str = "",
+        upload_cache_file: str = "",
+        autosave_interval: float = 5.0,
+        rate_limiter: RateLimiter = None
+    ) -> None:
         """Initializes the FinBrainAssistant object.
 
         ### Parameters:
@@ -32,55 +83,150 @@ class FinBrainAssistant:
         state_file: str (optional, default="")
             The name of the file to save the assistant state to, this will
             allow you to resume the assistant at a later time.
+
+        upload_cache_file: str (optional, default="")
+            The name of a file that maps file contents to uploaded file
+            IDs, so identical documents are never uploaded twice. If
+            not provided, no upload cache is used.
+
+        autosave_interval: float (optional, default=5.0)
+            The minimum number of seconds between two automatic flushes of
+            the state to disk. Every change is journaled right away, this
+            only controls how often the journal is forced to disk. Use 0
+            to flush after every change.
+
+        rate_limiter: RateLimiter (optional, default=None)
+            A limiter shared by every call made through the client, by the
+            assistant and its files and threads. It can also be shared by
+            several assistants. If not provided, calls are not throttled.
         """
 
         # Initialize the OpenAI client.
         self.api_key = api_key
-        self.client = OpenAI(api_key=self.api_key)
+        self._rate_limiter = rate_limiter
+        self.client = self._create_client()
 
         # Initialize the state of the assistant.
         self._state = {}
+        self._store = None
         self._save_state = save_state
         self._state_file = pathlib.Path(state_file)
+        self._autosave_interval = autosave_interval
+        self._last_flush = time.monotonic()
+
+        # The assistant and thread are only resolved when they are first used.
+        self._assistant = None
+        self._thread = None
+        self._assistant_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
 
         # Load the state of the assistant.
         self._read_state()
 
         # Initialize the assistant and other helper objects.
         self.json_validator = Validator()
+        self._prompt = Prompt()
+
+        # The sections schemas trimmed to the Items a filing has, one per set of Items.
+        self._section_schemas = {}
+        self._section_schemas_base = None
 
-        # Initialize the assistant and thread objects.
-        self.assistant = self._manage_assistant_creation().assistant
-        self.thread = self._manage_thread_creation()
+        # The vector store is only resolved when it is first used.
+        self._vector_store = None
+        self._search_index = None
+
+        # Initialize the upload cache, if one was requested.
+        self._upload_cache = None
+        if upload_cache_file:
+            self._upload_cache = UploadCache(path=upload_cache_file)
 
         # Initialize the Files collection object.
-        self._files = Files(client=self.client)
+        self._files = self._files_class(client=self.client, upload_cache=self._upload_cache)
 
         # If we have files already, add them to the files collection.
         if "files" in self._state:
             self._files._load(files=self._state["files"])
 
+        # Journal every change to the files as it happens.
+        self._files.on_change = self._record_file
+
         # If we are allowed to save the state, update the state so we can show the assistant ID.
         if self._save_state:
             self._update_state()
 
+    @property
+    def assistant(self) -> Assistant:
+        """Returns the assistant, creating or retrieving it on first use."""
+
+        if self._assistant is None:
+            with self._assistant_lock:
+                if self._assistant is None:
+                    self._assistant = self._resolve_assistant()
+                    if self._save_state and self._assistant is not None:
+                        self._update_state()
+
+        return self._assistant
+
+    @assistant.setter
+    def assistant(self, assistant: Assistant) -> None:
+        """Sets the assistant, for example after attaching a vector store."""
+        self._assistant = assistant
+
+    @property
+    def thread(self) -> Thread:
+        """Returns the thread, creating or retrieving it on first use."""
+
+        # The thread lock is always taken before the assistant lock.
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    thread = self._resolve_thread()
+                    if thread is not None:
+                        thread.assistant = self.assistant
+                    self._thread = thread
+                    if self._save_state and self._thread is not None:
+                        self._update_state()
+
+        return self._thread
+
+    @thread.setter
+    def thread(self, thread: Thread) -> None:
+        """Sets the thread."""
+        self._thread = thread
+
     def __del__(self) -> None:
         """Saves the state of the assistant before it is destroyed."""
-        self._write_state()
+        if getattr(self, "_store", None) is not None:
+            self._write_state()
+            self._store.close()
 
     @property
     def files(self) -> Files:
         """Returns the Files collection object."""
         return self._files
 
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        """Returns the RateLimiter shared by every call, if there is one."""
+        return self._rate_limiter
+
+    @property
+    def metrics(self) -> Metrics:
+        """Returns the registry that uploads, messages, runs and polls are recorded in."""
+        return default_metrics()
+
     @property
     def prompt(self) -> Prompt:
         """Returns the Prompt object."""
-        return Prompt()
+        return self._prompt
 
     @property
     def assistant_id(self) -> str:
-        """Returns the ID of the assistant."""
+        """Returns the ID of the assistant, without resolving it if the state has one."""
+
+        if self._assistant is None and self._state.get("assistant_id", ""):
+            return self._state["assistant_id"]
+
         return self.assistant.id
 
     @property
@@ -105,8 +251,57 @@ class FinBrainAssistant:
     @property
     def state(self) -> dict:
         """Returns the value of the state attribute."""
+
+        if self._store is not None:
+            return self._store.state
+
         return self._state
 
+    def flush(self) -> None:
+        """Forces every pending change of the state to disk.
+
+        ### Overview:
+        ----
+        Changes are journaled as they happen, so this only needs to sync
+        the journal, and compacts it into the state file once it has grown
+        long enough. It is a no-op when state saving is disabled.
+        """
+
+        if not self._save_state or self._store is None:
+            return
+
+        self._update_state()
+        self._store.flush()
+        self._last_flush = time.monotonic()
+
+    def _maybe_flush(self) -> None:
+        """Flushes the state if the autosave interval has passed."""
+
+        if time.monotonic() - self._last_flush >= self._autosave_interval:
+            self.flush()
+
+    def _record_file(self, file: File, removed: bool) -> None:
+        """Journals a change to a single file.
+
+        ### Parameters:
+        ----
+        file: File
+            The file that was added, changed or removed.
+
+        removed: bool
+            True if the file was removed from the collection.
+        """
+
+        if not self._save_state or self._store is None:
+            return
+
+        if removed:
+            self._store.remove_file(path=file._path.as_posix())
+        else:
+            self._store.upsert_file(file=file.to_dict())
+
+        self._maybe_flush()
+
     def _validate_state(self) -> bool:
         """Validates the state of the assistant.
 
@@ -125,6 +320,12 @@ class FinBrainAssistant:
             "thread": str
         }
 
+        # Define the keys that older state files may not have.
+        optional_state = {
+            "vector_store_id": str,
+            "batches": list
+        }
+
         # Check if the state file is missing any keys.
         for key, value in valid_state.items():
 
@@ -138,10 +339,18 @@ class FinBrainAssistant:
                 print(f"State file key: {key} has an invalid value.")
                 return False
 
+        # Check the optional keys, if they are there.
+        for key, value in optional_state.items():
+
+            if key in self._state and not isinstance(self._state[key], value):
+                logging.error(f"State file key: {key} has an invalid value.")
+                print(f"State file key: {key} has an invalid value.")
+                return False
+
         # Now check if we have any extra keys in the state file.
         for key in self._state.keys():
 
-            if key not in valid_state:
+            if key not in valid_state and key not in optional_state:
                 logging.error(f"State file has an invalid key: {key}")
                 print(f"State file has an invalid key: {key}")
                 return False
@@ -163,12 +372,12 @@ class FinBrainAssistant:
                 f"State file `{self._state_file.name}` does not exist."
             )
 
-        # Step 3: Load the state file.
-        with open(file=self._state_file, mode="r", encoding="utf-8") as file:
-            self._state = json.load(file)
-            logging.info(
-                f"State file loaded successfully: {self._state_file.name}"
-            )
+        # Step 3: Load the state file, replaying any changes journaled since it was written.
+        self._store = StateStore(path=self._state_file)
+        self._state = self._store.load()
+        logging.info(
+            f"State file loaded successfully: {self._state_file.name}"
+        )
 
         # Step 4: Validate the state file.
         if not self._validate_state():
@@ -178,9 +387,26 @@ class FinBrainAssistant:
     def _update_state(self) -> None:
         """Updates the state of the assistant, before saving it."""
 
-        self.state["assistant_id"] = self.assistant_id
-        self.state["files"] = self.files.to_dict()["files"]
-        self.state["thread"] = self.thread._thread.id
+        # Values that are not resolved yet keep whatever the state already has.
+        values = {}
+        if self._assistant is not None:
+            values["assistant_id"] = self._assistant.id
+        if self._thread is not None and self._thread._thread is not None:
+            values["thread"] = self._thread._thread.id
+
+        # The files are journaled one at a time, so only the IDs need updating.
+        if self._store is not None:
+            for key, value in values.items():
+                self._store.set(key=key, value=value)
+            if self._vector_store is not None:
+                self._store.set(key="vector_store_id", value=self._vector_store.id)
+            self._state = self._store.state
+            return
+
+        self._state.update(values)
+        self._state["files"] = self.files.to_dict()["files"]
+        if self._vector_store is not None:
+            self._state["vector_store_id"] = self._vector_store.id
 
     def _write_state(self) -> None:
         """Saves the state of the assistant."""
@@ -210,12 +436,293 @@ class FinBrainAssistant:
             logging.error("State file is invalid.")
             raise ValueError("State file is invalid.")
 
-        # Step 6: Save the state file.
-        with open(file=self._state_file, mode="w+", encoding="utf-8") as file:
-            json.dump(self._state, file, indent=4)
-            logging.info(
-                f"State file saved successfully: {self._state_file.name}"
+        # Step 6: Save the state file, atomically replacing the old one.
+        self._store.compact()
+        logging.info(
+            f"State file saved successfully: {self._state_file.name}"
+        )
+
+    def _record_result(self, result: dict) -> None:
+        """Records how long a document took from start to finish."""
+
+        if result["elapsed"] is not None:
+            default_metrics().observe(
+                "finbrain_document_seconds",
+                result["elapsed"],
+                status=result["status"],
+                cached=result["cached"]
+            )
+
+    @staticmethod
+    def _failed_summary(file: File, error: Exception) -> dict:
+        """Returns the result of a document whose summary raised an error."""
+
+        logging.error(f"Summary of {file.name} failed: {error}")
+
+        return {
+            "status": "error",
+            "message": str(error),
+            "object": None,
+            "name": file.name,
+            "file_id": file.file_id,
+            "cached": False,
+            "elapsed": None
+        }
+
+    def _emit_result(self, result: dict, sink: Union[str, Callable[[dict], None], None], sink_file) -> None:
+        """Sends a result to the sink of `summarize_many` and records it.
+
+        ### Parameters:
+        ----
+        result: dict
+            The result of a document.
+
+        sink: str | Callable
+            The sink passed to `summarize_many`.
+
+        sink_file: TextIO
+            The open JSONL file, when the sink is a path.
+        """
+
+        if sink_file is not None:
+            sink_file.write(json.dumps(result) + "\n")
+            sink_file.flush()
+        elif callable(sink):
+            sink(result)
+
+        self._record_result(result=result)
+
+    def _cached_summary(self, file: File, message: str, schema: dict, cache: SummaryCache, start: float) -> tuple:
+        """Looks a summary up in the cache, hashing the file if needed.
+
+        ### Parameters:
+        ----
+        file: File
+            The file to summarize.
+
+        message: str
+            The rendered prompt.
+
+        schema: dict
+            The JSON schema the summary is validated against.
+
+        cache: SummaryCache
+            The cache to read from, or None.
+
+        start: float
+            When the summary started, by `time.perf_counter`.
+
+        ### Returns:
+        ----
+        tuple :
+            The cache key, and the cached result or None.
+        """
+
+        if cache is None:
+            return None, None
+
+        # The assistant settings come from the config, so a hit never resolves the assistant.
+        cache_key = SummaryCache.key(
+            file_digest=file.digest,
+            prompt=message,
+            config=ASSISTANT_CONFIG,
+            schema=schema,
+            upload_digest=file.upload_digest
+        )
+        result = cache.get(key=cache_key)
+
+        if result is not None:
+            result["cached"] = True
+            result["elapsed"] = time.perf_counter() - start
+            logging.info(f"Summary of {file.name} found in the cache.")
+
+        return cache_key, result
+
+    @staticmethod
+    def _summary_attachment(file: File) -> list:
+        """Returns the attachment that lets the run search an uploaded file."""
+        return [
+            {
+                "file_id": file.file_id,
+                "tools": [{"type": "file_search"}]
+            }
+        ]
+
+    def _validate_reply(self, run, reply, schema: dict) -> dict:
+        """Validates the reply of a summary run.
+
+        ### Parameters:
+        ----
+        run: Run
+            The finished run.
+
+        reply: Message
+            The reply of the run, or None if there is none.
+
+        schema: dict
+            The JSON schema the summary is validated against.
+
+        ### Returns:
+        ----
+        dict :
+            The validated result.
+        """
+
+        if reply is None:
+            return {
+                "status": "error",
+                "message": f"Run finished with status {run.status} and no reply.",
+                "object": None
+            }
+
+        return self.json_validator.validate_json_schema(
+            json_string=reply.content[0].text.value,
+            schema=schema
+        )
+
+    def _finish_summary(self, file: File, result: dict, cache: SummaryCache, cache_key: str, start: float) -> dict:
+        """Labels a new summary, caches it if it is valid, and logs it.
+
+        ### Parameters:
+        ----
+        file: File
+            The file that was summarized.
+
+        result: dict
+            The validated result.
+
+        cache: SummaryCache
+            The cache to write to, or None.
+
+        cache_key: str
+            The key from `_cached_summary`.
+
+        start: float
+            When the summary started, by `time.perf_counter`.
+
+        ### Returns:
+        ----
+        dict :
+            The result, with the file and timing filled in.
+        """
+
+        result["name"] = file.name
+        result["file_id"] = file.file_id
+
+        # Only keep summaries that passed validation.
+        if cache is not None and result["status"] == "success":
+            cache.put(key=cache_key, result=result)
+
+        result["cached"] = False
+        result["elapsed"] = time.perf_counter() - start
+
+        logging.info(f"Summary of {file.name} finished: {result['status']}")
+
+        return result
+
+
+class FinBrainAssistant(_BaseAssistant):
+
+    """Summarizes filings with an OpenAI assistant, through a blocking `OpenAI` client."""
+
+    def _create_client(self) -> OpenAI:
+        """Creates the OpenAI client, going through the rate limiter if there is one."""
+
+        # Import the SDK on first use, so importing finbrain stays fast.
+        from openai import OpenAI
+
+        if self._rate_limiter is not None:
+            return OpenAI(
+                api_key=self.api_key,
+                http_client=self._rate_limiter.http_client()
+            )
+
+        return OpenAI(api_key=self.api_key)
+
+    def _resolve_assistant(self) -> Assistant:
+        """Creates or retrieves the assistant."""
+        return self._manage_assistant_creation().assistant
+
+    def _resolve_thread(self) -> Thread:
+        """Creates or retrieves the thread, without linking it to the assistant."""
+        return self._manage_thread_creation()
+
+    def warm_up(self) -> "FinBrainAssistant":
+        """Creates or retrieves the assistant and the thread concurrently.
+
+        ### Overview:
+        ----
+        Both are otherwise resolved one after the other, the first time
+        they are used. Calling this at startup overlaps the two round
+        trips. Anything already resolved is left alone.
+
+        ### Returns:
+        ----
+        FinBrainAssistant :
+            The assistant itself, so it can be chained.
+
+        ### Usage:
+        ----
+            >>> assistant = FinBrainAssistant(api_key=api_key).warm_up()
+        """
+
+        with self._thread_lock, self._assistant_lock:
+
+            # Step 1: Resolve whatever is missing, both at once.
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                assistant = None
+                thread = None
+                if self._assistant is None:
+                    assistant = executor.submit(self._resolve_assistant)
+                if self._thread is None:
+                    thread = executor.submit(self._resolve_thread)
+
+            # Step 2: Link the thread to the assistant.
+            if assistant is not None:
+                self._assistant = assistant.result()
+            if thread is not None:
+                self._thread = thread.result()
+            if self._thread is not None:
+                self._thread.assistant = self._assistant
+
+            # Step 3: Save the new IDs.
+            if self._save_state:
+                self._update_state()
+
+        return self
+
+    @property
+    def vector_store(self) -> VectorStore:
+        """Returns the VectorStore object, creating or retrieving it on first use."""
+
+        if self._vector_store is None:
+            self._vector_store = VectorStore(
+                client=self.client,
+                vector_store_id=self._state.get("vector_store_id", "")
             )
+            if self._save_state:
+                self._update_state()
+
+        return self._vector_store
+
+    @property
+    def search_index(self) -> SearchIndex:
+        """Returns the local SearchIndex, opening it on first use."""
+
+        if self._search_index is None:
+            self._search_index = SearchIndex()
+
+        return self._search_index
+
+    @search_index.setter
+    def search_index(self, search_index: SearchIndex) -> None:
+        """Sets the SearchIndex, for example one stored somewhere else."""
+        self._search_index = search_index
+
+    @property
+    def batches(self) -> list:
+        """Returns the batch jobs tracked in the state."""
+        return self.state.get("batches", [])
 
     def _manage_assistant_creation(self) -> AssistantCreator:
         """Manages the creation of the assistant.
@@ -261,7 +768,959 @@ class FinBrainAssistant:
         else:
             thread = Thread(client=self.client)
 
-        # Set the assistant for the thread.
+        return thread
+
+    def summarize_many(
+        self,
+        files: Iterable[File],
+        concurrency: int = 4,
+        sink: Union[str, Callable[[dict], None], None] = None,
+        schema: dict = None,
+        cache: SummaryCache = None,
+        thread_pool: ThreadPool = None
+    ) -> list:
+        """Summarizes many documents at once, each on its own thread.
+
+        ### Overview:
+        ----
+        Every document is uploaded if needed, given a short-lived thread,
+        summarized, validated and then its thread is deleted. Up to
+        `concurrency` documents are in flight at once, and each result is
+        sent to the sink as soon as it completes.
+
+        ### Parameters:
+        ----
+        files: Iterable[File]
+            The files to summarize.
+
+        concurrency: int (optional, default=4)
+            The maximum number of documents summarized at once.
+
+        sink: str | Callable (optional, default=None)
+            Where to send each result as it completes. A string is treated
+            as the path of a JSONL file that results are appended to, a
+            callable is called with each result dictionary.
+
+        schema: dict (optional, default=None)
+            The JSON schema the summaries are validated against. If not
+            provided, the schema of the prompt is used.
+
+        cache: SummaryCache (optional, default=None)
+            A cache of earlier summaries. Documents whose contents, prompt
+            and assistant settings have not changed are returned from the
+            cache without touching the network.
+
+        thread_pool: ThreadPool (optional, default=None)
+            A pool of warm threads to lease from, instead of creating and
+            deleting a thread for every document. Size it to `concurrency`.
+
+        ### Returns:
+        ----
+        list :
+            A list of result dictionaries, in the order they completed.
+
+        ### Usage:
+        ----
+            >>> results = assistant.summarize_many(
+            ...     files=assistant.files,
+            ...     concurrency=8,
+            ...     sink="summaries.jsonl"
+            ... )
+
+            >>> with ThreadPool(client=assistant.client, size=8, assistant=assistant.assistant) as pool:
+            ...     results = assistant.summarize_many(
+            ...         files=assistant.files,
+            ...         concurrency=8,
+            ...         thread_pool=pool
+            ...     )
+            ...     pool.stats
+        """
+
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1.")
+
+        files = list(files)
+        results = []
+
+        # Resolve the prompt and its schema once for every document.
+        prompt = self.prompt
+        schema = schema or prompt.schema
+
+        sink_file = None
+        if isinstance(sink, (str, pathlib.Path)):
+            sink_file = open(file=sink, mode="a", encoding="utf-8")
+
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+                futures = {
+                    executor.submit(self._summarize_one, file, prompt, schema, cache, thread_pool): file
+                    for file in files
+                }
+
+                for future in as_completed(futures):
+
+                    file = futures[future]
+
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = self._failed_summary(file=file, error=e)
+
+                    # Keep the ID index in sync with any new uploads.
+                    self._files._index_uploaded(file=file)
+
+                    self._emit_result(result=result, sink=sink, sink_file=sink_file)
+                    results.append(result)
+        finally:
+            if sink_file is not None:
+                sink_file.close()
+
+        return results
+
+    def _summarize_one(
+        self,
+        file: File,
+        prompt: Prompt,
+        schema: dict,
+        cache: SummaryCache = None,
+        thread_pool: ThreadPool = None
+    ) -> dict:
+        """Summarizes a single document on a short-lived or leased thread.
+
+        ### Parameters:
+        ----
+        file: File
+            The file to summarize.
+
+        prompt: Prompt
+            The prompt used to build the message.
+
+        schema: dict
+            The JSON schema the summary is validated against.
+
+        cache: SummaryCache (optional, default=None)
+            The cache to read the summary from and write it to.
+
+        thread_pool: ThreadPool (optional, default=None)
+            The pool to lease the thread from. If not provided, a thread is
+            created for the document and deleted afterwards.
+
+        ### Returns:
+        ----
+        dict :
+            The validated result for the document.
+        """
+
+        start = time.perf_counter()
+        message = prompt.create_prompt(file=file)
+
+        # Step 0: Return the cached summary, if nothing has changed since it was written.
+        cache_key, result = self._cached_summary(file=file, message=message, schema=schema, cache=cache, start=start)
+        if result is not None:
+            return result
+
+        # Step 1: Make sure the file is available to the assistant.
+        file.upload()
+
+        # Step 2: Lease a warm thread, or create one just for this document.
+        with self._empty_thread(thread_pool=thread_pool) as thread:
+            result = self._ask_for_summary(thread=thread, file=file, message=message, schema=schema)
+
+        return self._finish_summary(file=file, result=result, cache=cache, cache_key=cache_key, start=start)
+
+    @contextmanager
+    def _empty_thread(self, thread_pool: ThreadPool = None) -> Iterator[Thread]:
+        """Leases a warm thread from the pool, or creates one that is deleted afterwards.
+
+        ### Parameters:
+        ----
+        thread_pool: ThreadPool (optional, default=None)
+            The pool to lease the thread from. If not provided, a thread is
+            created and deleted once the block is done.
+
+        ### Returns:
+        ----
+        Iterator[Thread] :
+            An empty thread, pointed at the assistant.
+        """
+
+        if thread_pool is not None:
+            with thread_pool.lease() as thread:
+                thread.assistant = self.assistant
+                yield thread
+            return
+
+        thread = Thread(client=self.client)
         thread.assistant = self.assistant
 
-        return thread
+        try:
+            yield thread
+        finally:
+            thread.delete()
+
+    def _ask_for_summary(self, thread: Thread, file: File, message: str, schema: dict) -> dict:
+        """Asks for the summary of a document on an empty thread and validates the reply.
+
+        ### Parameters:
+        ----
+        thread: Thread
+            The thread to run on, it must not have any messages yet.
+
+        file: File
+            The uploaded file to summarize.
+
+        message: str
+            The rendered prompt.
+
+        schema: dict
+            The JSON schema the summary is validated against.
+
+        ### Returns:
+        ----
+        dict :
+            The validated result.
+        """
+
+        # Ask for the summary and wait for the run.
+        thread.add_message(role="user", message=message, attachment=self._summary_attachment(file=file))
+        run = thread.create_run()
+
+        # Grab the reply of this run, without paging through the thread.
+        reply = None
+        if run.status == "completed":
+            reply = thread.latest_reply(run_id=run.id)
+
+        return self._validate_reply(run=run, reply=reply, schema=schema)
+
+    def index_files(self, files: Iterable[File] = None) -> dict:
+        """Adds files to the vector store and points the assistant at it.
+
+        ### Overview:
+        ----
+        Once the files are indexed, messages no longer need per-message
+        attachments, so repeated questions over the same documents skip
+        building a temporary vector store on every run.
+
+        ### Parameters:
+        ----
+        files: Iterable[File] (optional, default=None)
+            The files to index. If not provided, every file in the
+            collection is indexed.
+
+        ### Returns:
+        ----
+        dict :
+            The report returned by `VectorStore.add_files`.
+
+        ### Usage:
+        ----
+            >>> assistant.files.add_directory(path="sec_docs", pattern="*.html")
+            >>> assistant.index_files()
+            >>> assistant.thread.add_message(role="user", message="What was FY2019 revenue?")
+        """
+
+        report = self.vector_store.add_files(
+            files=self._files if files is None else files
+        )
+
+        # Only update the assistant if it is not already using this store.
+        tool_resources = getattr(self.assistant, "tool_resources", None)
+        file_search = getattr(tool_resources, "file_search", None)
+        vector_store_ids = getattr(file_search, "vector_store_ids", None) or []
+
+        if self.vector_store.id not in vector_store_ids:
+            self.assistant = self.vector_store.attach_to_assistant(
+                assistant=self.assistant
+            )
+            # A thread that is not resolved yet picks the assistant up when it is.
+            if self._thread is not None:
+                self._thread.assistant = self.assistant
+
+        return report
+
+    def summarize_sections(
+        self,
+        file: File,
+        concurrency: int = 4,
+        chunker: SectionChunker = None,
+        thread_pool: ThreadPool = None
+    ) -> dict:
+        """Summarizes a filing one Item at a time, and merges them into `sections_summary`.
+
+        ### Overview:
+        ----
+        The filing is split into its 10-K or 10-Q Items by the chunker,
+        and every section is summarized on its own thread, with its text
+        inline, so nothing has to be uploaded. The summaries are merged
+        into the shape of `sections_summary` in the prompt schema: Items
+        with a key in the schema fill that key, the rest go under
+        `other_sections`, and pieces of a split section are joined in order.
+
+        Only the sections found in the filing are required, since a 10-Q
+        has no Business Item. The required keys of the schema that the
+        filing lacks are listed under `missing` instead of failing the
+        result, but a filing with no Items at all is an error.
+
+        ### Parameters:
+        ----
+        file: File
+            The filing to summarize.
+
+        concurrency: int (optional, default=4)
+            The maximum number of sections summarized at once.
+
+        chunker: SectionChunker (optional, default=None)
+            The chunker that splits the filing. If not provided, one that
+            never splits sections is used.
+
+        thread_pool: ThreadPool (optional, default=None)
+            A pool of warm threads to lease from, instead of creating and
+            deleting a thread for every section.
+
+        ### Returns:
+        ----
+        dict :
+            The validated `sections_summary`, the required sections the
+            filing does not have, and the result of every section.
+
+        ### Usage:
+        ----
+            >>> chunker = SectionChunker(max_chunk_bytes=100000)
+            >>> result = assistant.summarize_sections(file=file, concurrency=8, chunker=chunker)
+            >>> result["object"]["sections_summary"]["risk_factors"]
+        """
+
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1.")
+
+        start = time.perf_counter()
+        chunker = chunker or SectionChunker()
+        schema = self.prompt.schema["properties"]["sections_summary"]
+
+        # Step 1: Summarize every section in parallel, the cover page only holds metadata.
+        sections = []
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+            futures = [
+                executor.submit(self._summarize_section, file.name, chunk, thread_pool)
+                for chunk in chunker.chunk_file(file=file)
+                if chunk.key != "cover"
+            ]
+
+            for future in as_completed(futures):
+                sections.append(future.result())
+
+        sections.sort(key=lambda section: section["start"])
+
+        # Step 2: Merge the summaries into the shape of the schema.
+        merged = {}
+        other_sections = {}
+        for section in sections:
+
+            if section["status"] != "success":
+                continue
+
+            target = merged if section["key"] in schema["properties"] else other_sections
+            if section["key"] in target:
+                target[section["key"]] += "\n\n" + section["summary"]
+            else:
+                target[section["key"]] = section["summary"]
+
+        merged["other_sections"] = other_sections
+
+        # Step 3: Require only the sections the filing has, and report the others.
+        found = {section["key"] for section in sections}
+        missing = [key for key in schema.get("required", []) if key not in found]
+
+        # Step 4: Validate the merged summaries, and fail if no section was found or any section failed.
+        result = self.json_validator.validate_json_schema(json_string=merged, schema=self._sections_schema(found=found))
+
+        failed = [section["key"] for section in sections if section["status"] != "success"]
+        if not sections:
+            result["status"] = "error"
+            result["message"] = "No Items found in the filing."
+        elif failed:
+            result["status"] = "error"
+            result["message"] = f"Sections failed: {', '.join(failed)}"
+
+        result["object"] = {"sections_summary": merged}
+        result["missing"] = missing
+        result["sections"] = sections
+        result["name"] = file.name
+        result["elapsed"] = time.perf_counter() - start
+
+        logging.info(f"Sections of {file.name} finished: {result['status']}")
+
+        return result
+
+    def _sections_schema(self, found: set) -> dict:
+        """Returns the `sections_summary` schema that requires only the sections found.
+
+        ### Overview:
+        ----
+        The trimmed schemas are built once per set of required sections
+        and reused, so the validator compiles each of them only once. They
+        are rebuilt if the prompt schema changes.
+
+        ### Parameters:
+        ----
+        found: set
+            The keys of the sections found in the filing.
+
+        ### Returns:
+        ----
+        dict :
+            The `sections_summary` schema, with `required` trimmed.
+        """
+
+        schema = self.prompt.schema["properties"]["sections_summary"]
+
+        if self._section_schemas_base is not schema:
+            self._section_schemas = {}
+            self._section_schemas_base = schema
+
+        required = frozenset(key for key in schema.get("required", []) if key in found)
+
+        if required not in self._section_schemas:
+            self._section_schemas[required] = dict(
+                schema,
+                required=[key for key in schema.get("required", []) if key in required]
+            )
+
+        return self._section_schemas[required]
+
+    def _summarize_section(self, document_name: str, chunk: SectionChunk, thread_pool: ThreadPool = None) -> dict:
+        """Summarizes one section of a filing on a short-lived or leased thread.
+
+        ### Parameters:
+        ----
+        document_name: str
+            The name of the filing.
+
+        chunk: SectionChunk
+            The section to summarize.
+
+        thread_pool: ThreadPool (optional, default=None)
+            The pool to lease the thread from.
+
+        ### Returns:
+        ----
+        dict :
+            The chunk, its status and its summary.
+        """
+
+        result = chunk.to_dict()
+        result["summary"] = None
+
+        title = chunk.title if chunk.title.lower().startswith("item") else f"Item {chunk.item}. {chunk.title}"
+        message = self.prompt.create_section_prompt(
+            document_name=document_name,
+            title=title,
+            text=chunk.read()
+        )
+
+        try:
+            with default_metrics().timer("finbrain_section_seconds") as labels:
+                with self._empty_thread(thread_pool=thread_pool) as thread:
+                    thread.add_message(role="user", message=message)
+                    run = thread.create_run()
+                    reply = None
+                    if run.status == "completed":
+                        reply = thread.latest_reply(run_id=run.id)
+                if reply is None:
+                    labels["status"] = run.status
+        except Exception as e:
+            logging.error(f"Section {chunk.key} of {document_name} failed: {e}")
+            result["status"] = "error"
+            result["message"] = str(e)
+            return result
+
+        if reply is None:
+            result["status"] = "error"
+            result["message"] = f"Run finished with status {run.status} and no reply."
+            return result
+
+        result["status"] = "success"
+        result["summary"] = reply.content[0].text.value
+
+        return result
+
+    def ask(self, question: str, top_k: int = 5) -> dict:
+        """Answers a question from the passages that match it best.
+
+        ### Overview:
+        ----
+        The files are indexed locally first, which only costs anything for
+        files that are new or changed. The `top_k` best passages, by BM25
+        score, are put inline in the prompt, so the question is answered
+        without attachments or a remote vector search.
+
+        ### Parameters:
+        ----
+        question: str
+            The question to answer, for example "What was FY2019 revenue?".
+
+        top_k: int (optional, default=5)
+            The most passages to include in the prompt.
+
+        ### Returns:
+        ----
+        dict :
+            The status, the answer and the passages it was given.
+
+        ### Usage:
+        ----
+            >>> assistant.files.add_directory(path="sec_docs", pattern="*.html")
+            >>> result = assistant.ask(question="What was FY2019 revenue?", top_k=5)
+            >>> print(result["answer"])
+        """
+
+        start = time.perf_counter()
+
+        # Step 1: Index anything new, then find the best passages.
+        self.search_index.add_files(files=self.files)
+        passages = self.search_index.search(query=question, top_k=top_k)
+
+        if not passages:
+            return {
+                "status": "error",
+                "message": "No passages matched the question.",
+                "answer": None,
+                "passages": [],
+                "elapsed": time.perf_counter() - start
+            }
+
+        # Step 2: Ask on a short-lived thread, with the passages inline and no attachments.
+        message = self.prompt.create_question_prompt(question=question, passages=passages)
+
+        with self._empty_thread() as thread:
+            thread.add_message(role="user", message=message)
+            run = thread.create_run()
+            reply = None
+            if run.status == "completed":
+                reply = thread.latest_reply(run_id=run.id)
+
+        if reply is None:
+            return {
+                "status": "error",
+                "message": f"Run finished with status {run.status} and no reply.",
+                "answer": None,
+                "passages": passages,
+                "elapsed": time.perf_counter() - start
+            }
+
+        return {
+            "status": "success",
+            "answer": reply.content[0].text.value,
+            "passages": passages,
+            "elapsed": time.perf_counter() - start
+        }
+
+    def _save_batches(self, batches: list) -> None:
+        """Stores the batch jobs in the state."""
+
+        if self._store is not None and self._save_state:
+            self._store.set(key="batches", value=batches)
+            self._state = self._store.state
+            self._maybe_flush()
+        else:
+            self._state["batches"] = batches
+
+    def submit_batch(self, files: Iterable[File] = None, requests_path: str = "batch_requests.jsonl") -> dict:
+        """Summarizes documents offline with the Batch API.
+
+        ### Overview:
+        ----
+        Batch requests are billed at a discount and do not count against
+        the interactive rate limits, which suits backfills that are not
+        latency sensitive. The job is tracked in the state, so it can be
+        collected by a later process with `collect_batch`.
+
+        ### Parameters:
+        ----
+        files: Iterable[File] (optional, default=None)
+            The files to summarize. If not provided, every file in the
+            collection is summarized.
+
+        requests_path: str (optional, default="batch_requests.jsonl")
+            The path the batch input file is written to.
+
+        ### Returns:
+        ----
+        dict :
+            The job record.
+
+        ### Usage:
+        ----
+            >>> job = assistant.submit_batch()
+            >>> # Later on, once the batch has completed.
+            >>> assistant.collect_batch(batch_id=job["id"], output_path="summaries.jsonl")
+        """
+
+        runner = BatchRunner(
+            client=self.client,
+            prompt=self.prompt,
+            validator=self.json_validator
+        )
+
+        count = runner.write_requests(
+            files=self._files if files is None else files,
+            requests_path=requests_path
+        )
+        job = runner.submit(requests_path=requests_path)
+        job["requests"] = count
+
+        self._save_batches(batches=self.batches + [job])
+
+        return job
+
+    def collect_batch(self, batch_id: str, output_path: str, schema: dict = None) -> dict:
+        """Validates the results of a completed batch and writes them to a file.
+
+        ### Parameters:
+        ----
+        batch_id: str
+            The ID of the batch.
+
+        output_path: str
+            The path of the JSONL file the validated results are written to.
+
+        schema: dict (optional, default=None)
+            The JSON schema the summaries are validated against. If not
+            provided, the schema of the prompt is used.
+
+        ### Returns:
+        ----
+        dict :
+            The status of the batch and the number of results that were
+            valid, invalid or failed.
+        """
+
+        runner = BatchRunner(
+            client=self.client,
+            prompt=self.prompt,
+            validator=self.json_validator
+        )
+
+        counts = runner.collect(
+            batch_id=batch_id,
+            output_path=output_path,
+            schema=schema
+        )
+
+        batches = [
+            dict(job, status=counts["status"], output_path=output_path)
+            if job["id"] == batch_id else job
+            for job in self.batches
+        ]
+        self._save_batches(batches=batches)
+
+        return counts
+
+
+class AsyncFinBrainAssistant(_BaseAssistant):
+
+    """Summarizes filings with an OpenAI assistant, through an `AsyncOpenAI` client.
+
+    ### Overview:
+    ----
+    It shares the state and the files with `FinBrainAssistant`. Vector
+    stores, section summaries, questions and batches are only available
+    on `FinBrainAssistant`.
+    """
+
+    # The Files collection class used for this client.
+    _files_class = AsyncFiles
+
+    def __init__(
+        self,
+        api_key: str,
+        save_state: bool = False,
+        state_file: str = "",
+        upload_cache_file: str = "",
+        autosave_interval: float = 5.0,
+        rate_limiter: RateLimiter = None,
+        max_connections: int = 100
+    ) -> None:
+        """Initializes the AsyncFinBrainAssistant object.
+
+        ### Overview:
+        ----
+        Every call goes through a single `AsyncOpenAI` client with a pooled
+        HTTP connection, so one event loop can keep hundreds of runs in
+        flight. Nothing is sent to the API until `start` is awaited, which
+        is done for you by `async with`.
+
+        ### Parameters:
+        ----
+        api_key: str
+            The OpenAI API key.
+
+        save_state: bool (optional, default=False)
+            A boolean flag to indicate whether to save the assistant state.
+
+        state_file: str (optional, default="")
+            The name of the file to save the assistant state to.
+
+        upload_cache_file: str (optional, default="")
+            The name of a file that maps file contents to uploaded file IDs.
+
+        autosave_interval: float (optional, default=5.0)
+            The minimum number of seconds between two automatic flushes of
+            the state to disk.
+
+        rate_limiter: RateLimiter (optional, default=None)
+            A limiter shared by every call made through the client. If not
+            provided, calls are not throttled.
+
+        max_connections: int (optional, default=100)
+            The most HTTP connections the client keeps open at once.
+
+        ### Usage:
+        ----
+            >>> from finbrain.client import AsyncFinBrainAssistant
+            >>> async with AsyncFinBrainAssistant(api_key=api_key) as assistant:
+            ...     assistant.files.add_directory(path="sec_docs", pattern="*.html")
+            ...     results = await assistant.summarize_many(
+            ...         files=assistant.files,
+            ...         concurrency=200
+            ...     )
+        """
+
+        self._max_connections = max_connections
+
+        super().__init__(
+            api_key=api_key,
+            save_state=save_state,
+            state_file=state_file,
+            upload_cache_file=upload_cache_file,
+            autosave_interval=autosave_interval,
+            rate_limiter=rate_limiter
+        )
+
+    def _create_client(self) -> AsyncOpenAI:
+        """Creates the AsyncOpenAI client with a connection pool sized for the workload."""
+
+        import httpx
+        from openai import AsyncOpenAI
+        from openai import DefaultAsyncHttpxClient
+
+        limits = httpx.Limits(
+            max_connections=self._max_connections,
+            max_keepalive_connections=self._max_connections
+        )
+
+        if self._rate_limiter is not None:
+            http_client = self._rate_limiter.async_http_client(limits=limits)
+        else:
+            http_client = DefaultAsyncHttpxClient(limits=limits)
+
+        return AsyncOpenAI(api_key=self.api_key, http_client=http_client)
+
+    def _resolve_assistant(self) -> Assistant:
+        """The assistant is resolved on the event loop, by `start`."""
+        raise ValueError("The assistant is not started, call `await start()` first.")
+
+    def _resolve_thread(self) -> AsyncThread:
+        """The thread is resolved on the event loop, by `start`."""
+        raise ValueError("The assistant is not started, call `await start()` first.")
+
+    async def warm_up(self) -> "AsyncFinBrainAssistant":
+        """Creates or retrieves the assistant and the thread concurrently, like `start`.
+
+        ### Returns:
+        ----
+        AsyncFinBrainAssistant :
+            The assistant itself, so it can be chained.
+
+        ### Usage:
+        ----
+            >>> assistant = await AsyncFinBrainAssistant(api_key=api_key).warm_up()
+        """
+        return await self.start()
+
+    async def start(self) -> "AsyncFinBrainAssistant":
+        """Creates or retrieves the assistant and the thread concurrently.
+
+        ### Returns:
+        ----
+        AsyncFinBrainAssistant :
+            The assistant itself, so it can be chained.
+        """
+
+        # Already started, nothing to fetch.
+        if self._assistant is not None and self._thread is not None:
+            return self
+
+        assistant_creator, thread = await asyncio.gather(
+            AsyncAssistantCreator.open(
+                client=self.client,
+                assistant_id=self._state.get("assistant_id", None) or ""
+            ),
+            AsyncThread.open(
+                client=self.client,
+                thread_id=self._state.get("thread", None) or ""
+            )
+        )
+
+        self.assistant = assistant_creator.assistant
+        self.thread = thread
+        self.thread.assistant = self.assistant
+
+        if self._save_state:
+            self._update_state()
+
+        return self
+
+    async def close(self) -> None:
+        """Saves the state and closes the connection pool."""
+
+        if self._store is not None:
+            self._write_state()
+            self._store.close()
+            self._store = None
+
+        await self.client.close()
+
+    async def __aenter__(self) -> "AsyncFinBrainAssistant":
+        """Starts the assistant."""
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        """Closes the assistant."""
+        await self.close()
+
+    async def summarize_many(
+        self,
+        files: Iterable[File],
+        concurrency: int = 50,
+        sink: Union[str, Callable[[dict], None], None] = None,
+        schema: dict = None,
+        cache: SummaryCache = None
+    ) -> list:
+        """Summarizes many documents at once on the event loop, each on its own thread.
+
+        ### Parameters:
+        ----
+        files: Iterable[File]
+            The files to summarize.
+
+        concurrency: int (optional, default=50)
+            The maximum number of documents summarized at once.
+
+        sink: str | Callable (optional, default=None)
+            Where to send each result as it completes. A string is treated
+            as the path of a JSONL file that results are appended to, a
+            callable is called with each result dictionary.
+
+        schema: dict (optional, default=None)
+            The JSON schema the summaries are validated against. If not
+            provided, the schema of the prompt is used.
+
+        cache: SummaryCache (optional, default=None)
+            A cache of earlier summaries.
+
+        ### Returns:
+        ----
+        list :
+            A list of result dictionaries, in the order they completed.
+        """
+
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1.")
+
+        if self._assistant is None:
+            await self.start()
+
+        files = list(files)
+        results = []
+
+        prompt = self.prompt
+        schema = schema or prompt.schema
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _summarize(file: File) -> dict:
+            async with semaphore:
+                try:
+                    return await self._summarize_one(file, prompt, schema, cache)
+                except Exception as e:
+                    return self._failed_summary(file=file, error=e)
+
+        sink_file = None
+        if isinstance(sink, (str, pathlib.Path)):
+            sink_file = open(file=sink, mode="a", encoding="utf-8")
+
+        try:
+            for future in asyncio.as_completed([_summarize(file) for file in files]):
+
+                result = await future
+
+                self._emit_result(result=result, sink=sink, sink_file=sink_file)
+                results.append(result)
+        finally:
+            if sink_file is not None:
+                sink_file.close()
+
+        # Keep the ID index in sync with any new uploads.
+        for file in files:
+            self._files._index_uploaded(file=file)
+
+        return results
+
+    async def _summarize_one(self, file: File, prompt: Prompt, schema: dict, cache: SummaryCache = None) -> dict:
+        """Summarizes a single document on a short-lived thread.
+
+        ### Parameters:
+        ----
+        file: File
+            The file to summarize.
+
+        prompt: Prompt
+            The prompt used to build the message.
+
+        schema: dict
+            The JSON schema the summary is validated against.
+
+        cache: SummaryCache (optional, default=None)
+            The cache to read the summary from and write it to.
+
+        ### Returns:
+        ----
+        dict :
+            The validated result for the document.
+        """
+
+        start = time.perf_counter()
+        message = prompt.create_prompt(file=file)
+
+        # Step 0: Return the cached summary, hashing the file and reading the cache off the event loop.
+        cache_key, result = await asyncio.to_thread(self._cached_summary, file, message, schema, cache, start)
+        if result is not None:
+            return result
+
+        # Step 1: Make sure the file is available to the assistant.
+        await file.aupload()
+
+        # Step 2: Create a thread just for this document.
+        thread = await AsyncThread.open(client=self.client)
+        thread.assistant = self.assistant
+
+        try:
+            # Step 3: Ask for the summary and wait for the run.
+            await thread.add_message(role="user", message=message, attachment=self._summary_attachment(file=file))
+            run = await thread.create_run()
+
+            # Step 4: Grab the reply of this run, without paging through the thread.
+            reply = None
+            if run.status == "completed":
+                reply = await thread.latest_reply(run_id=run.id)
+
+            # Step 5: Validate the reply.
+            result = self._validate_reply(run=run, reply=reply, schema=schema)
+        finally:
+            # Step 6: Clean up the thread.
+            await thread.delete()
+
+        # Step 7: Cache the summary off the event loop.
+        return await asyncio.to_thread(self._finish_summary, file, result, cache, cache_key, start)
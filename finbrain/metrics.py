@@ -0,0 +1,397 @@
+"""This module contains the Metrics registry, its histograms and exporters."""
+
+import os
+import json
+import time
+import bisect
+import pathlib
+import threading
+from typing import Iterator
+from functools import lru_cache
+from contextlib import contextmanager
+
+# The bucket bounds used for latencies, in seconds.
+SECONDS_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0
+)
+
+# The bucket bounds used for payload sizes, in bytes.
+BYTES_BUCKETS = tuple(1024 * 4 ** power for power in range(10))
+
+# The bucket bounds used for everything else, like tokens and poll counts.
+COUNT_BUCKETS = (
+    1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000
+)
+
+
+def _default_buckets(name: str) -> tuple:
+    """Picks the bucket bounds for a metric from the unit at the end of its name."""
+
+    if name.endswith("_seconds"):
+        return SECONDS_BUCKETS
+
+    if name.endswith("_bytes"):
+        return BYTES_BUCKETS
+
+    return COUNT_BUCKETS
+
+
+class Histogram:
+
+    """A fixed bucket histogram, cheap enough to update on every call."""
+
+    __slots__ = ("_bounds", "_counts", "_count", "_sum", "_min", "_max")
+
+    def __init__(self, bounds: tuple) -> None:
+        """Initializes the Histogram object.
+
+        ### Parameters:
+        ----
+        bounds: tuple
+            The upper bounds of the buckets, in increasing order. Values
+            above the last bound land in an overflow bucket.
+        """
+
+        self._bounds = tuple(bounds)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._min = None
+        self._max = None
+
+    @property
+    def count(self) -> int:
+        """Returns the number of observations."""
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        """Returns the sum of the observations."""
+        return self._sum
+
+    def observe(self, value: float) -> None:
+        """Adds an observation."""
+
+        self._counts[bisect.bisect_left(self._bounds, value)] += 1
+        self._count += 1
+        self._sum += value
+        self._min = value if self._min is None else min(self._min, value)
+        self._max = value if self._max is None else max(self._max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimates a quantile by interpolating inside its bucket.
+
+        ### Parameters:
+        ----
+        q: float
+            The quantile, between 0 and 1.
+
+        ### Returns:
+        ----
+        float :
+            The estimated value, or None if nothing has been observed.
+        """
+
+        if self._count == 0:
+            return None
+
+        rank = q * self._count
+        seen = 0
+
+        for index, count in enumerate(self._counts):
+
+            if count and seen + count >= rank:
+                lower = self._bounds[index - 1] if index > 0 else self._min
+                upper = self._bounds[index] if index < len(self._bounds) else self._max
+                lower = max(lower, self._min)
+                upper = min(upper, self._max)
+                return lower + (upper - lower) * (rank - seen) / count
+
+            seen += count
+
+        return self._max
+
+    def buckets(self) -> list:
+        """Returns the cumulative count at each bound, ending with `+Inf`."""
+
+        cumulative = []
+        total = 0
+
+        for bound, count in zip(self._bounds + (float("inf"),), self._counts):
+            total += count
+            cumulative.append((bound, total))
+
+        return cumulative
+
+    def to_dict(self) -> dict:
+        """Returns a summary of the histogram."""
+
+        return {
+            "count": self._count,
+            "sum": self._sum,
+            "mean": self._sum / self._count if self._count else None,
+            "min": self._min,
+            "max": self._max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99)
+        }
+
+
+class Metrics:
+
+    """An in-process registry of counters and histograms.
+
+    ### Overview:
+    ----
+    Every upload, message, run and poll records its latency, size,
+    retries and token usage here. Metrics are keyed by a name and a set
+    of labels, and an exporter turns a snapshot into a JSON dump or a
+    Prometheus text file.
+    """
+
+    def __init__(self) -> None:
+        """Initializes the Metrics object.
+
+        ### Usage:
+        ----
+            >>> from finbrain.metrics import default_metrics
+            >>> metrics = default_metrics()
+            >>> with metrics.timer("finbrain_upload_seconds"):
+            ...     file.upload()
+            >>> metrics.snapshot()
+        """
+
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        """Returns the registry key of a metric."""
+        return (name, tuple(sorted(
+            (key, str(value).lower() if isinstance(value, bool) else str(value))
+            for key, value in labels.items()
+        )))
+
+    def observe(self, name: str, value: float, buckets: tuple = None, **labels) -> None:
+        """Adds an observation to a histogram.
+
+        ### Parameters:
+        ----
+        name: str
+            The name of the histogram. Names ending in `_seconds` or
+            `_bytes` get bucket bounds that suit those units.
+
+        value: float
+            The value to record.
+
+        buckets: tuple (optional, default=None)
+            The bucket bounds, used when the histogram is first created.
+
+        **labels:
+            The labels of the histogram, for example `status="completed"`.
+        """
+
+        key = self._key(name=name, labels=labels)
+
+        with self._lock:
+            histogram = self._histograms.get(key, None)
+            if histogram is None:
+                histogram = Histogram(bounds=buckets or _default_buckets(name=name))
+                self._histograms[key] = histogram
+            histogram.observe(value)
+
+    def increment(self, name: str, amount: float = 1, **labels) -> None:
+        """Adds to a counter.
+
+        ### Parameters:
+        ----
+        name: str
+            The name of the counter.
+
+        amount: float (optional, default=1)
+            The amount to add.
+
+        **labels:
+            The labels of the counter.
+        """
+
+        key = self._key(name=name, labels=labels)
+
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[dict]:
+        """Times the body of a `with` block into a histogram.
+
+        ### Parameters:
+        ----
+        name: str
+            The name of the histogram.
+
+        **labels:
+            The labels of the histogram.
+
+        ### Returns:
+        ----
+        Iterator[dict] :
+            The labels, which the block can still change, for example to
+            record the status of a run once it is known. A `status` label
+            of `success`, or `error` if the block raised, is added unless
+            the block sets one.
+        """
+
+        start = time.perf_counter()
+        labels.setdefault("status", "success")
+
+        try:
+            yield labels
+        except BaseException:
+            labels["status"] = "error"
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        """Returns a histogram, or None if it has no observations yet."""
+        return self._histograms.get(self._key(name=name, labels=labels), None)
+
+    def counter(self, name: str, **labels) -> float:
+        """Returns the value of a counter."""
+        return self._counters.get(self._key(name=name, labels=labels), 0)
+
+    def reset(self) -> None:
+        """Drops every metric."""
+
+        with self._lock:
+            self._histograms = {}
+            self._counters = {}
+
+    def snapshot(self) -> dict:
+        """Returns every metric as a JSON serializable dictionary."""
+
+        with self._lock:
+
+            histograms = [
+                {"name": name, "labels": dict(labels), **histogram.to_dict()}
+                for (name, labels), histogram in sorted(self._histograms.items())
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+
+        return {
+            "timestamp": time.time(),
+            "histograms": histograms,
+            "counters": counters
+        }
+
+    def to_prometheus(self) -> str:
+        """Returns every metric in the Prometheus text exposition format."""
+
+        def _labels(labels: tuple, extra: tuple = ()) -> str:
+            pairs = [f'{key}="{value}"' for key, value in labels + extra]
+            return "{" + ",".join(pairs) + "}" if pairs else ""
+
+        lines = []
+
+        with self._lock:
+
+            typed = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{_labels(labels)} {value}")
+
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                for bound, count in histogram.buckets():
+                    le = "+Inf" if bound == float("inf") else repr(float(bound))
+                    lines.append(f"{name}_bucket{_labels(labels, (('le', le),))} {count}")
+                lines.append(f"{name}_sum{_labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, exporter) -> str:
+        """Hands the metrics to an exporter.
+
+        ### Parameters:
+        ----
+        exporter: JsonExporter | PrometheusExporter
+            Any object with an `export(metrics)` method.
+
+        ### Returns:
+        ----
+        str :
+            Whatever the exporter returns, usually the path it wrote to.
+        """
+        return exporter.export(metrics=self)
+
+
+def _write_atomic(path: pathlib.Path, text: str) -> None:
+    """Writes a file through a temporary file, so readers never see half of it."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+
+    with open(file=temp_path, mode="w+", encoding="utf-8") as file:
+        file.write(text)
+
+    os.replace(temp_path, path)
+
+
+class JsonExporter:
+
+    """Writes a snapshot of the metrics to a JSON file."""
+
+    def __init__(self, path: str = "finbrain_metrics.json") -> None:
+        """Initializes the JsonExporter object.
+
+        ### Parameters:
+        ----
+        path: str (optional, default="finbrain_metrics.json")
+            The file the snapshot is written to.
+        """
+        self._path = pathlib.Path(path)
+
+    def export(self, metrics: Metrics) -> str:
+        """Writes the snapshot and returns the path."""
+
+        _write_atomic(path=self._path, text=json.dumps(metrics.snapshot(), indent=4))
+
+        return self._path.as_posix()
+
+
+class PrometheusExporter:
+
+    """Writes the metrics to a Prometheus text file, for the node exporter textfile collector."""
+
+    def __init__(self, path: str = "finbrain_metrics.prom") -> None:
+        """Initializes the PrometheusExporter object.
+
+        ### Parameters:
+        ----
+        path: str (optional, default="finbrain_metrics.prom")
+            The file the metrics are written to.
+        """
+        self._path = pathlib.Path(path)
+
+    def export(self, metrics: Metrics) -> str:
+        """Writes the metrics and returns the path."""
+
+        _write_atomic(path=self._path, text=metrics.to_prometheus())
+
+        return self._path.as_posix()
+
+
+@lru_cache(maxsize=1)
+def default_metrics() -> Metrics:
+    """Returns the registry every finbrain object records into."""
+    return Metrics()
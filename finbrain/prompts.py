@@ -1,16 +1,120 @@
+import string
 import pathlib
+import threading
+from typing import Iterable
 from finbrain.utils import File
+from finbrain.schemas import default_registry
+
+# Compiled templates shared by every `Prompt`, keyed by template path.
+_TEMPLATE_CACHE = {}
+_TEMPLATE_LOCK = threading.Lock()
+
+
+class CompiledTemplate():
+
+    """A prompt template that has been split into literals and fields once."""
+
+    _formatter = string.Formatter()
+
+    def __init__(self, text: str) -> None:
+        """Initializes the `CompiledTemplate` object.
+
+        ### Parameters:
+        ----
+        text: str
+            The template text, using `str.format` syntax.
+        """
+
+        self._chunks = list(self._formatter.parse(text))
+        self._fields = [
+            field_name for _, field_name, _, _ in self._chunks
+            if field_name is not None
+        ]
+
+    @property
+    def fields(self) -> list:
+        """Returns the names of the fields used by the template."""
+        return self._fields
+
+    def render(self, **kwargs) -> str:
+        """Renders the template with the given field values.
+
+        ### Returns:
+        ----
+        str :
+            The rendered template, identical to `text.format(**kwargs)`.
+        """
+
+        parts = []
+
+        for literal, field_name, format_spec, conversion in self._chunks:
+            parts.append(literal)
+            if field_name is None:
+                continue
+            value, _ = self._formatter.get_field(field_name, (), kwargs)
+            value = self._formatter.convert_field(value, conversion)
+            parts.append(self._formatter.format_field(value, format_spec))
+
+        return "".join(parts)
+
+
+def load_template(file_path: pathlib.Path) -> CompiledTemplate:
+    """Returns the compiled template for a file, reading it only when it changes.
+
+    ### Parameters:
+    ----
+    file_path: pathlib.Path
+        The path to the template file.
+
+    ### Returns:
+    ----
+    CompiledTemplate :
+        The compiled template. It is cached for the whole process and
+        invalidated when the modification time or size of the file changes.
+    """
+
+    stat = file_path.stat()
+    key = (stat.st_mtime_ns, stat.st_size)
+    entry = _TEMPLATE_CACHE.get(file_path, None)
+
+    if entry is not None and entry[0] == key:
+        return entry[1]
+
+    with _TEMPLATE_LOCK:
+        with open(file=file_path, mode="r", encoding="utf-8") as prompt_file:
+            template = CompiledTemplate(text=prompt_file.read())
+        _TEMPLATE_CACHE[file_path] = (key, template)
+
+    return template
 
 
 class Prompt():
 
     """The `Prompt` class creates prompts for that will be used by the agent."""
 
-    def __init__(self) -> None:
-        """Initializes the `Prompt` object."""
+    def __init__(self, prompt_key: str = "summary_prompt") -> None:
+        """Initializes the `Prompt` object.
+
+        ### Parameters:
+        ----
+        prompt_key: str (optional, default="summary_prompt")
+            The key of the prompt in the schema registry, used to look up
+            the JSON schema the output must match.
+        """
 
         parent_dir = pathlib.Path(__file__).parent
         self._templates_folder = parent_dir.joinpath("templates")
+        self._prompt_key = prompt_key
+
+    @property
+    def prompt_key(self) -> str:
+        """Returns the key of the prompt in the schema registry."""
+        return self._prompt_key
+
+    @property
+    def schema(self) -> dict:
+        """Returns the JSON schema the prompt output must match."""
+        return default_registry().get_schema(prompt_key=self._prompt_key)
 
     def create_prompt(self, file: File) -> str:
         """Creates a prompt for the document summary task.
@@ -26,15 +130,87 @@ class Prompt():
             The prompt for the document summary task.
         """
 
-        # Define the full path to the prompt file.
-        file_path = self._templates_folder.joinpath("document_summary.md")
+        # Grab the compiled template, it is only read from disk when it changes.
+        template = load_template(
+            file_path=self._templates_folder.joinpath("document_summary.md")
+        )
 
-        # Open the markdown file of the prompt that needs to be created
-        with open(file=file_path, mode="r", encoding="utf-8") as prompt_file:
-            prompt = prompt_file.read()
-            prompt = prompt.format(document_name=file.name)
+        return template.render(document_name=file.name)
+
+    def render_many(self, files: Iterable[File]) -> list:
+        """Creates the document summary prompt for many files.
+
+        ### Parameters:
+        ----
+        files: Iterable[File]
+            The files to be summarized.
+
+        ### Returns:
+        ----
+        list :
+            The prompts, in the same order as the files.
+        """
+
+        template = load_template(
+            file_path=self._templates_folder.joinpath("document_summary.md")
+        )
+
+        return [template.render(document_name=file.name) for file in files]
+
+    def create_section_prompt(self, document_name: str, title: str, text: str) -> str:
+        """Creates a prompt that summarizes one section of a document, given inline.
+
+        ### Parameters:
+        ----
+        document_name: str
+            The name of the document the section is from.
+
+        title: str
+            The title of the section, for example "Item 1A. Risk Factors".
+
+        text: str
+            The text of the section.
+
+        ### Returns:
+        ----
+        str :
+            The prompt for the section summary task.
+        """
+
+        template = load_template(
+            file_path=self._templates_folder.joinpath("section_summary.md")
+        )
+
+        return template.render(document_name=document_name, section_title=title, section_text=text)
+
+    def create_question_prompt(self, question: str, passages: list) -> str:
+        """Creates a prompt that answers a question from passages given inline.
+
+        ### Parameters:
+        ----
+        question: str
+            The question to answer.
+
+        passages: list
+            The passages returned by `SearchIndex.search`, best first.
+
+        ### Returns:
+        ----
+        str :
+            The prompt for the question task, with every passage numbered
+            and labelled with its document and byte offsets.
+        """
+
+        template = load_template(
+            file_path=self._templates_folder.joinpath("question_answer.md")
+        )
+
+        blocks = [
+            f"### [{number}] {passage['document']} (bytes {passage['start']}-{passage['end']})\n\n{passage['text']}"
+            for number, passage in enumerate(passages, start=1)
+        ]
 
-        return prompt
+        return template.render(question=question, passages="\n\n".join(blocks))
 
     def write_prompt(self, file: File, output_path: str) -> None:
         """Writes the prompt to a file.
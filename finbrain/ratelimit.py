@@ -0,0 +1,376 @@
+"""This module contains the RateLimiter class."""
+
+from __future__ import annotations
+
+import re
+import time
+import asyncio
+import logging
+import threading
+from typing import TYPE_CHECKING
+
+from finbrain.metrics import default_metrics
+
+if TYPE_CHECKING:
+    import httpx
+
+# The endpoints whose request bodies count against the tokens per minute limit.
+_TOKEN_PATHS = re.compile(r"/(messages|runs|chat/completions)$")
+
+# Matches the durations in the reset headers, for example `6m0s` or `20ms`.
+_DURATION_PARTS = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_duration(value: str) -> float:
+    """Parses a rate limit reset header into seconds.
+
+    ### Parameters:
+    ----
+    value: str
+        The header value, for example `1s`, `6m0s` or `20ms`. Plain
+        numbers are treated as seconds.
+
+    ### Returns:
+    ----
+    float :
+        The duration in seconds.
+    """
+
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    scale = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+    return sum(
+        float(amount) * scale[unit]
+        for amount, unit in _DURATION_PARTS.findall(value)
+    )
+
+
+class TokenBucket:
+
+    """A bucket that refills continuously up to a fixed capacity."""
+
+    def __init__(self, per_minute: float) -> None:
+        """Initializes the TokenBucket object.
+
+        ### Parameters:
+        ----
+        per_minute: float
+            The capacity of the bucket, refilled evenly over a minute.
+        """
+
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self._last = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        """Returns the number of tokens added per second."""
+        return self.capacity / 60.0
+
+    def refill(self, now: float) -> None:
+        """Adds the tokens earned since the last refill."""
+
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def wait_time(self, amount: float) -> float:
+        """Returns how long until `amount` tokens are available."""
+
+        if self.tokens >= amount:
+            return 0.0
+
+        # Never wait for more than a full bucket, so oversized requests still go through.
+        missing = min(amount, self.capacity) - self.tokens
+
+        return max(missing, 0.0) / self.rate
+
+
+class RateLimiter:
+
+    """A client side limiter for requests and tokens per minute.
+
+    ### Overview:
+    ----
+    The limiter hooks into the HTTP client of an `OpenAI` client, so
+    every call made through that client, by `Files`, `Thread` or
+    `AssistantCreator`, waits its turn instead of running into a 429.
+    The rate limit headers of every response are used to correct the
+    buckets, and a 429 pauses every caller until the limit resets.
+    """
+
+    def __init__(self, requests_per_minute: float = 500, tokens_per_minute: float = 200000) -> None:
+        """Initializes the RateLimiter object.
+
+        ### Parameters:
+        ----
+        requests_per_minute: float (optional, default=500)
+            The number of requests allowed per minute. It is replaced by
+            the limit the API reports once a response has been seen.
+
+        tokens_per_minute: float (optional, default=200000)
+            The number of tokens allowed per minute. It is replaced by
+            the limit the API reports once a response has been seen.
+
+        ### Usage:
+        ----
+            >>> from finbrain.ratelimit import RateLimiter
+            >>> limiter = RateLimiter(requests_per_minute=500)
+            >>> assistant = FinBrainAssistant(api_key=api_key, rate_limiter=limiter)
+            >>> limiter.queue_depth
+        """
+
+        self._condition = threading.Condition()
+        self._requests = TokenBucket(per_minute=requests_per_minute)
+        self._tokens = TokenBucket(per_minute=tokens_per_minute)
+        self._paused_until = 0.0
+        self._waiting = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Returns the number of callers waiting for capacity."""
+        return self._waiting
+
+    @property
+    def requests_per_minute(self) -> float:
+        """Returns the current requests per minute limit."""
+        return self._requests.capacity
+
+    @property
+    def tokens_per_minute(self) -> float:
+        """Returns the current tokens per minute limit."""
+        return self._tokens.capacity
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Takes capacity if it is available, otherwise returns how long to wait.
+
+        ### Parameters:
+        ----
+        tokens: int
+            The number of tokens the request is expected to use.
+
+        ### Returns:
+        ----
+        float :
+            Zero if the capacity was taken, otherwise the number of
+            seconds to wait before trying again.
+        """
+
+        now = time.monotonic()
+        self._requests.refill(now=now)
+        self._tokens.refill(now=now)
+
+        wait = max(
+            self._paused_until - now,
+            self._requests.wait_time(amount=1),
+            self._tokens.wait_time(amount=tokens)
+        )
+
+        if wait <= 0:
+            self._requests.tokens -= 1
+            self._tokens.tokens -= tokens
+
+        return wait
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Blocks until a request, and its tokens, fit within the limits.
+
+        ### Parameters:
+        ----
+        tokens: int (optional, default=0)
+            The number of tokens the request is expected to use.
+
+        ### Returns:
+        ----
+        float :
+            The number of seconds spent waiting.
+        """
+
+        start = time.monotonic()
+
+        with self._condition:
+
+            self._waiting += 1
+
+            try:
+                while True:
+                    wait = self._try_acquire(tokens=tokens)
+                    if wait <= 0:
+                        break
+                    self._condition.wait(timeout=wait)
+            finally:
+                self._waiting -= 1
+
+        return time.monotonic() - start
+
+    async def aacquire(self, tokens: int = 0) -> float:
+        """Waits on the event loop until a request, and its tokens, fit within the limits.
+
+        ### Parameters:
+        ----
+        tokens: int (optional, default=0)
+            The number of tokens the request is expected to use.
+
+        ### Returns:
+        ----
+        float :
+            The number of seconds spent waiting.
+        """
+
+        start = time.monotonic()
+
+        with self._condition:
+            self._waiting += 1
+
+        try:
+            while True:
+                with self._condition:
+                    wait = self._try_acquire(tokens=tokens)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+        finally:
+            with self._condition:
+                self._waiting -= 1
+
+        return time.monotonic() - start
+
+    def update_from_headers(self, headers: httpx.Headers, status_code: int = 200) -> None:
+        """Adjusts the buckets to the rate limit headers of a response.
+
+        ### Parameters:
+        ----
+        headers: httpx.Headers
+            The response headers.
+
+        status_code: int (optional, default=200)
+            The response status code. A 429 pauses every caller until the
+            limit resets.
+        """
+
+        with self._condition:
+
+            for bucket, kind in ((self._requests, "requests"), (self._tokens, "tokens")):
+
+                limit = headers.get(f"x-ratelimit-limit-{kind}", None)
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}", None)
+
+                if limit is not None and float(limit) > 0:
+                    bucket.capacity = float(limit)
+
+                # The server knows better than our estimate of what is left.
+                if remaining is not None:
+                    bucket.tokens = min(bucket.tokens, float(remaining))
+
+            if status_code == 429:
+
+                retry_after = headers.get("retry-after", None)
+                delay = parse_duration(retry_after) if retry_after else max(
+                    parse_duration(headers.get("x-ratelimit-reset-requests", "0")),
+                    parse_duration(headers.get("x-ratelimit-reset-tokens", "0"))
+                )
+                delay = delay or 1.0
+
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                default_metrics().increment("finbrain_rate_limited_total")
+                logging.warning(f"Rate limited by the API, pausing for {delay:.2f} seconds.")
+
+            self._condition.notify_all()
+
+    @staticmethod
+    def estimate_tokens(request: httpx.Request) -> int:
+        """Estimates the number of tokens a request will use.
+
+        ### Overview:
+        ----
+        Only message, run and chat completion requests count, and their
+        size is estimated at four bytes per token. File uploads do not
+        count against the tokens per minute limit.
+
+        ### Parameters:
+        ----
+        request: httpx.Request
+            The outgoing request.
+        """
+
+        if request.method != "POST" or not _TOKEN_PATHS.search(request.url.path):
+            return 0
+
+        return len(request.content) // 4
+
+    def on_request(self, request: httpx.Request) -> None:
+        """The `httpx` request hook, waits for capacity."""
+
+        waited = self.acquire(tokens=self.estimate_tokens(request=request))
+
+        if waited > 0.01:
+            default_metrics().observe("finbrain_rate_limit_wait_seconds", waited)
+            logging.info(f"Waited {waited:.2f} seconds for {request.url.path}.")
+
+    def on_response(self, response: httpx.Response) -> None:
+        """The `httpx` response hook, learns from the rate limit headers."""
+        self.update_from_headers(headers=response.headers, status_code=response.status_code)
+
+    async def aon_request(self, request: httpx.Request) -> None:
+        """The async `httpx` request hook, waits for capacity."""
+
+        waited = await self.aacquire(tokens=self.estimate_tokens(request=request))
+
+        if waited > 0.01:
+            default_metrics().observe("finbrain_rate_limit_wait_seconds", waited)
+            logging.info(f"Waited {waited:.2f} seconds for {request.url.path}.")
+
+    async def aon_response(self, response: httpx.Response) -> None:
+        """The async `httpx` response hook, learns from the rate limit headers."""
+        self.update_from_headers(headers=response.headers, status_code=response.status_code)
+
+    def async_http_client(self, **kwargs) -> httpx.AsyncClient:
+        """Returns an HTTP client for `AsyncOpenAI` that goes through the limiter.
+
+        ### Parameters:
+        ----
+        **kwargs:
+            Any other arguments for `openai.DefaultAsyncHttpxClient`.
+
+        ### Returns:
+        ----
+        httpx.AsyncClient :
+            The HTTP client to pass to `AsyncOpenAI(http_client=...)`.
+        """
+
+        from openai import DefaultAsyncHttpxClient
+
+        return DefaultAsyncHttpxClient(
+            event_hooks={
+                "request": [self.aon_request],
+                "response": [self.aon_response]
+            },
+            **kwargs
+        )
+
+    def http_client(self, **kwargs) -> httpx.Client:
+        """Returns an HTTP client for `OpenAI` that goes through the limiter.
+
+        ### Parameters:
+        ----
+        **kwargs:
+            Any other arguments for `openai.DefaultHttpxClient`.
+
+        ### Returns:
+        ----
+        httpx.Client :
+            The HTTP client to pass to `OpenAI(http_client=...)`.
+        """
+
+        from openai import DefaultHttpxClient
+
+        return DefaultHttpxClient(
+            event_hooks={
+                "request": [self.on_request],
+                "response": [self.on_response]
+            },
+            **kwargs
+        )
@@ -0,0 +1,165 @@
+"""This module contains the SchemaRegistry class."""
+
+import re
+import json
+import pathlib
+import logging
+import threading
+import functools
+
+# The registry of prompt schemas that ships with the library.
+DEFAULT_REGISTRY_PATH = pathlib.Path(__file__).parent.joinpath(
+    "validation", "schema_validation_prompts.jsonc"
+)
+
+# Matches strings, line comments and block comments, in that order, so
+# comment markers inside strings are left alone.
+_JSONC_TOKENS = re.compile(
+    r'"(?:\\.|[^"\\])*"|//[^\n]*|/\*.*?\*/',
+    re.DOTALL
+)
+
+# Matches a trailing comma before a closing bracket or brace.
+_TRAILING_COMMAS = re.compile(r',(\s*[\]}])')
+
+
+def strip_jsonc(text: str) -> str:
+    """Removes comments and trailing commas from a JSONC document.
+
+    ### Parameters:
+    ----
+    text: str
+        The JSONC document.
+
+    ### Returns:
+    ----
+    str :
+        A plain JSON document.
+    """
+
+    def _replace(match: re.Match) -> str:
+        token = match.group(0)
+        return token if token.startswith('"') else ""
+
+    text = _JSONC_TOKENS.sub(_replace, text)
+
+    # Only strip trailing commas outside of strings.
+    parts = re.split(r'("(?:\\.|[^"\\])*")', text)
+    for i in range(0, len(parts), 2):
+        parts[i] = _TRAILING_COMMAS.sub(r"\1", parts[i])
+
+    return "".join(parts)
+
+
+class SchemaRegistry:
+
+    """A lazily loaded registry of the prompt schemas in a JSONC file."""
+
+    def __init__(self, path: str = DEFAULT_REGISTRY_PATH) -> None:
+        """Initializes the SchemaRegistry object.
+
+        ### Parameters:
+        ----
+        path: str (optional, default=DEFAULT_REGISTRY_PATH)
+            The path to the JSONC registry file. It is not read until the
+            first schema is requested.
+
+        ### Usage:
+        ----
+            >>> from finbrain.schemas import default_registry
+            >>> registry = default_registry()
+            >>> schema = registry.get_schema(prompt_key="summary_prompt")
+        """
+
+        self._path = pathlib.Path(path)
+        self._lock = threading.Lock()
+        self._prompts = None
+        self._validators = {}
+
+    @property
+    def path(self) -> pathlib.Path:
+        """Returns the path to the registry file."""
+        return self._path
+
+    @property
+    def prompts(self) -> dict:
+        """Returns every prompt definition, parsing the file on first use."""
+
+        if self._prompts is None:
+            with self._lock:
+                if self._prompts is None:
+                    with open(file=self._path, mode="r", encoding="utf-8") as file:
+                        self._prompts = json.loads(strip_jsonc(file.read()))
+                    logging.info(f"Schema registry loaded: {self._path.name}")
+
+        return self._prompts
+
+    def keys(self) -> list:
+        """Returns the prompt keys in the registry."""
+        return list(self.prompts.keys())
+
+    def get_prompt(self, prompt_key: str) -> dict:
+        """Returns the full definition of a prompt.
+
+        ### Parameters:
+        ----
+        prompt_key: str
+            The key of the prompt, for example `summary_prompt`.
+
+        ### Returns:
+        ----
+        dict :
+            The prompt definition, including its name, purpose and schema.
+        """
+
+        prompt = self.prompts.get(prompt_key, None)
+
+        if prompt is None:
+            raise ValueError(f"Prompt with key {prompt_key} does not exist.")
+
+        return prompt
+
+    def get_schema(self, prompt_key: str) -> dict:
+        """Returns the JSON schema of a prompt.
+
+        ### Parameters:
+        ----
+        prompt_key: str
+            The key of the prompt, for example `summary_prompt`.
+
+        ### Returns:
+        ----
+        dict :
+            The JSON schema the prompt output must match. The same object
+            is returned on every call.
+        """
+        return self.get_prompt(prompt_key=prompt_key)["json_schema"]
+
+    def get_validator(self, prompt_key: str):
+        """Returns the compiled validator of a prompt.
+
+        ### Parameters:
+        ----
+        prompt_key: str
+            The key of the prompt, for example `summary_prompt`.
+
+        ### Returns:
+        ----
+        jsonschema.protocols.Validator :
+            The compiled validator for the prompt schema.
+        """
+
+        compiled = self._validators.get(prompt_key, None)
+
+        if compiled is None:
+            from finbrain.validator import Validator
+            compiled = Validator().compile(schema=self.get_schema(prompt_key=prompt_key))
+            self._validators[prompt_key] = compiled
+
+        return compiled
+
+
+@functools.lru_cache(maxsize=None)
+def default_registry() -> SchemaRegistry:
+    """Returns the registry shared by the whole process."""
+    return SchemaRegistry()
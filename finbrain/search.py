@@ -0,0 +1,679 @@
+"""This module contains the SearchIndex class, a local BM25 index over the filings."""
+
+import os
+import re
+import copy
+import json
+import math
+import mmap
+import heapq
+import pathlib
+import logging
+import threading
+from array import array
+from typing import Iterable
+from typing import Iterator
+from collections import Counter
+from finbrain.utils import File
+from finbrain.utils import _text_path
+from finbrain.metrics import default_metrics
+
+# The version of the on-disk format, bumped whenever it changes.
+INDEX_VERSION = 2
+
+# Words too common to say anything about a passage.
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "this to was were which will with".split()
+)
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list:
+    """Splits text into lowercase terms, dropping stop words.
+
+    ### Parameters:
+    ----
+    text: str
+        The text to split.
+
+    ### Returns:
+    ----
+    list :
+        The terms, in the order they appear.
+    """
+
+    return [
+        term for term in _TOKEN_PATTERN.findall(text.lower())
+        if term not in STOP_WORDS
+    ]
+
+
+def _open_map(path: pathlib.Path) -> mmap.mmap:
+    """Memory maps a file for reading, or returns None if it is empty."""
+
+    with open(file=path, mode="rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _write_atomic(path: pathlib.Path, data: bytes) -> None:
+    """Writes a file through a temporary file, so readers never see half of it."""
+
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+
+    with open(file=temp_path, mode="wb") as file:
+        file.write(data)
+
+    os.replace(temp_path, path)
+
+
+def _passage_bounds(data: bytes, passage_bytes: int) -> Iterator[tuple]:
+    """Yields the start and end offsets of passages, cut on line boundaries.
+
+    ### Parameters:
+    ----
+    data: bytes
+        The preprocessed text, or a memory map of it.
+
+    passage_bytes: int
+        The size a passage grows to before it is cut. A single line
+        longer than this becomes a passage of its own.
+
+    ### Returns:
+    ----
+    Iterator[tuple] :
+        The `(start, end)` byte offsets of each passage.
+    """
+
+    start = 0
+    end = 0
+    length = len(data)
+
+    while end < length:
+
+        newline = data.find(b"\n", end)
+        end = length if newline == -1 else newline + 1
+
+        if end - start >= passage_bytes:
+            yield start, end
+            start = end
+
+    if start < length:
+        yield start, length
+
+
+class _Segment:
+
+    """A read-only, memory mapped segment of the index.
+
+    ### Overview:
+    ----
+    A segment is three files that share a name:
+
+    - `<name>.terms.json` maps every term to the offset and length of its
+      postings.
+    - `<name>.postings` holds the postings as unsigned 32-bit pairs of
+      passage number and term frequency.
+    - `<name>.passages` holds four unsigned 64-bit values per passage:
+      the document number, the start and end byte offsets in the
+      preprocessed text, and the number of terms.
+
+    The binary files are read through memory maps, so opening an index
+    costs the term dictionaries and nothing else.
+    """
+
+    def __init__(self, folder: pathlib.Path, name: str) -> None:
+        """Initializes the _Segment object.
+
+        ### Parameters:
+        ----
+        folder: pathlib.Path
+            The folder of the index.
+
+        name: str
+            The name shared by the segment files.
+        """
+
+        self._folder = folder
+        self._name = name
+        self._users = 0
+        self._retired = False
+
+        with open(file=folder.joinpath(f"{name}.terms.json"), mode="r", encoding="utf-8") as file:
+            self._terms = json.load(file)
+
+        self._postings_map = _open_map(path=folder.joinpath(f"{name}.postings"))
+        self._passages_map = _open_map(path=folder.joinpath(f"{name}.passages"))
+        self._postings = memoryview(self._postings_map or b"").cast("I")
+        self._passages = memoryview(self._passages_map or b"").cast("Q")
+
+    @property
+    def name(self) -> str:
+        """Returns the name of the segment."""
+        return self._name
+
+    @property
+    def passage_count(self) -> int:
+        """Returns the number of passages in the segment."""
+        return len(self._passages) // 4
+
+    def document_frequency(self, term: str) -> int:
+        """Returns the number of passages in the segment that contain a term."""
+        return self._terms.get(term, (0, 0))[1]
+
+    def postings(self, term: str) -> memoryview:
+        """Returns the flat `(passage, frequency)` pairs of a term."""
+
+        offset, count = self._terms.get(term, (0, 0))
+
+        return self._postings[offset * 2:(offset + count) * 2]
+
+    @property
+    def passages(self) -> memoryview:
+        """Returns the flat `(document, start, end, length)` values of every passage."""
+        return self._passages
+
+    def passage(self, number: int) -> tuple:
+        """Returns the document number, start, end and length of a passage."""
+        return tuple(self._passages[number * 4:number * 4 + 4])
+
+    def acquire(self) -> None:
+        """Marks the segment as read by a search, the caller holds the view lock."""
+        self._users += 1
+
+    def release(self) -> None:
+        """Ends a read, and removes a retired segment once nothing reads it."""
+
+        self._users -= 1
+
+        if self._retired and self._users == 0:
+            self.remove()
+
+    def retire(self) -> None:
+        """Removes the segment now, or after the searches that read it finish."""
+
+        self._retired = True
+
+        if self._users == 0:
+            self.remove()
+
+    def remove(self) -> None:
+        """Closes the segment and deletes its files."""
+
+        self.close()
+
+        for suffix in ("terms.json", "postings", "passages"):
+            self._folder.joinpath(f"{self._name}.{suffix}").unlink(missing_ok=True)
+
+    def close(self) -> None:
+        """Releases the memory maps."""
+
+        self._postings.release()
+        self._passages.release()
+
+        for memory_map in (self._postings_map, self._passages_map):
+            if memory_map is not None:
+                memory_map.close()
+
+
+class SearchIndex:
+
+    """A local BM25 index over the preprocessed text of the filings.
+
+    ### Overview:
+    ----
+    Each document is cut into passages of roughly `passage_bytes`, on
+    line boundaries, and every passage is indexed by the terms it
+    contains. Passages are stored as byte offsets into the preprocessed
+    text, so the index never duplicates the documents.
+
+    Files are indexed in batches, and every batch is written as a new
+    immutable segment next to a small `index.json` manifest. Adding files
+    therefore never rewrites what is already on disk. A document that
+    changes is indexed again and its old passages are ignored, until
+    `compact` folds everything back into a single segment. This happens
+    on its own once the share of replaced passages passes `compact_ratio`.
+
+    Documents are keyed by their path, so two filings with the same name
+    in different folders are indexed side by side.
+    """
+
+    def __init__(
+        self,
+        path: str = ".finbrain/index",
+        text_dir: str = ".finbrain/preprocessed",
+        passage_bytes: int = 1500,
+        k1: float = 1.5,
+        b: float = 0.75,
+        compact_ratio: float = 0.25
+    ) -> None:
+        """Initializes the SearchIndex object.
+
+        ### Parameters:
+        ----
+        path: str (optional, default=".finbrain/index")
+            The folder the index is stored in.
+
+        text_dir: str (optional, default=".finbrain/preprocessed")
+            The folder of the preprocessed text. Files that have not been
+            preprocessed yet are converted into it, the same way
+            `Preprocessor` does.
+
+        passage_bytes: int (optional, default=1500)
+            The size passages grow to before they are cut.
+
+        k1: float (optional, default=1.5)
+            The BM25 term frequency saturation.
+
+        b: float (optional, default=0.75)
+            The BM25 length normalization.
+
+        compact_ratio: float (optional, default=0.25)
+            The share of passages that belong to replaced documents above
+            which `add_files` compacts the index. Replaced passages still
+            weigh on the term statistics, so they are not kept for long.
+            If None, the index is only compacted by calling `compact`.
+
+        ### Usage:
+        ----
+            >>> from finbrain.search import SearchIndex
+            >>> index = SearchIndex()
+            >>> index.add_files(files=assistant.files)
+            >>> passages = index.search(query="What was FY2019 revenue?", top_k=5)
+        """
+
+        self._path = pathlib.Path(path)
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._text_dir = pathlib.Path(text_dir)
+        self._text_dir.mkdir(parents=True, exist_ok=True)
+        self._manifest_path = self._path.joinpath("index.json")
+        self._passage_bytes = passage_bytes
+        self._k1 = k1
+        self._b = b
+        self._compact_ratio = compact_ratio
+        self._lock = threading.Lock()
+        self._view_lock = threading.Lock()
+        self._manifest = self._read_manifest()
+        self._segments = [
+            _Segment(folder=self._path, name=name)
+            for name in self._manifest["segments"]
+        ]
+
+    @property
+    def path(self) -> pathlib.Path:
+        """Returns the folder the index is stored in."""
+        return self._path
+
+    @property
+    def documents(self) -> list:
+        """Returns the paths of the documents in the index."""
+        return [
+            document["path"] for document in self._manifest["documents"]
+            if document["live"]
+        ]
+
+    @property
+    def dead_ratio(self) -> float:
+        """Returns the share of passages that belong to replaced documents."""
+
+        total = sum(document["passages"] for document in self._manifest["documents"])
+        if total == 0:
+            return 0.0
+
+        return 1 - self.passage_count / total
+
+    @property
+    def passage_count(self) -> int:
+        """Returns the number of passages that can be returned by a search."""
+        return sum(
+            document["passages"] for document in self._manifest["documents"]
+            if document["live"]
+        )
+
+    def _read_manifest(self) -> dict:
+        """Loads the manifest, or starts an empty one."""
+
+        if not self._manifest_path.exists():
+            return {
+                "version": INDEX_VERSION,
+                "next_segment": 0,
+                "segments": [],
+                "documents": []
+            }
+
+        with open(file=self._manifest_path, mode="r", encoding="utf-8") as file:
+            manifest = json.load(file)
+
+        if manifest.get("version", None) != INDEX_VERSION:
+            raise ValueError(
+                f"Index `{self._path}` has version {manifest.get('version', None)}, "
+                f"expected {INDEX_VERSION}. Delete the folder to rebuild it."
+            )
+
+        return manifest
+
+    def _write_manifest(self, manifest: dict) -> None:
+        """Saves the manifest, it is the commit point of every change."""
+
+        _write_atomic(
+            path=self._manifest_path,
+            data=json.dumps(manifest, indent=4).encode("utf-8")
+        )
+
+    def _write_segment(self, name: str, documents: list) -> int:
+        """Indexes the passages of some documents into a new segment.
+
+        ### Parameters:
+        ----
+        name: str
+            The name of the segment.
+
+        documents: list
+            Pairs of document number and manifest entry. The number and
+            length of passages are filled into each entry.
+
+        ### Returns:
+        ----
+        int :
+            The number of passages written.
+        """
+
+        passages = array("Q")
+        postings = {}
+
+        # Step 1: Cut every document into passages and count their terms.
+        for number, document in documents:
+
+            document["passages"] = 0
+            document["length"] = 0
+
+            memory_map = _open_map(path=pathlib.Path(document["text_path"]))
+            if memory_map is None:
+                continue
+
+            with memory_map:
+                for start, end in _passage_bounds(data=memory_map, passage_bytes=self._passage_bytes):
+
+                    terms = Counter(tokenize(memory_map[start:end].decode("utf-8", errors="replace")))
+                    length = sum(terms.values())
+                    if length == 0:
+                        continue
+
+                    passage = len(passages) // 4
+                    passages.extend((number, start, end, length))
+                    for term, frequency in terms.items():
+                        postings.setdefault(term, []).append((passage, frequency))
+
+                    document["passages"] += 1
+                    document["length"] += length
+
+        # Step 2: Lay the postings out term by term, and record where each term starts.
+        flat = array("I")
+        terms = {}
+        for term in sorted(postings):
+            terms[term] = (len(flat) // 2, len(postings[term]))
+            for passage, frequency in postings[term]:
+                flat.extend((passage, frequency))
+
+        # Step 3: Write the binary files first, the term dictionary makes the segment complete.
+        _write_atomic(path=self._path.joinpath(f"{name}.postings"), data=flat.tobytes())
+        _write_atomic(path=self._path.joinpath(f"{name}.passages"), data=passages.tobytes())
+        _write_atomic(
+            path=self._path.joinpath(f"{name}.terms.json"),
+            data=json.dumps(terms, separators=(",", ":")).encode("utf-8")
+        )
+
+        return len(passages) // 4
+
+    def add_files(self, files: Iterable[File]) -> dict:
+        """Indexes the files that are new or changed, as a new segment.
+
+        ### Parameters:
+        ----
+        files: Iterable[File]
+            The files to index. Files whose content is already indexed
+            are skipped, so calling this on a whole collection is cheap.
+
+        ### Returns:
+        ----
+        dict :
+            The number of files added, replaced and skipped, and the
+            number of passages written.
+        """
+
+        with self._lock:
+
+            manifest = copy.deepcopy(self._manifest)
+            live = {
+                document["path"]: document for document in manifest["documents"]
+                if document["live"]
+            }
+
+            # Step 1: Work out which files are new or changed.
+            report = {"added": 0, "replaced": 0, "skipped": 0, "passages": 0, "segment": None}
+            documents = []
+
+            for file in files:
+
+                path = file._path.as_posix()
+                digest, text_path = _text_path(file=file, output_dir=self._text_dir.as_posix())
+                current = live.get(path, None)
+
+                if current is not None and current["digest"] == digest:
+                    report["skipped"] += 1
+                    continue
+
+                if current is not None:
+                    current["live"] = False
+                    report["replaced"] += 1
+                else:
+                    report["added"] += 1
+
+                document = {
+                    "name": file.name,
+                    "path": path,
+                    "digest": digest,
+                    "text_path": text_path.as_posix(),
+                    "live": True
+                }
+                documents.append((len(manifest["documents"]), document))
+                manifest["documents"].append(document)
+                live[path] = document
+
+            if not documents:
+                return report
+
+            # Step 2: Write the segment, then commit it through the manifest.
+            name = f"segment_{manifest['next_segment']:06d}"
+            report["segment"] = name
+            report["passages"] = self._write_segment(name=name, documents=documents)
+
+            manifest["next_segment"] += 1
+            manifest["segments"].append(name)
+            self._write_manifest(manifest=manifest)
+
+            segment = _Segment(folder=self._path, name=name)
+            with self._view_lock:
+                self._manifest = manifest
+                self._segments = self._segments + [segment]
+
+        logging.info(
+            f"Indexed {report['added'] + report['replaced']} files into {name}: "
+            f"{report['passages']} passages."
+        )
+
+        # Step 3: Fold replaced documents out once they make up too much of the index.
+        if self._compact_ratio is not None and self.dead_ratio > self._compact_ratio:
+            self.compact()
+
+        return report
+
+    def _acquire_view(self) -> tuple:
+        """Returns the current manifest and segments, and keeps the segments open until released."""
+
+        with self._view_lock:
+            for segment in self._segments:
+                segment.acquire()
+            return self._manifest, self._segments
+
+    def _release_view(self, segments: list) -> None:
+        """Ends a read of the segments, removing the ones compacted away meanwhile."""
+
+        with self._view_lock:
+            for segment in segments:
+                segment.release()
+
+    def search(self, query: str, top_k: int = 5) -> list:
+        """Returns the passages that best match a query, by BM25 score.
+
+        ### Parameters:
+        ----
+        query: str
+            The question or keywords to search for.
+
+        top_k: int (optional, default=5)
+            The most passages to return.
+
+        ### Returns:
+        ----
+        list :
+            The passages, best first, with the document name, the byte
+            offsets, the score and the text of each.
+        """
+
+        if top_k < 1:
+            raise ValueError("top_k must be at least 1.")
+
+        with default_metrics().timer("finbrain_search_seconds"):
+
+            # Take a consistent view, `add_files` swaps these out rather than changing them.
+            manifest, segments = self._acquire_view()
+            try:
+                return self._search(query=query, top_k=top_k, manifest=manifest, segments=segments)
+            finally:
+                self._release_view(segments=segments)
+
+    def _search(self, query: str, top_k: int, manifest: dict, segments: list) -> list:
+        """Scores the passages of one view of the index, see `search`.
+
+        ### Parameters:
+        ----
+        query: str
+            The question or keywords to search for.
+
+        top_k: int
+            The most passages to return.
+
+        manifest: dict
+            The manifest of the view.
+
+        segments: list
+            The segments of the view, kept open by the caller.
+
+        ### Returns:
+        ----
+        list :
+            The passages, best first.
+        """
+
+        documents = manifest["documents"]
+        live = [document["live"] for document in documents]
+        passage_count = sum(document["passages"] for document in documents if document["live"])
+        total_length = sum(document["length"] for document in documents if document["live"])
+
+        terms = set(tokenize(query))
+        if not terms or passage_count == 0:
+            return []
+
+        average_length = total_length / passage_count
+        k1 = self._k1
+        b = self._b
+
+        # Step 1: Accumulate the BM25 score of every passage that holds a query term.
+        scores = {}
+        for term in terms:
+
+            # Passages of replaced documents still count here, until `compact_ratio` triggers a compaction.
+            frequency = sum(segment.document_frequency(term) for segment in segments)
+            if frequency == 0:
+                continue
+            idf = math.log(1 + (passage_count - frequency + 0.5) / (frequency + 0.5))
+
+            for number, segment in enumerate(segments):
+                postings = segment.postings(term)
+                passages = segment.passages
+                for index in range(0, len(postings), 2):
+                    passage = postings[index]
+                    if not live[passages[passage * 4]]:
+                        continue
+                    term_frequency = postings[index + 1]
+                    norm = k1 * (1 - b + b * passages[passage * 4 + 3] / average_length)
+                    key = (number, passage)
+                    scores[key] = scores.get(key, 0.0) + idf * term_frequency * (k1 + 1) / (term_frequency + norm)
+
+        # Step 2: Keep the best passages and read their text.
+        results = []
+        for (number, passage), score in heapq.nlargest(top_k, scores.items(), key=lambda item: item[1]):
+
+            document, start, end, _ = segments[number].passage(passage)
+            document = documents[document]
+
+            with open(file=document["text_path"], mode="rb") as file:
+                file.seek(start)
+                text = file.read(end - start).decode("utf-8", errors="replace")
+
+            results.append({
+                "document": document["name"],
+                "path": document["path"],
+                "digest": document["digest"],
+                "start": start,
+                "end": end,
+                "score": score,
+                "text": text.strip()
+            })
+
+        return results
+
+    def compact(self) -> None:
+        """Rewrites the index as a single segment, dropping replaced documents."""
+
+        with self._lock:
+
+            manifest = copy.deepcopy(self._manifest)
+            documents = [document for document in manifest["documents"] if document["live"]]
+
+            name = f"segment_{manifest['next_segment']:06d}"
+            self._write_segment(name=name, documents=list(enumerate(documents)))
+
+            manifest["next_segment"] += 1
+            manifest["segments"] = [name]
+            manifest["documents"] = documents
+            self._write_manifest(manifest=manifest)
+
+            # Searches in flight may still read the old segments, they are removed when the last one ends.
+            segment = _Segment(folder=self._path, name=name)
+            with self._view_lock:
+                old_segments = self._segments
+                self._manifest = manifest
+                self._segments = [segment]
+                for old_segment in old_segments:
+                    old_segment.retire()
+
+        logging.info(f"Compacted the index into {name}: {len(documents)} documents.")
+
+    def close(self) -> None:
+        """Releases the memory maps of every segment."""
+
+        with self._lock, self._view_lock:
+            for segment in self._segments:
+                segment.close()
+            self._segments = []
+
+    def __enter__(self) -> "SearchIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
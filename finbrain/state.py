@@ -0,0 +1,258 @@
+"""This module contains the StateStore class."""
+
+import os
+import json
+import pathlib
+import logging
+import threading
+
+
+class StateStore:
+
+    """A crash-safe store for the assistant state.
+
+    ### Overview:
+    ----
+    The state lives in a JSON snapshot, `state.json`, plus an append-only
+    journal next to it, `state.json.journal`. Every change is appended to
+    the journal as a single line, so saving one file costs O(1) no matter
+    how many files are tracked. The journal is folded back into the
+    snapshot by `compact`, which writes a temporary file and renames it
+    over the snapshot, so a crash never leaves a half written state file.
+    """
+
+    def __init__(self, path: str, compact_every: int = 1000) -> None:
+        """Initializes the StateStore object.
+
+        ### Parameters:
+        ----
+        path: str
+            The path to the JSON snapshot.
+
+        compact_every: int (optional, default=1000)
+            The number of journal entries after which `flush` also
+            compacts the journal into the snapshot.
+        """
+
+        self._path = pathlib.Path(path)
+        self._journal_path = self._path.with_name(self._path.name + ".journal")
+        self._compact_every = compact_every
+        self._lock = threading.RLock()
+        self._journal = None
+        self._journal_length = 0
+        self._values = {}
+        self._files = {}
+
+    @property
+    def path(self) -> pathlib.Path:
+        """Returns the path to the JSON snapshot."""
+        return self._path
+
+    @property
+    def journal_path(self) -> pathlib.Path:
+        """Returns the path to the journal."""
+        return self._journal_path
+
+    @property
+    def journal_length(self) -> int:
+        """Returns the number of entries in the journal."""
+        return self._journal_length
+
+    @property
+    def state(self) -> dict:
+        """Returns the current state, with the journal applied."""
+
+        with self._lock:
+            state = dict(self._values)
+            state["files"] = list(self._files.values())
+
+        return state
+
+    def load(self) -> dict:
+        """Loads the snapshot and replays the journal on top of it.
+
+        ### Returns:
+        ----
+        dict :
+            The current state.
+        """
+
+        with self._lock:
+
+            with open(file=self._path, mode="r", encoding="utf-8") as file:
+                snapshot = json.load(file)
+
+            self._files = {
+                file["path"]: file for file in snapshot.pop("files", [])
+            }
+            self._values = snapshot
+            self._journal_length = 0
+
+            if self._journal_path.exists():
+                with open(file=self._journal_path, mode="r", encoding="utf-8") as journal:
+                    for line in journal:
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            # A kill mid-write can leave one partial line at the end.
+                            logging.warning("Skipping a partial state journal entry.")
+                            continue
+                        self._apply(entry=entry)
+                        self._journal_length += 1
+
+                logging.info(
+                    f"Replayed {self._journal_length} state journal entries."
+                )
+
+        return self.state
+
+    def _apply(self, entry: dict) -> None:
+        """Applies a single journal entry to the in-memory state."""
+
+        op = entry["op"]
+
+        if op == "set":
+            self._values[entry["key"]] = entry["value"]
+        elif op == "upsert_file":
+            self._files[entry["file"]["path"]] = entry["file"]
+        elif op == "remove_file":
+            self._files.pop(entry["path"], None)
+        else:
+            raise ValueError(f"Unknown state journal operation: {op}")
+
+    def _append(self, entry: dict) -> None:
+        """Applies an entry and appends it to the journal."""
+
+        with self._lock:
+
+            self._apply(entry=entry)
+
+            if self._journal is None:
+                self._journal = self._open_journal()
+
+            # Hand the line to the OS right away, so it survives the process being killed.
+            self._journal.write(json.dumps(entry) + "\n")
+            self._journal.flush()
+            self._journal_length += 1
+
+    def _open_journal(self):
+        """Opens the journal for appending, sealing off any partial last line."""
+
+        partial = False
+
+        if self._journal_path.exists() and self._journal_path.stat().st_size > 0:
+            with open(file=self._journal_path, mode="rb") as journal:
+                journal.seek(-1, os.SEEK_END)
+                partial = journal.read(1) != b"\n"
+
+        journal = open(file=self._journal_path, mode="a", encoding="utf-8")
+
+        # Keep a partial line from swallowing the next entry, replay skips it.
+        if partial:
+            journal.write("\n")
+
+        return journal
+
+    def get(self, key: str, default=None):
+        """Returns a top level value of the state.
+
+        ### Parameters:
+        ----
+        key: str
+            The key of the value.
+
+        default: Any (optional, default=None)
+            The value returned when the key is missing.
+        """
+
+        if key == "files":
+            return self.state["files"]
+
+        return self._values.get(key, default)
+
+    def set(self, key: str, value) -> None:
+        """Sets a top level value of the state, if it changed.
+
+        ### Parameters:
+        ----
+        key: str
+            The key of the value.
+
+        value: Any
+            The new, JSON serializable, value.
+        """
+
+        if self._values.get(key, None) != value:
+            self._append(entry={"op": "set", "key": key, "value": value})
+
+    def upsert_file(self, file: dict) -> None:
+        """Adds or replaces a file record, keyed by its path.
+
+        ### Parameters:
+        ----
+        file: dict
+            The file record, as returned by `File.to_dict`.
+        """
+
+        if self._files.get(file["path"], None) != file:
+            self._append(entry={"op": "upsert_file", "file": file})
+
+    def remove_file(self, path: str) -> None:
+        """Removes a file record.
+
+        ### Parameters:
+        ----
+        path: str
+            The path of the file to remove.
+        """
+
+        if path in self._files:
+            self._append(entry={"op": "remove_file", "path": path})
+
+    def flush(self) -> None:
+        """Forces the journal to disk, compacting it if it has grown too long."""
+
+        with self._lock:
+
+            if self._journal is not None:
+                self._journal.flush()
+                os.fsync(self._journal.fileno())
+
+            if self._journal_length >= self._compact_every:
+                self.compact()
+
+    def compact(self) -> None:
+        """Writes the full state to the snapshot and empties the journal."""
+
+        with self._lock:
+
+            temp_path = self._path.with_name(self._path.name + ".tmp")
+
+            with open(file=temp_path, mode="w+", encoding="utf-8") as file:
+                json.dump(self.state, file, indent=4)
+                file.flush()
+                os.fsync(file.fileno())
+
+            os.replace(temp_path, self._path)
+
+            # Only drop the journal once the snapshot that replaces it is in place.
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+            if self._journal_path.exists():
+                self._journal_path.unlink()
+
+            self._journal_length = 0
+
+            logging.info(f"State file compacted: {self._path.name}")
+
+    def close(self) -> None:
+        """Closes the journal without compacting it."""
+
+        with self._lock:
+            if self._journal is not None:
+                self._journal.flush()
+                os.fsync(self._journal.fileno())
+                self._journal.close()
+                self._journal = None
@@ -1,12 +1,309 @@
+from __future__ import annotations
+
+import time
+import queue
+import asyncio
+import random
 import logging
-from openai import OpenAI
-from openai.types.beta import Assistant
-from openai.types.beta.threads import Run
-from openai.types.beta.thread import Thread as ThreadType
-from openai.types.beta.threads import Message as MessageType
+import itertools
+import threading
+import collections
+from typing import Iterator
+from typing import AsyncIterator
+from typing import TYPE_CHECKING
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from finbrain.metrics import default_metrics
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+    from openai import AsyncOpenAI
+    from openai.types.beta import Assistant
+    from openai.types.beta.threads import Run
+    from openai.types.beta.thread import Thread as ThreadType
+    from openai.types.beta.threads import Message as MessageType
+
+# The run statuses that will not change without further action.
+TERMINAL_RUN_STATUSES = {
+    "completed",
+    "failed",
+    "cancelled",
+    "expired",
+    "incomplete",
+    "requires_action"
+}
+
+# The number of times the pool tries to create a thread before a waiting lease gets the error.
+REPLENISH_ATTEMPTS = 5
+
+
+def _record_run(run: Run) -> None:
+    """Records the outcome and token usage of a finished run."""
+
+    metrics = default_metrics()
+    metrics.increment("finbrain_runs_total", status=run.status)
+
+    usage = getattr(run, "usage", None)
+    if usage is not None:
+        metrics.observe("finbrain_run_prompt_tokens", usage.prompt_tokens)
+        metrics.observe("finbrain_run_completion_tokens", usage.completion_tokens)
+        metrics.increment("finbrain_tokens_total", usage.prompt_tokens, kind="prompt")
+        metrics.increment("finbrain_tokens_total", usage.completion_tokens, kind="completion")
+
+
+class _BaseThread:
+
+    """The run bookkeeping shared by `Thread` and `AsyncThread`.
+
+    ### Overview:
+    ----
+    Everything here works on the state of the thread and never calls the
+    API, so the blocking and the async thread build their requests and
+    read their results the same way.
+    """
+
+    def __init__(self, client) -> None:
+        """Initializes the state shared by both threads.
+
+        ### Parameters:
+        ----
+        client : OpenAI | AsyncOpenAI
+            The OpenAI client object.
+        """
+
+        self._client = client
+        self._thread = None
+        self._run = None
+        self._last_message = None
+        self._poll_count = 0
+        self._poll_wait = 0.0
+        self._cursor = None
+        self._recorded_run_id = None
+
+    @property
+    def assistant(self) -> Assistant:
+        """Returns the assistant ID of the thread."""
+        return self._assistant
+
+    @assistant.setter
+    def assistant(self, assistant: Assistant) -> None:
+        """Sets the assistant ID of the thread."""
+        self._assistant = assistant
+
+    @property
+    def run(self) -> Run:
+        """Returns the most recent run of the thread."""
+        return self._run
+
+    @property
+    def last_message(self) -> MessageType:
+        """Returns the final message of the last streamed run."""
+        return self._last_message
+
+    @property
+    def poll_count(self) -> int:
+        """Returns the number of status requests made by the last poll."""
+        return self._poll_count
+
+    @property
+    def poll_wait(self) -> float:
+        """Returns the seconds spent waiting by the last poll."""
+        return self._poll_wait
+
+    @property
+    def cursor(self) -> str:
+        """Returns the ID of the newest message returned by `new_messages`."""
+        return self._cursor
+
+    def _record_finished_run(self) -> None:
+        """Records the current run once it is finished, and only once.
+
+        `create_run`, `poll_run_status` and the stream can all see the same
+        finished run, so the id of the last recorded run is kept and a run
+        already counted is skipped.
+        """
+
+        if self._run is None or self._run.status not in TERMINAL_RUN_STATUSES:
+            return
+
+        if self._run.id == self._recorded_run_id:
+            return
+
+        self._recorded_run_id = self._run.id
+        _record_run(run=self._run)
+
+    def _message_params(self, role: str, message: str, attachment: list) -> dict:
+        """Checks a new message and returns the arguments that create it, see `add_message`."""
+
+        if role != 'user' and role != 'assistant':
+            raise ValueError("Role must be either 'user' or 'assistant'.")
+
+        default_metrics().observe("finbrain_message_bytes", len(message.encode("utf-8")))
+
+        params = {"thread_id": self._thread.id, "role": role, "content": message}
+        if attachment:
+            params["attachments"] = attachment
+
+        return params
 
+    def _run_params(self) -> dict:
+        """Returns the arguments that create a run of the assistant on the thread."""
+        return {
+            "thread_id": self._thread.id,
+            "assistant_id": self.assistant.id,
+            "truncation_strategy": {"type": "last_messages", "last_messages": 2}
+        }
 
-class Thread():
+    def _list_params(self, after: str, run_id: str, order: str, page_size: int) -> dict:
+        """Builds the arguments of a message list request, leaving out the unset ones.
+
+        ### Parameters:
+        ----
+        after : str
+            The message ID to start after, in the given order.
+
+        run_id : str
+            Only list the messages created by this run.
+
+        order : str
+            Either 'desc', newest first, or 'asc', oldest first.
+
+        page_size : int
+            The number of messages fetched per request, at most 100.
+
+        ### Returns:
+        ----
+        dict :
+            The keyword arguments for `messages.list`.
+        """
+
+        if order != "desc" and order != "asc":
+            raise ValueError("Order must be either 'desc' or 'asc'.")
+
+        params = {
+            "thread_id": self._thread.id,
+            "order": order,
+            "limit": max(1, min(page_size, 100))
+        }
+
+        if after:
+            params["after"] = after
+        if run_id:
+            params["run_id"] = run_id
+
+        return params
+
+    def _poll_delays(
+        self,
+        interval: float,
+        backoff: float,
+        jitter: float,
+        max_interval: float,
+        timeout: float
+    ) -> Iterator[float]:
+        """Yields how long to wait before each status request, until the run finishes.
+
+        ### Overview:
+        ----
+        The caller sleeps for each delay and retrieves the run, so the same
+        backoff serves `Thread` and `AsyncThread`. Once the run finishes or
+        the timeout is reached, the poll is recorded and the generator ends.
+        The arguments are the ones of `poll_run_status`.
+
+        ### Returns:
+        ----
+        Iterator[float] :
+            The number of seconds to wait before each request.
+        """
+
+        if self._run is None:
+            raise ValueError("No run to poll, call `create_run` first.")
+
+        self._poll_count = 0
+        self._poll_wait = 0.0
+
+        start = time.monotonic()
+        deadline = start + timeout
+
+        while self._run.status not in TERMINAL_RUN_STATUSES:
+
+            logging.info(
+                "Run status: %s for run %s",
+                self._run.status,
+                self._run.id
+            )
+
+            # Never sleep past the deadline.
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logging.warning(
+                    "Run %s did not finish within %s seconds.",
+                    self._run.id,
+                    timeout
+                )
+                break
+
+            delay = interval * (1 + random.uniform(-jitter, jitter))
+            yield min(max(delay, 0.0), remaining)
+            self._poll_count += 1
+
+            interval = min(interval * backoff, max_interval)
+
+        self._poll_wait = time.monotonic() - start
+
+        metrics = default_metrics()
+        metrics.observe("finbrain_poll_seconds", self._poll_wait, status=self._run.status)
+        metrics.observe("finbrain_polls", self._poll_count)
+
+        self._record_finished_run()
+
+    def _parse_stream_event(self, event) -> Iterator[dict]:
+        """Converts a raw assistant stream event into event dictionaries.
+
+        ### Parameters:
+        ----
+        event : AssistantStreamEvent
+            The event sent by the OpenAI API.
+
+        ### Returns:
+        ----
+        Iterator[dict] :
+            Zero or more event dictionaries.
+        """
+
+        if event.event == "thread.run.created":
+            self._run = event.data
+            yield {"type": "run_created", "run_id": event.data.id}
+
+        elif event.event == "thread.message.delta":
+            for content in event.data.delta.content or []:
+                if content.type == "text" and content.text and content.text.value:
+                    yield {"type": "text_delta", "value": content.text.value}
+
+        elif event.event == "thread.run.step.delta":
+            step_details = event.data.delta.step_details
+            if step_details is not None and step_details.type == "tool_calls":
+                for tool_call in step_details.tool_calls or []:
+                    yield {"type": "tool_call", "tool": tool_call.type}
+
+        elif event.event == "thread.message.completed":
+            self._last_message = event.data
+
+        elif event.event in {
+            "thread.run.completed",
+            "thread.run.failed",
+            "thread.run.cancelled",
+            "thread.run.expired",
+            "thread.run.incomplete",
+            "thread.run.requires_action"
+        }:
+            self._run = event.data
+            self._record_finished_run()
+            yield {"type": "run_finished", "status": event.data.status}
+
+
+class Thread(_BaseThread):
 
     """A class to represent a thread."""
 
@@ -23,7 +320,7 @@ class Thread():
             a new thread will be created.
         """
 
-        self._client = client
+        super().__init__(client=client)
 
         if thread_id:
             logging.info(f"Retrieving thread with ID: {thread_id}")
@@ -32,16 +329,6 @@ class Thread():
             logging.info("Creating a new thread.")
             self._thread = self.create()
 
-    @property
-    def assistant(self) -> Assistant:
-        """Returns the assistant ID of the thread."""
-        return self._assistant
-
-    @assistant.setter
-    def assistant(self, assistant: Assistant) -> None:
-        """Sets the assistant ID of the thread."""
-        self._assistant = assistant
-
     def create(self) -> ThreadType:
         """Creates a new thread."""
         return self._client.beta.threads.create()
@@ -80,7 +367,8 @@ class Thread():
             The message to add to the thread.
 
         attachment : list
-            A list of attachments to add to the message.
+            A list of attachments to add to the message. Leave it empty when
+            the files are already in a vector store attached to the assistant.
 
         ### Returns:
         ----
@@ -88,27 +376,22 @@ class Thread():
             The message that was added to the thread.
         """
 
-        if role != 'user' and role != 'assistant':
-            raise ValueError("Role must be either 'user' or 'assistant'.")
+        params = self._message_params(role=role, message=message, attachment=attachment)
 
-        if attachment != {}:
-            new_message = self._client.beta.threads.messages.create(
-                thread_id=self._thread.id,
-                role=role,
-                content=message,
-                attachments=attachment
-            )
-        else:
-            new_message = self._client.beta.threads.messages.create(
-                thread_id=self._thread.id,
-                role=role,
-                content=message
-            )
+        with default_metrics().timer("finbrain_message_create_seconds"):
+            new_message = self._client.beta.threads.messages.create(**params)
 
         return new_message
 
-    def create_run(self) -> Run:
-        """Creates a new thread and polls the run.
+    def create_run(self, poll: bool = True) -> Run:
+        """Creates a new run on the thread.
+
+        ### Parameters:
+        ----
+        poll : bool (optional, default=True)
+            If True, the run is polled by the SDK until it finishes. If
+            False, the run is returned as soon as it is created, so it can
+            be tracked with `poll_run_status`.
 
         ### Returns:
         ----
@@ -116,45 +399,805 @@ class Thread():
             The run object that was created.
         """
 
-        self._run = self._client.beta.threads.runs.create_and_poll(
-            thread_id=self._thread.id,
-            assistant_id=self.assistant.id,
-            truncation_strategy={"type": "last_messages", "last_messages": 2}
-        )
+        # With polling, this times the whole run, otherwise only its creation.
+        with default_metrics().timer("finbrain_run_seconds", polled=poll) as labels:
+            runs = self._client.beta.threads.runs
+            create = runs.create_and_poll if poll else runs.create
+            self._run = create(**self._run_params())
+            labels["status"] = self._run.status
+
+        self._record_finished_run()
 
         return self._run
 
-    def poll_run_status(self) -> str:
-        """Polls the run to grab the status.
+    def poll_run_status(
+        self,
+        interval: float = 0.5,
+        backoff: float = 1.5,
+        jitter: float = 0.1,
+        max_interval: float = 8.0,
+        timeout: float = 300.0
+    ) -> str:
+        """Polls the run until it reaches a terminal status or times out.
+
+        ### Parameters:
+        ----
+        interval : float (optional, default=0.5)
+            The number of seconds to wait before the first status request.
+
+        backoff : float (optional, default=1.5)
+            The factor the interval is multiplied by after each request.
+
+        jitter : float (optional, default=0.1)
+            The fraction of the interval that is randomly added or removed
+            from each wait, so parallel runs do not poll in lockstep.
+
+        max_interval : float (optional, default=8.0)
+            The longest the poller will wait between two requests.
+
+        timeout : float (optional, default=300.0)
+            The wall-clock number of seconds to poll for before giving up.
 
         ### Returns:
         ----
         str :
-            The status of the run.
+            The status of the run. If the timeout is reached, the last
+            status that was seen is returned.
         """
 
-        time_waiting = 0
+        metrics = default_metrics()
 
-        while self._run.status != "completed" and time_waiting < 60:
-            logging.info(
-                "Run status: %s for run %s",
-                self._run.status,
-                self._run.id
+        for delay in self._poll_delays(interval, backoff, jitter, max_interval, timeout):
+
+            time.sleep(delay)
+
+            with metrics.timer("finbrain_poll_request_seconds"):
+                self._run = self._client.beta.threads.runs.retrieve(
+                    thread_id=self._thread.id,
+                    run_id=self._run.id
+                )
+
+        return self._run.status
+
+    def iter_messages(
+        self,
+        after: str = None,
+        run_id: str = None,
+        order: str = "desc",
+        page_size: int = 100
+    ) -> Iterator[MessageType]:
+        """Lazily iterates over the messages in the thread.
+
+        ### Overview:
+        ----
+        Pages are only requested as the iterator reaches them, so stopping
+        early, for example after the first assistant reply, never pages
+        through the rest of the history.
+
+        ### Parameters:
+        ----
+        after : str (optional, default=None)
+            A message ID. Only the messages that come after it, in the
+            given order, are returned.
+
+        run_id : str (optional, default=None)
+            Only return the messages created by this run.
+
+        order : str (optional, default="desc")
+            Either 'desc', newest first, or 'asc', oldest first.
+
+        page_size : int (optional, default=100)
+            The number of messages fetched per request, at most 100.
+
+        ### Returns:
+        ----
+        Iterator[Message] :
+            A generator of messages.
+        """
+
+        yield from self._client.beta.threads.messages.list(
+            **self._list_params(after=after, run_id=run_id, order=order, page_size=page_size)
+        )
+
+    def grab_messages(
+        self,
+        after: str = None,
+        run_id: str = None,
+        limit: int = None,
+        order: str = "desc"
+    ) -> list:
+        """Returns a list of messages in the thread.
+
+        ### Parameters:
+        ----
+        after : str (optional, default=None)
+            A message ID. Only the messages that come after it, in the
+            given order, are returned.
+
+        run_id : str (optional, default=None)
+            Only return the messages created by this run.
+
+        limit : int (optional, default=None)
+            The most messages to return. If not provided, every matching
+            message is returned.
+
+        order : str (optional, default="desc")
+            Either 'desc', newest first, or 'asc', oldest first.
+
+        ### Returns:
+        ----
+        list :
+            The messages, in the given order.
+        """
+
+        messages = self.iter_messages(
+            after=after,
+            run_id=run_id,
+            order=order,
+            page_size=limit or 100
+        )
+
+        if limit is None:
+            return list(messages)
+
+        return list(itertools.islice(messages, limit))
+
+    def latest_reply(self, run_id: str = None) -> MessageType:
+        """Returns the newest assistant message of a run, fetching a single message.
+
+        ### Parameters:
+        ----
+        run_id : str (optional, default=None)
+            The ID of the run. If not provided, the most recent run of the
+            thread is used.
+
+        ### Returns:
+        ----
+        Message :
+            The newest assistant message of the run, or None if it has none.
+        """
+
+        run_id = run_id or (self._run.id if self._run is not None else None)
+
+        if run_id is None:
+            raise ValueError("No run to read the reply of, call `create_run` first.")
+
+        return next(
+            (
+                msg for msg in self.iter_messages(run_id=run_id, page_size=1)
+                if msg.role == "assistant"
+            ),
+            None
+        )
+
+    def new_messages(self, limit: int = None) -> list:
+        """Returns the messages added since the last call, oldest first.
+
+        ### Overview:
+        ----
+        The thread keeps the ID of the newest message it has returned, so
+        each call only fetches what is new, no matter how long the thread
+        has grown. The first call returns every message.
+
+        ### Parameters:
+        ----
+        limit : int (optional, default=None)
+            The most messages to return. The rest are returned by the next
+            call.
+
+        ### Returns:
+        ----
+        list :
+            The new messages, oldest first.
+        """
+
+        messages = self.grab_messages(after=self._cursor, limit=limit, order="asc")
+
+        if messages:
+            self._cursor = messages[-1].id
+
+        return messages
+
+    def stream_run(self) -> Iterator[dict]:
+        """Creates a new run and yields its events as they arrive.
+
+        ### Overview:
+        ----
+        Each event is a dictionary with a `type` key. Text arrives as
+        `text_delta` events, tool activity as `tool_call` events, and the
+        last event is a `message` event that carries the final assistant
+        message, so there is no need to call `grab_messages` afterwards.
+        The final message is also the return value of the generator and
+        is stored in `last_message`.
+
+        ### Returns:
+        ----
+        Iterator[dict] :
+            A generator of event dictionaries.
+
+        ### Usage:
+        ----
+            >>> for event in assistant.thread.stream_run():
+            ...     if event["type"] == "text_delta":
+            ...         print(event["value"], end="", flush=True)
+        """
+
+        self._last_message = None
+
+        with self._client.beta.threads.runs.stream(**self._run_params()) as stream:
+            for event in stream:
+                yield from self._parse_stream_event(event=event)
+
+        if self._last_message is not None:
+            yield {"type": "message", "message": self._last_message}
+
+        return self._last_message
+
+    async def astream_run(self) -> AsyncIterator[dict]:
+        """Creates a new run and yields its events from a running event loop.
+
+        ### Overview:
+        ----
+        The synchronous stream is consumed on a worker thread and its
+        events are handed to the event loop as they arrive, so the loop
+        is never blocked while waiting on the network.
+
+        ### Returns:
+        ----
+        AsyncIterator[dict] :
+            An async generator of the same events as `stream_run`.
+        """
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        done = object()
+        stop = threading.Event()
+
+        def _pump() -> None:
+            events = self.stream_run()
+            try:
+                for event in events:
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, event)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                # Closing the generator exits the `with` block, which closes the stream.
+                events.close()
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        threading.Thread(target=_pump, daemon=True).start()
+
+        # If the consumer stops early or is cancelled, tell the worker to close the stream.
+        try:
+            while True:
+                event = await queue.get()
+                if event is done:
+                    break
+                if isinstance(event, Exception):
+                    raise event
+                yield event
+        finally:
+            stop.set()
+
+
+class ThreadPool():
+
+    """A pool of warm threads that are leased out one document at a time.
+
+    ### Overview:
+    ----
+    Reusing a thread means clearing it first, which lists every message
+    and deletes them one by one. Instead, the pool keeps `size` threads
+    created ahead of time. A document leases one, and when the lease is
+    returned the used thread is swapped for a fresh one in the background,
+    so neither the create nor the delete is ever on the critical path.
+    """
+
+    def __init__(self, client: OpenAI, size: int = 4, assistant: Assistant = None) -> None:
+        """Initializes the `ThreadPool` object and warms up its threads.
+
+        ### Parameters:
+        ----
+        client : OpenAI
+            The OpenAI client object.
+
+        size : int (optional, default=4)
+            The number of warm threads kept in the pool. Use the same
+            number as the concurrency of the work leasing them.
+
+        assistant : Assistant (optional, default=None)
+            The assistant every leased thread runs with.
+
+        ### Usage:
+        ----
+            >>> from finbrain.thread import ThreadPool
+            >>> with ThreadPool(client=client, size=8, assistant=assistant) as pool:
+            ...     with pool.lease() as thread:
+            ...         thread.add_message(role="user", message="Summarize the filing.")
+            ...         thread.create_run()
+            ...     pool.stats
+        """
+
+        if size < 1:
+            raise ValueError("size must be at least 1.")
+
+        self._client = client
+        self._size = size
+        self._assistant = assistant
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # Lease statistics, the waits of the most recent leases are kept for percentiles.
+        self._leases = 0
+        self._recycled = 0
+        self._recycle_errors = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._waits = collections.deque(maxlen=1000)
+
+        # Step 1: Create the warm threads concurrently, they are recycled by the same workers.
+        self._executor = ThreadPoolExecutor(
+            max_workers=size,
+            thread_name_prefix="finbrain-thread-pool"
+        )
+        for _ in range(size):
+            self._executor.submit(self._replenish)
+
+    def __enter__(self) -> "ThreadPool":
+        """Returns the pool itself."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """Closes the pool."""
+        self.close()
+
+    @property
+    def assistant(self) -> Assistant:
+        """Returns the assistant every leased thread runs with."""
+        return self._assistant
+
+    @assistant.setter
+    def assistant(self, assistant: Assistant) -> None:
+        """Sets the assistant every leased thread runs with."""
+        self._assistant = assistant
+
+    @property
+    def size(self) -> int:
+        """Returns the number of warm threads kept in the pool."""
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        """Returns the number of threads ready to be leased."""
+        return self._idle.qsize()
+
+    @property
+    def stats(self) -> dict:
+        """Returns the number of leases and recycles, and how long leases waited."""
+
+        with self._lock:
+            waits = sorted(self._waits)
+            leases = self._leases
+
+            return {
+                "leases": leases,
+                "recycled": self._recycled,
+                "recycle_errors": self._recycle_errors,
+                "idle": self._idle.qsize(),
+                "mean_wait": self._total_wait / leases if leases else 0.0,
+                "p50_wait": waits[len(waits) // 2] if waits else 0.0,
+                "p95_wait": waits[int(len(waits) * 0.95)] if waits else 0.0,
+                "max_wait": self._max_wait
+            }
+
+    def _replenish(self) -> None:
+        """Creates a fresh thread and makes it available for leasing.
+
+        ### Overview:
+        ----
+        A short outage is retried, so it does not shrink the pool for good.
+        After `REPLENISH_ATTEMPTS` failures the last error takes the place
+        of the thread, and the lease that receives it raises it and
+        retries the slot, so a waiting lease never blocks forever.
+        """
+
+        error = None
+
+        for attempt in range(REPLENISH_ATTEMPTS):
+
+            if self._closed:
+                return
+
+            if attempt:
+                time.sleep(1.0)
+
+            try:
+                thread = Thread(client=self._client)
+            except Exception as e:
+                with self._lock:
+                    self._recycle_errors += 1
+                logging.error(f"Could not create a thread for the pool: {e}")
+                error = e
+                continue
+
+            self._idle.put(thread)
+            return
+
+        self._idle.put(error)
+
+    def _recycle(self, thread: Thread) -> None:
+        """Swaps a used thread for a fresh one, deleting the used one afterwards."""
+
+        self._replenish()
+        self._discard(thread=thread)
+
+        with self._lock:
+            self._recycled += 1
+
+    def _discard(self, thread: Thread) -> None:
+        """Deletes a pooled thread, a failure only leaves an unused thread behind."""
+
+        try:
+            thread.delete()
+        except Exception as e:
+            logging.warning(f"Could not delete pooled thread {thread._thread.id}: {e}")
+
+    @contextmanager
+    def lease(self, timeout: float = None) -> Iterator[Thread]:
+        """Leases a warm thread for the duration of the `with` block.
+
+        ### Parameters:
+        ----
+        timeout : float (optional, default=None)
+            The most seconds to wait for a thread. If not provided, waits
+            until one is available.
+
+        ### Returns:
+        ----
+        Iterator[Thread] :
+            A context manager that yields a thread with no messages.
+
+        ### Raises:
+        ----
+        TimeoutError:
+            If no thread became available within the timeout.
+
+        RuntimeError:
+            If the pool could not create a thread after `REPLENISH_ATTEMPTS` tries.
+        """
+
+        if self._closed:
+            raise ValueError("The thread pool is closed.")
+
+        start = time.monotonic()
+
+        try:
+            thread = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No thread became available within {timeout} seconds.")
+
+        # The slot failed to replenish, retry it and hand the error to this lease.
+        if isinstance(thread, Exception):
+            if not self._closed:
+                self._executor.submit(self._replenish)
+            raise RuntimeError(f"Could not create a thread for the pool: {thread}") from thread
+
+        wait = time.monotonic() - start
+
+        with self._lock:
+            self._leases += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            self._waits.append(wait)
+
+        thread.assistant = self._assistant
+
+        try:
+            yield thread
+        finally:
+            if self._closed:
+                self._discard(thread=thread)
+            else:
+                self._executor.submit(self._recycle, thread)
+
+    def close(self) -> None:
+        """Waits for pending recycles and deletes the idle threads."""
+
+        self._closed = True
+        self._executor.shutdown(wait=True)
+
+        while True:
+            try:
+                thread = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(thread, Thread):
+                self._discard(thread=thread)
+
+
+class AsyncThread(_BaseThread):
+
+    """The `Thread` counterpart for an `AsyncOpenAI` client, every method that calls the API is a coroutine."""
+
+    def __init__(self, client: AsyncOpenAI, thread_id: str = "") -> None:
+        """Initializes the `AsyncThread` object.
+
+        ### Overview:
+        ----
+        Nothing is sent to the API until `initialize` is awaited, or the
+        object is built with `AsyncThread.open`. Every method that talks
+        to the API is a coroutine.
+
+        ### Parameters:
+        ----
+        client : AsyncOpenAI
+            The async OpenAI client object.
+
+        thread_id : str (optional, default="")
+            The ID of the thread to retrieve. If no ID is provided,
+            a new thread will be created.
+        """
+
+        super().__init__(client=client)
+        self._thread_id = thread_id
+
+    @classmethod
+    async def open(cls, client: AsyncOpenAI, thread_id: str = "") -> "AsyncThread":
+        """Creates the object and creates or retrieves its thread."""
+
+        thread = cls(client=client, thread_id=thread_id)
+        await thread.initialize()
+
+        return thread
+
+    async def initialize(self) -> ThreadType:
+        """Creates or retrieves the thread."""
+
+        if self._thread_id:
+            logging.info(f"Retrieving thread with ID: {self._thread_id}")
+            self._thread = await self.retrieve(thread_id=self._thread_id)
+        else:
+            logging.info("Creating a new thread.")
+            self._thread = await self.create()
+
+        return self._thread
+
+    async def create(self) -> ThreadType:
+        """Creates a new thread."""
+        return await self._client.beta.threads.create()
+
+    async def retrieve(self, thread_id: str) -> ThreadType:
+        """Retrieves a thread by ID."""
+        return await self._client.beta.threads.retrieve(thread_id)
+
+    async def delete(self) -> None:
+        """Deletes a thread."""
+        await self._client.beta.threads.delete(thread_id=self._thread.id)
+
+    async def clear_messages(self) -> None:
+        """Clears all messages in the thread, deleting them concurrently."""
+
+        all_messages = [
+            msg async for msg in self._client.beta.threads.messages.list(
+                thread_id=self._thread.id
             )
-            run = self._client.beta.threads.runs.poll(
+        ]
+
+        await asyncio.gather(*(
+            self._client.beta.threads.messages.delete(
                 thread_id=self._thread.id,
-                run_id=self._run.id
+                message_id=msg.id
             )
-            time_waiting += 1
+            for msg in all_messages
+        ))
+
+    async def add_message(self, role: str, message: str, attachment: list = []) -> MessageType:
+        """Adds a message to the thread.
+
+        ### Parameters:
+        ----
+        role : str
+            The role of the user. Must be either 'user' or 'assistant'.
+
+        message : str
+            The message to add to the thread.
+
+        attachment : list
+            A list of attachments to add to the message.
+
+        ### Returns:
+        ----
+        Message :
+            The message that was added to the thread.
+        """
+
+        params = self._message_params(role=role, message=message, attachment=attachment)
+
+        with default_metrics().timer("finbrain_message_create_seconds"):
+            return await self._client.beta.threads.messages.create(**params)
+
+    async def create_run(self, poll: bool = True) -> Run:
+        """Creates a new run on the thread.
+
+        ### Parameters:
+        ----
+        poll : bool (optional, default=True)
+            If True, the run is polled by the SDK until it finishes.
+
+        ### Returns:
+        ----
+        Run :
+            The run object that was created.
+        """
+
+        # With polling, this times the whole run, otherwise only its creation.
+        with default_metrics().timer("finbrain_run_seconds", polled=poll) as labels:
+            runs = self._client.beta.threads.runs
+            create = runs.create_and_poll if poll else runs.create
+            self._run = await create(**self._run_params())
+            labels["status"] = self._run.status
+
+        self._record_finished_run()
+
+        return self._run
+
+    async def poll_run_status(
+        self,
+        interval: float = 0.5,
+        backoff: float = 1.5,
+        jitter: float = 0.1,
+        max_interval: float = 8.0,
+        timeout: float = 300.0
+    ) -> str:
+        """Polls the run until it reaches a terminal status or times out.
+
+        ### Overview:
+        ----
+        Takes the same arguments as `Thread.poll_run_status`, but waits
+        with `asyncio.sleep`, so other runs keep going in the meantime.
+
+        ### Returns:
+        ----
+        str :
+            The status of the run.
+        """
+
+        metrics = default_metrics()
+
+        for delay in self._poll_delays(interval, backoff, jitter, max_interval, timeout):
+
+            await asyncio.sleep(delay)
+
+            with metrics.timer("finbrain_poll_request_seconds"):
+                self._run = await self._client.beta.threads.runs.retrieve(
+                    thread_id=self._thread.id,
+                    run_id=self._run.id
+                )
 
         return self._run.status
 
-    def grab_messages(self) -> list:
-        """Returns a list of messages in the thread."""
+    async def iter_messages(
+        self,
+        after: str = None,
+        run_id: str = None,
+        order: str = "desc",
+        page_size: int = 100
+    ) -> AsyncIterator[MessageType]:
+        """Lazily iterates over the messages in the thread.
 
-        msgs = self._client.beta.threads.messages.list(
-            thread_id=self._thread.id)
-        msgs = list(msgs)
+        ### Overview:
+        ----
+        Takes the same arguments as `Thread.iter_messages`.
+
+        ### Returns:
+        ----
+        AsyncIterator[Message] :
+            An async generator of messages.
+        """
+
+        async for msg in self._client.beta.threads.messages.list(
+            **self._list_params(after=after, run_id=run_id, order=order, page_size=page_size)
+        ):
+            yield msg
+
+    async def grab_messages(
+        self,
+        after: str = None,
+        run_id: str = None,
+        limit: int = None,
+        order: str = "desc"
+    ) -> list:
+        """Returns a list of messages in the thread.
+
+        ### Overview:
+        ----
+        Takes the same arguments as `Thread.grab_messages`.
+
+        ### Returns:
+        ----
+        list :
+            The messages, in the given order.
+        """
+
+        messages = []
+
+        async for msg in self.iter_messages(
+            after=after,
+            run_id=run_id,
+            order=order,
+            page_size=limit or 100
+        ):
+            if limit is not None and len(messages) >= limit:
+                break
+            messages.append(msg)
+
+        return messages
+
+    async def latest_reply(self, run_id: str = None) -> MessageType:
+        """Returns the newest assistant message of a run, fetching a single message.
+
+        ### Parameters:
+        ----
+        run_id : str (optional, default=None)
+            The ID of the run. If not provided, the most recent run of the
+            thread is used.
+
+        ### Returns:
+        ----
+        Message :
+            The newest assistant message of the run, or None if it has none.
+        """
+
+        run_id = run_id or (self._run.id if self._run is not None else None)
+
+        if run_id is None:
+            raise ValueError("No run to read the reply of, call `create_run` first.")
+
+        async for msg in self.iter_messages(run_id=run_id, page_size=1):
+            if msg.role == "assistant":
+                return msg
+
+        return None
+
+    async def new_messages(self, limit: int = None) -> list:
+        """Returns the messages added since the last call, oldest first.
+
+        ### Overview:
+        ----
+        Takes the same arguments as `Thread.new_messages`.
+
+        ### Returns:
+        ----
+        list :
+            The new messages, oldest first.
+        """
+
+        messages = await self.grab_messages(after=self._cursor, limit=limit, order="asc")
+
+        if messages:
+            self._cursor = messages[-1].id
+
+        return messages
+
+    async def stream_run(self) -> AsyncIterator[dict]:
+        """Creates a new run and yields its events as they arrive.
+
+        ### Returns:
+        ----
+        AsyncIterator[dict] :
+            An async generator of the same events as `Thread.stream_run`.
+        """
+
+        self._last_message = None
 
-        return msgs
+        async with self._client.beta.threads.runs.stream(**self._run_params()) as stream:
+            async for event in stream:
+                for parsed in self._parse_stream_event(event=event):
+                    yield parsed
 
+        if self._last_message is not None:
+            yield {"type": "message", "message": self._last_message}
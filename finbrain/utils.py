@@ -1,28 +1,301 @@
+from __future__ import annotations
+
+import os
+import re
 import json
+import time
+import asyncio
+import inspect
+import fnmatch
+import hashlib
+import threading
 import pathlib
 import logging
-from openai import OpenAI
+from typing import Iterator
+from typing import TYPE_CHECKING
+from contextlib import nullcontext
+from contextlib import contextmanager
+from html.parser import HTMLParser
+from concurrent.futures import as_completed
+from concurrent.futures import ThreadPoolExecutor
+
+from finbrain.metrics import default_metrics
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+    from openai import AsyncOpenAI
+
+# The size of the chunks used when hashing a file.
+CHUNK_SIZE = 1024 * 1024
+
+# The suffixes of the files that are converted from HTML to text.
+HTML_SUFFIXES = {".html", ".htm", ".xhtml"}
+
+
+def _hash_file(path: pathlib.Path) -> str:
+    """Computes the SHA-256 digest of a file without loading it into memory.
+
+    ### Parameters:
+    ----
+    path: pathlib.Path
+        The path to the file to hash.
+
+    ### Returns:
+    ----
+    str :
+        The hex digest of the file contents.
+    """
+
+    sha = hashlib.sha256()
+
+    with open(file=path, mode="rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            sha.update(chunk)
+
+    return sha.hexdigest()
+
+
+def _check_client(client, is_async: bool, counterpart: str) -> None:
+    """Raises when a client does not match the kind of call made with it.
+
+    ### Parameters:
+    ----
+    client: OpenAI | AsyncOpenAI
+        The client the call goes through.
+
+    is_async: bool
+        Whether the call awaits the client.
+
+    counterpart: str
+        The name of the method to use with the other kind of client.
+    """
+
+    if inspect.iscoroutinefunction(client.files.create) != is_async:
+        kind = "an AsyncOpenAI" if is_async else "an OpenAI"
+        raise ValueError(f"This call needs {kind} client, use `{counterpart}` instead.")
+
+
+class UploadCache:
+
+    """A persistent mapping of content digests to OpenAI file IDs."""
+
+    def __init__(self, path: str) -> None:
+        """Initializes the UploadCache object.
+
+        ### Parameters:
+        ----
+        path: str
+            The path to the JSON file that backs the cache. The file
+            is created the first time the cache is saved.
+
+        ### Usage:
+        ----
+            >>> from finbrain.utils import UploadCache
+            >>> cache = UploadCache(path="upload_cache.json")
+            >>> files = Files(client=client, upload_cache=cache)
+        """
+
+        self._path = pathlib.Path(path)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._digests_by_id = {}
+        self._batches = 0
+        self._dirty = False
+
+        if self._path.exists():
+            with open(file=self._path, mode="r", encoding="utf-8") as file:
+                self._entries = json.load(file)
+            for digest, file_id in self._entries.items():
+                self._digests_by_id.setdefault(file_id, set()).add(digest)
+            logging.info(f"Upload cache loaded: {self._path.name}")
+
+    def __len__(self) -> int:
+        """Returns the number of cached digests."""
+        return len(self._entries)
+
+    def __contains__(self, digest: str) -> bool:
+        """Returns whether a digest is in the cache."""
+        return digest in self._entries
+
+    def get(self, digest: str) -> str:
+        """Returns the file ID for a digest, or an empty string.
+
+        ### Parameters:
+        ----
+        digest: str
+            The content digest of the file.
+        """
+        return self._entries.get(digest, "")
+
+    def set(self, digest: str, file_id: str) -> None:
+        """Records the file ID for a digest and saves the cache.
+
+        ### Parameters:
+        ----
+        digest: str
+            The content digest of the file.
+
+        file_id: str
+            The ID of the uploaded file.
+        """
+
+        self.update(entries={digest: file_id})
+
+    def update(self, entries: dict) -> None:
+        """Records many file IDs at once, and saves the cache a single time.
+
+        ### Parameters:
+        ----
+        entries: dict
+            The file IDs, keyed by the content digest of each file.
+        """
+
+        if not entries:
+            return
+
+        with self._lock:
+            for digest, file_id in entries.items():
+                old_id = self._entries.get(digest, None)
+                if old_id is not None:
+                    self._digests_by_id.get(old_id, set()).discard(digest)
+                self._entries[digest] = file_id
+                self._digests_by_id.setdefault(file_id, set()).add(digest)
+            self._changed()
+
+    @contextmanager
+    def batch(self) -> Iterator["UploadCache"]:
+        """Holds back saving until the block ends, then saves once if anything changed.
+
+        ### Overview:
+        ----
+        Every change is otherwise written to disk at once. Parallel
+        uploads record their IDs inside a batch, so they never wait on
+        each other to rewrite the file. Batches can be nested.
+
+        ### Usage:
+        ----
+            >>> with cache.batch():
+            ...     files.upload_all(max_workers=8)
+        """
+
+        with self._lock:
+            self._batches += 1
+
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batches -= 1
+                if self._batches == 0 and self._dirty:
+                    self._save()
+
+    def discard(self, file_id: str) -> None:
+        """Removes every digest that points to a file ID.
+
+        ### Parameters:
+        ----
+        file_id: str
+            The ID of the file that was deleted.
+        """
+
+        with self._lock:
+            stale = self._digests_by_id.pop(file_id, set())
+            for digest in stale:
+                del self._entries[digest]
+            if stale:
+                self._changed()
+
+    def _changed(self) -> None:
+        """Saves the cache, unless a batch holds the save back, the caller holds the lock."""
+
+        if self._batches:
+            self._dirty = True
+        else:
+            self._save()
+
+    def _save(self) -> None:
+        """Writes the cache to disk, replacing the old file atomically."""
+
+        self._dirty = False
+
+        temp_path = self._path.with_name(self._path.name + ".tmp")
+
+        with open(file=temp_path, mode="w+", encoding="utf-8") as file:
+            json.dump(self._entries, file)
+
+        os.replace(temp_path, self._path)
 
 
 class File:
 
     """A class to represent a file."""
 
-    def __init__(self, path: str) -> None:
+    # Large collections hold tens of thousands of files, so skip the per-instance dict.
+    __slots__ = (
+        "_path",
+        "_is_uploaded",
+        "_file_id",
+        "_size",
+        "_size_checked",
+        "_creation_date",
+        "_upload_date",
+        "_client",
+        "_digest",
+        "_digest_key",
+        "_upload_cache",
+        "_upload_path",
+        "_upload_digest",
+        "_upload_digest_key",
+        "_observer",
+        "_entry"
+    )
+
+    def __init__(
+        self,
+        path: str,
+        entry: os.DirEntry = None,
+        size: int = None,
+        creation_date: float = None
+    ) -> None:
         """Initializes the File object.
 
+        ### Overview:
+        ----
+        The file is not touched on disk until its metadata is needed, so
+        creating thousands of `File` objects costs no system calls.
+
         ### Parameters:
         ----
         path : str
             The path to the file
+
+        entry : os.DirEntry (optional, default=None)
+            The directory entry the file was found with, its cached stat
+            result is reused instead of calling `stat()` again.
+
+        size : int (optional, default=None)
+            The known size of the file, for example from a state file.
+
+        creation_date : float (optional, default=None)
+            The known creation date of the file, for example from a state file.
         """
 
         self._path = pathlib.Path(path)
         self._is_uploaded = False
         self._file_id = ""
-        self._size = self._path.stat().st_size
-        self._creation_date = self._path.stat().st_ctime
+        self._entry = entry
+        self._size = size
+        self._size_checked = False
+        self._creation_date = creation_date
         self._upload_date = None
+        self._client = None
+        self._digest = ""
+        self._digest_key = None
+        self._upload_cache = None
+        self._upload_path = None
+        self._upload_digest = ""
+        self._upload_digest_key = None
+        self._observer = None
 
     @property
     def client(self) -> OpenAI:
@@ -40,6 +313,41 @@ class File:
         """Returns the name of the file."""
         return self._path.name
 
+    def _stat(self) -> os.stat_result:
+        """Returns the stat result of the file, reusing the directory entry if there is one."""
+
+        if self._entry is not None:
+            stat = self._entry.stat()
+            self._entry = None
+        else:
+            stat = self._path.stat()
+
+        # A size restored from a state file is only a hint, the real one always wins.
+        self._size = stat.st_size
+        self._size_checked = True
+        if self._creation_date is None:
+            self._creation_date = stat.st_ctime
+
+        return stat
+
+    @property
+    def size(self) -> int:
+        """Returns the size of the file in bytes, checked against the disk the first time."""
+
+        if not self._size_checked:
+            self._stat()
+
+        return self._size
+
+    @property
+    def creation_date(self) -> float:
+        """Returns the creation date of the file."""
+
+        if self._creation_date is None:
+            self._stat()
+
+        return self._creation_date
+
     @property
     def is_uploaded(self) -> bool:
         """Returns a boolean flag to indicate whether the file has been uploaded."""
@@ -50,29 +358,185 @@ class File:
         """Returns the ID of the file."""
         return self._file_id
 
-    def upload(self) -> None:
-        """Uploads the file to the OpenAI API."""
+    @property
+    def upload_cache(self) -> UploadCache:
+        """Returns the upload cache used by the file."""
+        return self._upload_cache
+
+    @upload_cache.setter
+    def upload_cache(self, upload_cache: UploadCache) -> None:
+        """Sets the upload cache used by the file."""
+        self._upload_cache = upload_cache
+
+    @property
+    def digest(self) -> str:
+        """Returns the SHA-256 digest of the file contents.
+
+        ### Overview:
+        ----
+        The digest is computed in chunks and cached against the size
+        and modification time of the file, so it is only recomputed
+        when the file changes on disk.
+        """
+
+        # The first time around, a stat result from the directory scan is good enough.
+        stat = self._stat()
+        key = (stat.st_size, stat.st_mtime_ns)
+
+        if self._digest_key != key:
+            self._digest = _hash_file(path=self._path)
+            self._digest_key = key
+
+        return self._digest
+
+    @property
+    def upload_path(self) -> pathlib.Path:
+        """Returns the path of the bytes that will be uploaded.
+
+        ### Overview:
+        ----
+        If the file has been preprocessed, this is the compact derivative,
+        otherwise it is the original file.
+        """
+        return self._upload_path or self._path
+
+    @property
+    def upload_digest(self) -> str:
+        """Returns the SHA-256 digest of the bytes that will be uploaded.
+
+        ### Overview:
+        ----
+        Like `digest`, it is cached against the path, size and
+        modification time of the derivative, so it is only recomputed
+        when the derivative changes.
+        """
+
+        if self._upload_path is None:
+            return self.digest
+
+        stat = self._upload_path.stat()
+        key = (self._upload_path, stat.st_size, stat.st_mtime_ns)
+
+        if self._upload_digest_key != key:
+            self._upload_digest = _hash_file(path=self._upload_path)
+            self._upload_digest_key = key
+
+        return self._upload_digest
+
+    def _notify(self) -> None:
+        """Tells the collection that owns the file that it has changed."""
+
+        if self._observer is not None:
+            self._observer(self)
+
+    def _skip_upload(self) -> bool:
+        """Checks whether the file, or the same bytes, have already been uploaded.
+
+        ### Returns:
+        ----
+        bool :
+            True if there is nothing left to upload.
+        """
 
         # Check if the file has already been uploaded.
         if self._is_uploaded:
             logging.info(f"File {self.name} has already been uploaded.")
-            return
+            return True
 
-        # Upload the file to the OpenAI API.
-        file_obj = self._client.files.create(
-            file=self._path,
-            purpose="assistants"
-        )
+        # Check if the same bytes have already been uploaded.
+        if self._upload_cache is not None:
+            file_id = self._upload_cache.get(self.upload_digest)
+            if file_id:
+                self._file_id = file_id
+                self._is_uploaded = True
+                logging.info(
+                    f"File {self.name} found in the upload cache as {file_id}."
+                )
+                self._notify()
+                return True
+
+        return False
+
+    def _upload_payload(self):
+        """Returns the file, or its preprocessed derivative, in the form the API expects."""
+
+        if self._upload_path is not None:
+            return (
+                self._path.stem + self._upload_path.suffix,
+                self._upload_path.read_bytes()
+            )
+
+        return self._path
+
+    def _mark_uploaded(self, file_obj) -> None:
+        """Records the result of an upload.
+
+        ### Parameters:
+        ----
+        file_obj : FileObject
+            The file object returned by the OpenAI API.
+        """
 
         self._file_id = file_obj.id
         self._is_uploaded = True
         self._upload_date = file_obj.created_at
 
+        if self._upload_cache is not None:
+            self._upload_cache.set(digest=self.upload_digest, file_id=self._file_id)
+
         logging.info(f"File {self.name} has been uploaded.")
 
+        self._notify()
+
+    def _mark_deleted(self) -> None:
+        """Records that the file was deleted from the OpenAI API."""
+
+        if self._upload_cache is not None:
+            self._upload_cache.discard(file_id=self._file_id)
+
+        # Reset the file ID and is_uploaded flag.
+        self._file_id = ""
+        self._is_uploaded = False
+
+        logging.info(f"File {self.name} has been deleted.")
+
+        self._notify()
+
+    def _upload_size(self, payload) -> int:
+        """Returns the number of bytes in an upload payload."""
+
+        if isinstance(payload, tuple):
+            return len(payload[1])
+
+        return self.size
+
+    def upload(self) -> None:
+        """Uploads the file to the OpenAI API."""
+
+        _check_client(client=self._client, is_async=False, counterpart="aupload")
+
+        if self._skip_upload():
+            return
+
+        metrics = default_metrics()
+        payload = self._upload_payload()
+
+        # Upload the file, or its preprocessed derivative, to the OpenAI API.
+        with metrics.timer("finbrain_upload_seconds"):
+            file_obj = self._client.files.create(
+                file=payload,
+                purpose="assistants"
+            )
+
+        metrics.observe("finbrain_upload_bytes", self._upload_size(payload=payload))
+
+        self._mark_uploaded(file_obj=file_obj)
+
     def delete(self) -> None:
         """Deletes the file from the OpenAI API."""
 
+        _check_client(client=self._client, is_async=False, counterpart="adelete")
+
         # Check if the file has been uploaded.
         if not self._is_uploaded:
             logging.info(f"File {self.name} has not been uploaded.")
@@ -81,11 +545,48 @@ class File:
         # Delete the file from the OpenAI API.
         self._client.files.delete(file_id=self._file_id)
 
-        # Reset the file ID and is_uploaded flag.
-        self._file_id = ""
-        self._is_uploaded = False
+        self._mark_deleted()
 
-        logging.info(f"File {self.name} has been deleted.")
+    async def aupload(self) -> None:
+        """Uploads the file through an `AsyncOpenAI` client.
+
+        ### Overview:
+        ----
+        Hashing the file, reading the payload and writing the upload cache
+        all touch the disk, so they run in a worker thread and never block
+        the event loop.
+        """
+
+        _check_client(client=self._client, is_async=True, counterpart="upload")
+
+        if await asyncio.to_thread(self._skip_upload):
+            return
+
+        metrics = default_metrics()
+        payload = await asyncio.to_thread(self._upload_payload)
+
+        with metrics.timer("finbrain_upload_seconds"):
+            file_obj = await self._client.files.create(
+                file=payload,
+                purpose="assistants"
+            )
+
+        metrics.observe("finbrain_upload_bytes", self._upload_size(payload=payload))
+
+        await asyncio.to_thread(self._mark_uploaded, file_obj)
+
+    async def adelete(self) -> None:
+        """Deletes the file through an `AsyncOpenAI` client."""
+
+        _check_client(client=self._client, is_async=True, counterpart="delete")
+
+        if not self._is_uploaded:
+            logging.info(f"File {self.name} has not been uploaded.")
+            return
+
+        await self._client.files.delete(file_id=self._file_id)
+
+        await asyncio.to_thread(self._mark_deleted)
 
     def to_dict(self) -> dict:
         """Returns the file as a dictionary."""
@@ -95,9 +596,11 @@ class File:
             "name": self.name,
             "is_uploaded": self.is_uploaded,
             "path": self._path.as_posix(),
-            "size": self._size,
-            "creation_date": self._creation_date,
-            "upload_date": self._upload_date
+            "size": self._size if self._size is not None else self.size,
+            "creation_date": self.creation_date,
+            "upload_date": self._upload_date,
+            "digest": self._digest,
+            "upload_path": self._upload_path.as_posix() if self._upload_path else ""
         }
 
     def to_json(self) -> str:
@@ -107,12 +610,40 @@ class File:
 
 class Files:
 
-    def __init__(self, client: OpenAI) -> None:
+    def __init__(self, client: OpenAI, upload_cache: UploadCache = None) -> None:
+        """Initializes the Files collection.
+
+        ### Overview:
+        ----
+        Files are stored in an insertion ordered dictionary under a key
+        that never changes, and the name, ID, path and digest indexes all
+        point at that key. Adding or deleting a file only touches its own
+        entries, so both are O(1) no matter how large the collection is.
+
+        ### Parameters:
+        ----
+        client: OpenAI
+            The OpenAI client object.
+
+        upload_cache: UploadCache (optional, default=None)
+            A persistent cache of content digests to file IDs, used to
+            skip uploading bytes that already exist remotely.
+        """
 
         self._client = client
-        self._files = []
+        self._upload_cache = upload_cache
+        self._lock = threading.RLock()
+        self._records = {}
+        self._next_key = 0
+        self._ordered = None
         self._indexes_by_name = {}
         self._indexes_by_id = {}
+        self._indexes_by_path = {}
+        self._indexes_by_digest = {}
+        self._indexes_by_size = {}
+        self._indexed_values = {}
+        self._indexed_sizes = {}
+        self._on_change = None
 
     def __repr__(self) -> str:
         """Returns the string representation of the object."""
@@ -120,135 +651,613 @@ class Files:
 
     def __len__(self) -> int:
         """Returns the number of files."""
-        return len(self._files)
+        return len(self._records)
 
     def __getitem__(self, index: int) -> File:
         """Returns a file at the given index."""
-        return self._files[index]
+        return self.list_files()[index]
 
     def __iter__(self):
         """Iterates over the files."""
-        for file in self._files:
+        for file in list(self._records.values()):
             yield file
 
-    def list_files(self) -> list:
-        """Lists the files."""
-        return self._files
+    @property
+    def on_change(self):
+        """Returns the callback invoked when a file is added, changed or removed."""
+        return self._on_change
 
-    def _load(self, files: list) -> None:
-        """Loads the files from a list of dictionaries.
+    @on_change.setter
+    def on_change(self, on_change) -> None:
+        """Sets the callback invoked when a file is added, changed or removed.
 
         ### Parameters:
         ----
-        files: list
-            A list of dictionaries containing the file information.
+        on_change: Callable[[File, bool], None]
+            Called with the file and a flag that is True when the file
+            was removed from the collection.
         """
+        self._on_change = on_change
 
-        for file in files:
-            new_file = File(path=file['path'])
-            new_file._file_id = file['file_id']
-            new_file._is_uploaded = file['is_uploaded']
-            new_file.client = self._client
-            self._files.append(new_file)
-            self._indexes_by_name[new_file.name] = len(self._files) - 1
-            self._indexes_by_id[new_file.file_id] = len(self._files) - 1
+    def _file_changed(self, file: File, removed: bool = False) -> None:
+        """Keeps the indexes in sync and forwards a change to `on_change`."""
 
-    def add(self, file_path: str) -> None:
-        """Adds a file to the list of files.
+        if not removed:
+            key = self._indexes_by_path.get(file._path.as_posix(), None)
+            if key is not None:
+                self._reindex(key=key, file=file)
+
+        if self._on_change is not None:
+            self._on_change(file, removed)
+
+    def _insert(self, file: File) -> int:
+        """Stores a file and indexes it.
 
         ### Parameters:
         ----
-        file_path: str
-            The path to the file to add.
+        file: File
+            The file to store.
+
+        ### Returns:
+        ----
+        int :
+            The stable key of the file.
         """
 
-        # Step 1: Check if the file has already been added by checking the name.
-        file_name = pathlib.Path(file_path).name
-        index = self._indexes_by_name.get(file_name, None)
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            self._records[key] = file
+            self._ordered = None
+            self._indexes_by_name[file.name] = key
+            self._indexes_by_path[file._path.as_posix()] = key
 
-        # If the file has already been added, return.
-        if index is not None:
-            logging.info(f"File {file_name} has already been added.")
-            print(f"File {file_name} has already been added.")
-            return
+            # Index by the size we already know, without a stat.
+            if file._size is not None:
+                self._indexes_by_size.setdefault(file._size, set()).add(key)
+                self._indexed_sizes[key] = file._size
 
-        # Create a new file object.
-        file = File(path=file_path)
-        file.client = self._client
-        logging.info(f"Adding file {file_name} to the list of files.")
-        self._files.append(file)
+            self._reindex(key=key, file=file)
 
-        # Add the index
-        index = len(self._files) - 1
-        self._indexes_by_name[file.name] = index
+        return key
 
-    def get_by_name(self, name: str) -> File:
-        """Returns a file by name.
+    def _reindex(self, key: int, file: File) -> None:
+        """Updates the ID and digest indexes of a file, which can change over time.
 
         ### Parameters:
         ----
-        name: str
-            The name of the file to return.
-        """
-        index = self._indexes_by_name.get(name, None)
-        if index is not None:
-            return self._files[index]
-        else:
-            raise ValueError(f"File with name {name} does not exist.")
-
-    def get_by_id(self, file_id: str) -> File:
-        """Returns a file by ID.
+        key: int
+            The stable key of the file.
 
-        ### Parameters:
-        ----
-        file_id: str
-            The ID of the file to return
+        file: File
+            The file to index.
         """
-        # Get the index of the file.
-        index = self._indexes_by_id.get(file_id, None)
 
-        # Check if the file exists.
-        if index is not None:
-            return self._files[index]
-        else:
-            raise ValueError(f"File with ID {file_id} does not exist.")
+        with self._lock:
 
-    def delete_by_name(self, name: str) -> None:
-        """Deletes a file from the list of files.
+            old_id, old_digest = self._indexed_values.get(key, ("", ""))
+            new_id = file.file_id if file.is_uploaded else ""
+            new_digest = file._digest
 
-        ### Parameters:
-        ----
-        name: str
-            The name of the file to delete.
-        """
+            if old_id != new_id:
+                if old_id and self._indexes_by_id.get(old_id, None) == key:
+                    del self._indexes_by_id[old_id]
+                if new_id:
+                    self._indexes_by_id[new_id] = key
 
-        # Get the index of the file.
-        index = self._indexes_by_name.get(name, None)
+            if old_digest != new_digest:
+                if old_digest and self._indexes_by_digest.get(old_digest, None) == key:
+                    del self._indexes_by_digest[old_digest]
+                if new_digest:
+                    self._indexes_by_digest[new_digest] = key
 
-        # Check if the file exists.
-        if index is not None:
-            del self._files[index]
-            del self._indexes_by_name[name]
-            self._rebuild_indexes()
-        else:
-            raise ValueError(f"File with name {name} does not exist.")
+            self._indexed_values[key] = (new_id, new_digest)
 
-    def delete_by_index(self, index: int) -> None:
-        """Deletes a file from the list of files.
+    def _remove(self, key: int) -> File:
+        """Removes a file and its index entries.
 
         ### Parameters:
         ----
-        index: int
-            The index of the file to delete.
+        key: int
+            The stable key of the file.
+
+        ### Returns:
+        ----
+        File :
+            The file that was removed.
         """
 
-        # Get the file name.
-        file_name = self._files[index].name
+        with self._lock:
 
-        # Delete the file.
-        del self._files[index]
-        del self._indexes_by_name[file_name]
-        self._rebuild_indexes()
+            file = self._records.pop(key)
+            self._ordered = None
+
+            # Detach the file, so later uploads or deletes of it no longer reach the collection.
+            file._observer = None
+            old_id, old_digest = self._indexed_values.pop(key, ("", ""))
+
+            size = self._indexed_sizes.pop(key, None)
+            if size is not None:
+                self._indexes_by_size[size].discard(key)
+                if not self._indexes_by_size[size]:
+                    del self._indexes_by_size[size]
+
+            for index, value in (
+                (self._indexes_by_name, file.name),
+                (self._indexes_by_path, file._path.as_posix()),
+                (self._indexes_by_id, old_id),
+                (self._indexes_by_digest, old_digest)
+            ):
+                if value and index.get(value, None) == key:
+                    del index[value]
+
+        self._file_changed(file=file, removed=True)
+
+        return file
+
+    def list_files(self) -> list:
+        """Lists the files."""
+
+        # Positional access is cached until the next add or delete.
+        ordered = self._ordered
+        if ordered is None:
+            ordered = self._ordered = list(self._records.values())
+
+        return ordered
+
+    def pending(self) -> list:
+        """Returns the files that have not been uploaded yet."""
+        return [file for file in self._records.values() if not file.is_uploaded]
+
+    @staticmethod
+    def _upload_failed(file: File, error: Exception, attempts: int, retries: int) -> float:
+        """Logs a failed upload attempt.
+
+        ### Returns:
+        ----
+        float :
+            The number of seconds to wait before the next attempt, or None
+            if no attempts are left.
+        """
+
+        logging.warning(
+            f"Upload of {file.name} failed on attempt {attempts}: {error}"
+        )
+
+        if attempts > retries:
+            return None
+
+        default_metrics().increment("finbrain_retries_total", operation="upload")
+
+        return min(2 ** (attempts - 1) * 0.5, 8.0)
+
+    @staticmethod
+    def _upload_result(file: File, attempts: int, start: float, error: Exception) -> dict:
+        """Returns the result of the attempts to upload a file."""
+
+        return {
+            "name": file.name,
+            "file_id": file.file_id,
+            "status": "error" if error else "success",
+            "attempts": attempts,
+            "elapsed": time.perf_counter() - start,
+            "error": str(error) if error else None
+        }
+
+    def _upload_with_retries(self, file: File, retries: int) -> dict:
+        """Uploads a single file, retrying on failure.
+
+        ### Parameters:
+        ----
+        file: File
+            The file to upload.
+
+        retries: int
+            The number of times to retry a failed upload.
+
+        ### Returns:
+        ----
+        dict :
+            The result of the upload, including the number of attempts
+            and the time it took.
+        """
+
+        start = time.perf_counter()
+        attempts = 0
+        error = None
+
+        while attempts <= retries:
+            attempts += 1
+            try:
+                file.upload()
+                error = None
+                break
+            except Exception as e:
+                error = e
+                delay = self._upload_failed(file=file, error=e, attempts=attempts, retries=retries)
+                if delay is not None:
+                    time.sleep(delay)
+
+        return self._upload_result(file=file, attempts=attempts, start=start, error=error)
+
+    def _cache_batch(self):
+        """Returns a block that saves the upload cache once, at its end."""
+
+        if self._upload_cache is None:
+            return nullcontext()
+
+        return self._upload_cache.batch()
+
+    def _index_uploaded(self, file: File) -> None:
+        """Adds an uploaded file to the ID index.
+
+        ### Parameters:
+        ----
+        file: File
+            The file that was uploaded.
+        """
+
+        key = self._indexes_by_path.get(file._path.as_posix(), None)
+
+        if key is not None:
+            self._reindex(key=key, file=file)
+
+    def upload_all(self, max_workers: int = 4, retries: int = 2) -> list:
+        """Uploads every pending file concurrently.
+
+        ### Parameters:
+        ----
+        max_workers: int (optional, default=4)
+            The maximum number of uploads in flight at once.
+
+        retries: int (optional, default=2)
+            The number of times to retry a failed upload.
+
+        ### Returns:
+        ----
+        list :
+            A list of dictionaries, one per file, in the order the
+            uploads finished.
+
+        ### Usage:
+        ----
+            >>> assistant.files.add(file_path="sec_docs/13567242.html")
+            >>> assistant.files.add(file_path="sec_docs/14564912.html")
+            >>> results = assistant.files.upload_all(max_workers=8)
+        """
+
+        _check_client(client=self._client, is_async=False, counterpart="aupload_all")
+
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+
+        pending = self.pending()
+        results = []
+
+        if not pending:
+            logging.info("No pending files to upload.")
+            return results
+
+        # The upload cache is saved once, after every upload has finished.
+        with self._cache_batch(), ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+            futures = {
+                executor.submit(self._upload_with_retries, file, retries): file
+                for file in pending
+            }
+
+            # Update the ID index as each upload finishes.
+            for future in as_completed(futures):
+                self._index_uploaded(file=futures[future])
+                results.append(future.result())
+
+        logging.info(
+            f"Uploaded {sum(r['status'] == 'success' for r in results)} "
+            f"of {len(results)} pending files."
+        )
+
+        return results
+
+    async def aupload_all(self, max_workers: int = 4, retries: int = 2) -> list:
+        """Uploads every pending file concurrently from a running event loop.
+
+        ### Parameters:
+        ----
+        max_workers: int (optional, default=4)
+            The maximum number of uploads in flight at once.
+
+        retries: int (optional, default=2)
+            The number of times to retry a failed upload.
+
+        ### Returns:
+        ----
+        list :
+            A list of dictionaries, one per file, in the order the
+            uploads finished.
+        """
+
+        _check_client(client=self._client, is_async=False, counterpart="AsyncFiles.aupload_all")
+
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+
+        semaphore = asyncio.Semaphore(max_workers)
+        results = []
+
+        async def _upload(file: File) -> None:
+            async with semaphore:
+                result = await asyncio.to_thread(
+                    self._upload_with_retries, file, retries
+                )
+            self._index_uploaded(file=file)
+            results.append(result)
+
+        # The upload cache is saved once, after every upload has finished.
+        with self._cache_batch():
+            await asyncio.gather(*(_upload(file) for file in self.pending()))
+
+        return results
+
+    def _load(self, files: list) -> None:
+        """Loads the files from a list of dictionaries.
+
+        ### Parameters:
+        ----
+        files: list
+            A list of dictionaries containing the file information.
+        """
+
+        seeds = {}
+
+        for file in files:
+            new_file = File(
+                path=file['path'],
+                size=file.get('size', None),
+                creation_date=file.get('creation_date', None)
+            )
+            new_file._file_id = file['file_id']
+            new_file._is_uploaded = file['is_uploaded']
+            new_file._digest = file.get('digest', "")
+            if file.get('upload_path', ""):
+                new_file._upload_path = pathlib.Path(file['upload_path'])
+            new_file.client = self._client
+            new_file.upload_cache = self._upload_cache
+            new_file._observer = self._file_changed
+            self._insert(file=new_file)
+
+            # Seed the upload cache with files we know are uploaded.
+            if self._upload_cache is not None and new_file._digest and new_file.is_uploaded:
+                if new_file._digest not in self._upload_cache:
+                    seeds[new_file._digest] = new_file.file_id
+
+        # Save the cache once, rather than once per file.
+        if seeds:
+            self._upload_cache.update(entries=seeds)
+
+    def _same_contents(self, file: File) -> int:
+        """Returns the key of a file with the same contents, hashing only files of the same size.
+
+        ### Parameters:
+        ----
+        file: File
+            The file to look for.
+
+        ### Returns:
+        ----
+        int :
+            The key of the matching file, or None if there is none.
+        """
+
+        for key in list(self._indexes_by_size.get(file.size, ())):
+
+            other = self._records[key]
+
+            try:
+                digest = other.digest
+            except OSError:
+                # The other file is gone from disk, it cannot match anything.
+                continue
+
+            self._reindex(key=key, file=other)
+
+            if digest == file.digest:
+                return key
+
+        return None
+
+    def add(self, file_path: str, entry: os.DirEntry = None) -> None:
+        """Adds a file to the list of files.
+
+        ### Parameters:
+        ----
+        file_path: str
+            The path to the file to add.
+
+        entry: os.DirEntry (optional, default=None)
+            The directory entry the file was found with, if any.
+        """
+
+        # Step 1: Check if the file has already been added by checking the name.
+        file_name = pathlib.Path(file_path).name
+        key = self._indexes_by_name.get(file_name, None)
+
+        # If the file has already been added, return.
+        if key is not None:
+            logging.info(f"File {file_name} has already been added.")
+            print(f"File {file_name} has already been added.")
+            return
+
+        # Create a new file object.
+        file = File(path=file_path, entry=entry)
+
+        # Step 2: Check if the same contents have already been added. Only files of the
+        # same size can match, so files are only hashed when their size collides.
+        key = self._same_contents(file=file)
+
+        if key is not None:
+            logging.info(
+                f"File {file_name} has the same contents as {self._records[key].name}."
+            )
+            print(f"File {file_name} has already been added as {self._records[key].name}.")
+            return
+
+        file.client = self._client
+        file.upload_cache = self._upload_cache
+        file._observer = self._file_changed
+        logging.info(f"Adding file {file_name} to the list of files.")
+        self._insert(file=file)
+
+        # `_insert` has already indexed the file, so only `on_change` needs to hear about it.
+        if self._on_change is not None:
+            self._on_change(file, False)
+
+    def add_directory(self, path: str, pattern: str = "*", recursive: bool = True) -> int:
+        """Adds every file in a directory that matches a pattern.
+
+        ### Overview:
+        ----
+        The directory is walked with `os.scandir`, so file types come from
+        the directory listing itself and each file is stat'ed at most once.
+
+        ### Parameters:
+        ----
+        path: str
+            The directory to add files from.
+
+        pattern: str (optional, default="*")
+            A shell style pattern the file names must match, for example `*.html`.
+
+        recursive: bool (optional, default=True)
+            If True, sub-directories are walked as well.
+
+        ### Returns:
+        ----
+        int :
+            The number of files that were added.
+
+        ### Usage:
+        ----
+            >>> assistant.files.add_directory(path="sec_docs", pattern="*.html")
+        """
+
+        if not os.path.isdir(path):
+            raise NotADirectoryError(f"Directory `{path}` does not exist.")
+
+        count = len(self._records)
+        directories = [path]
+
+        while directories:
+
+            with os.scandir(directories.pop()) as entries:
+
+                # Sort so files are added in a stable order on every platform.
+                for entry in sorted(entries, key=lambda entry: entry.name):
+                    # Symlinked folders are not followed, so a link cycle cannot loop forever.
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            directories.append(entry.path)
+                    elif entry.is_file() and fnmatch.fnmatch(entry.name, pattern):
+                        self.add(file_path=entry.path, entry=entry)
+
+        logging.info(f"Added {len(self._records) - count} files from {path}.")
+
+        return len(self._records) - count
+
+    def _get(self, index: dict, value: str, label: str) -> File:
+        """Returns the file an index points to, or raises a `ValueError`."""
+
+        key = index.get(value, None)
+
+        if key is None:
+            raise ValueError(f"File with {label} {value} does not exist.")
+
+        return self._records[key]
+
+    def get_by_name(self, name: str) -> File:
+        """Returns a file by name.
+
+        ### Parameters:
+        ----
+        name: str
+            The name of the file to return.
+        """
+        return self._get(index=self._indexes_by_name, value=name, label="name")
+
+    def get_by_id(self, file_id: str) -> File:
+        """Returns a file by ID.
+
+        ### Parameters:
+        ----
+        file_id: str
+            The ID of the file to return
+        """
+        return self._get(index=self._indexes_by_id, value=file_id, label="ID")
+
+    def get_by_path(self, path: str) -> File:
+        """Returns a file by path.
+
+        ### Parameters:
+        ----
+        path: str
+            The path of the file to return, as it was added.
+        """
+        return self._get(
+            index=self._indexes_by_path,
+            value=pathlib.Path(path).as_posix(),
+            label="path"
+        )
+
+    def get_by_digest(self, digest: str) -> File:
+        """Returns a file by the SHA-256 digest of its contents.
+
+        ### Parameters:
+        ----
+        digest: str
+            The digest of the file to return.
+        """
+
+        # Digests are computed lazily, so hash the files that have not been hashed yet.
+        if digest not in self._indexes_by_digest:
+            for key, file in list(self._records.items()):
+                if file._digest or not file._path.exists():
+                    continue
+                found = file.digest == digest
+                self._reindex(key=key, file=file)
+                if found:
+                    break
+
+        return self._get(index=self._indexes_by_digest, value=digest, label="digest")
+
+    def delete_by_name(self, name: str) -> None:
+        """Deletes a file from the list of files.
+
+        ### Parameters:
+        ----
+        name: str
+            The name of the file to delete.
+        """
+
+        # Get the key of the file.
+        key = self._indexes_by_name.get(name, None)
+
+        # Check if the file exists.
+        if key is not None:
+            self._remove(key=key)
+        else:
+            raise ValueError(f"File with name {name} does not exist.")
+
+    def delete_by_index(self, index: int) -> None:
+        """Deletes a file from the list of files.
+
+        ### Parameters:
+        ----
+        index: int
+            The index of the file to delete.
+        """
+
+        # Resolve the position to the stable key of the file.
+        file = self.list_files()[index]
+        self._remove(key=self._indexes_by_path[file._path.as_posix()])
 
     def delete_by_id(self, file_id: str) -> None:
         """Deletes a file from the list of files.
@@ -259,27 +1268,453 @@ class Files:
             The ID of the file to delete.
         """
 
-        # Get the index of the file.
-        index = self._indexes_by_id.get(file_id, None)
+        # Get the key of the file.
+        key = self._indexes_by_id.get(file_id, None)
 
         # Check if the file exists.
-        if index is not None:
-            file_name = self._files[index].name
-            del self._files[index]
-            del self._indexes_by_name[file_name]
-
-    def _rebuild_indexes(self) -> None:
-        """Rebuilds the indexes."""
-        self._indexes_by_name = {
-            file.name: idx for idx, file in enumerate(self._files)
-        }
+        if key is not None:
+            self._remove(key=key)
+        else:
+            raise ValueError(f"File with ID {file_id} does not exist.")
 
     def to_dict(self) -> dict:
         """Returns the files as a dictionary."""
         return {
-            "files": [file.to_dict() for file in self._files]
+            "files": [file.to_dict() for file in self._records.values()]
         }
 
     def to_json(self) -> str:
         """Returns the files as a JSON string."""
         return json.dumps(self.to_dict())
+
+
+class AsyncFiles(Files):
+
+    """The `Files` collection for an `AsyncOpenAI` client, uploads go through `aupload_all`."""
+
+    def __init__(self, client: AsyncOpenAI, upload_cache: UploadCache = None) -> None:
+        """Initializes the AsyncFiles collection.
+
+        ### Parameters:
+        ----
+        client: AsyncOpenAI
+            The async OpenAI client object.
+
+        upload_cache: UploadCache (optional, default=None)
+            A persistent cache of content digests to file IDs, used to
+            skip uploading bytes that already exist remotely.
+        """
+        super().__init__(client=client, upload_cache=upload_cache)
+
+    def __repr__(self) -> str:
+        """Returns the string representation of the object."""
+        return f"AsyncFiles(client={self._client})"
+
+    async def _aupload_with_retries(self, file: File, retries: int) -> dict:
+        """Uploads a single file on the event loop, retrying on failure.
+
+        ### Parameters:
+        ----
+        file: File
+            The file to upload.
+
+        retries: int
+            The number of times to retry a failed upload.
+
+        ### Returns:
+        ----
+        dict :
+            The result of the upload, including the number of attempts
+            and the time it took.
+        """
+
+        start = time.perf_counter()
+        attempts = 0
+        error = None
+
+        while attempts <= retries:
+            attempts += 1
+            try:
+                await file.aupload()
+                error = None
+                break
+            except Exception as e:
+                error = e
+                delay = self._upload_failed(file=file, error=e, attempts=attempts, retries=retries)
+                if delay is not None:
+                    await asyncio.sleep(delay)
+
+        return self._upload_result(file=file, attempts=attempts, start=start, error=error)
+
+    async def aupload_all(self, max_workers: int = 4, retries: int = 2) -> list:
+        """Uploads every pending file concurrently on the event loop.
+
+        ### Parameters:
+        ----
+        max_workers: int (optional, default=4)
+            The maximum number of uploads in flight at once.
+
+        retries: int (optional, default=2)
+            The number of times to retry a failed upload.
+
+        ### Returns:
+        ----
+        list :
+            A list of dictionaries, one per file, in the order the
+            uploads finished.
+        """
+
+        _check_client(client=self._client, is_async=True, counterpart="Files.upload_all")
+
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+
+        semaphore = asyncio.Semaphore(max_workers)
+        results = []
+
+        async def _upload(file: File) -> None:
+            async with semaphore:
+                result = await self._aupload_with_retries(file, retries)
+            self._index_uploaded(file=file)
+            results.append(result)
+
+        # The upload cache is saved once, after every upload has finished.
+        with self._cache_batch():
+            await asyncio.gather(*(_upload(file) for file in self.pending()))
+
+        return results
+
+
+class _HtmlToText(HTMLParser):
+
+    """Converts HTML into compact, Markdown flavoured text."""
+
+    # Tags whose contents are never part of the document text.
+    SKIP_TAGS = {"head", "script", "style", "noscript", "iframe", "svg", "nav", "footer"}
+
+    # Element IDs used by EDGAR for banners and navigation.
+    SKIP_IDS = {"headerTop", "headerBottom", "breadCrumbs", "footer", "Nav"}
+
+    # Tags that start a new line.
+    BLOCK_TAGS = {
+        "p", "div", "br", "tr", "table", "ul", "ol", "li", "dl", "dt", "dd",
+        "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "pre", "hr"
+    }
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self._parts = []
+        self._skip_tag = None
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+
+        if tag in self.SKIP_TAGS or dict(attrs).get("id") in self.SKIP_IDS:
+            self._skip_tag = tag
+            self._skip_depth = 1
+            return
+
+        if tag in self.BLOCK_TAGS:
+            self._parts.append("\n")
+        if tag in {"h1", "h2", "h3", "h4", "h5", "h6"}:
+            self._parts.append("#" * int(tag[1]) + " ")
+        elif tag == "li":
+            self._parts.append("- ")
+        elif tag in {"td", "th"}:
+            self._parts.append(" | ")
+
+    def handle_endtag(self, tag: str) -> None:
+
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+            return
+
+        if tag in self.BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_tag is None:
+            self._parts.append(re.sub(r"\s+", " ", data))
+
+    def text(self) -> str:
+        """Returns the normalized text of everything fed so far."""
+
+        lines = []
+        for line in "".join(self._parts).splitlines():
+            line = re.sub(r" +", " ", line).strip(" |")
+            if line:
+                lines.append(line)
+
+        return "\n".join(lines).strip() + "\n"
+
+
+def _preprocess_path(source: str, output_dir: str, digest: str = "") -> dict:
+    """Writes the compact text derivative of a file, unless it is cached.
+
+    ### Overview:
+    ----
+    This is a module level function so it can be sent to worker
+    processes. Derivatives are named after the SHA-256 digest of the
+    source, so unchanged documents are never converted twice. Files that
+    are not HTML are left as they are, and reported as their own output.
+
+    ### Parameters:
+    ----
+    source: str
+        The path to the original file.
+
+    output_dir: str
+        The folder the derivatives are written to.
+
+    digest: str (optional, default="")
+        The SHA-256 digest of the source, when the caller already knows
+        it. If not provided, the source is hashed.
+
+    ### Returns:
+    ----
+    dict :
+        The digest, output path and byte counts for the file, and whether
+        it was converted.
+    """
+
+    source_path = pathlib.Path(source)
+    stat = source_path.stat()
+    digest = digest or _hash_file(path=source_path)
+    output_path = pathlib.Path(output_dir).joinpath(f"{digest}.md")
+    converted = source_path.suffix.lower() in HTML_SUFFIXES
+    cached = output_path.exists()
+
+    # Text would lose its line breaks and binary files would turn into noise.
+    if not converted:
+        output_path = source_path
+
+    elif not cached:
+
+        parser = _HtmlToText()
+
+        with open(file=source_path, mode="r", encoding="utf-8", errors="replace") as file:
+            for chunk in iter(lambda: file.read(CHUNK_SIZE), ""):
+                parser.feed(chunk)
+        parser.close()
+
+        # Write to a temporary file first, so a crash never leaves a partial derivative.
+        temp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+        with open(file=temp_path, mode="w+", encoding="utf-8") as file:
+            file.write(parser.text())
+        os.replace(temp_path, output_path)
+
+    return {
+        "source": source_path.as_posix(),
+        "output": output_path.as_posix(),
+        "digest": digest,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "bytes_before": stat.st_size,
+        "bytes_after": output_path.stat().st_size,
+        "cached": cached and converted,
+        "converted": converted
+    }
+
+
+def _text_path(file: File, output_dir: str) -> tuple:
+    """Returns the digest and the compact text derivative of a file, writing it if needed.
+
+    ### Parameters:
+    ----
+    file: File
+        The file to read. A file that went through the `Preprocessor`
+        already points at its derivative, which is used as is, and any
+        other file is pointed at the derivative written here. Files that
+        are not HTML are read as they are, so their line breaks are kept.
+
+    output_dir: str
+        The folder derivatives are written to, for files that were not
+        preprocessed yet.
+
+    ### Returns:
+    ----
+    tuple :
+        The SHA-256 digest of the original file, and the path of its
+        derivative, or of the file itself when it is not HTML.
+    """
+
+    # The digest is cached against the size and mtime, so only the first call reads the whole source.
+    digest = file.digest
+
+    if file._path.suffix.lower() not in HTML_SUFFIXES:
+        return digest, file._path
+
+    # Derivatives are named after the digest, so one of an older version is never reused.
+    if file.upload_path.name == f"{digest}.md" and file.upload_path.exists():
+        return digest, file.upload_path
+
+    result = _preprocess_path(source=file._path.as_posix(), output_dir=output_dir, digest=digest)
+
+    # Point the file at its derivative, so later calls return above.
+    file._upload_path = pathlib.Path(result["output"])
+    file._notify()
+
+    return result["digest"], file._upload_path
+
+
+class Preprocessor:
+
+    """Turns raw HTML filings into compact text derivatives before they are uploaded.
+
+    ### Overview:
+    ----
+    Only files with a suffix in `HTML_SUFFIXES` are converted. Any other
+    file, like a plain text or PDF filing, is uploaded as it is.
+    """
+
+    def __init__(self, output_dir: str = ".finbrain/preprocessed", max_workers: int = None) -> None:
+        """Initializes the Preprocessor object.
+
+        ### Parameters:
+        ----
+        output_dir: str (optional, default=".finbrain/preprocessed")
+            The folder the derivatives are written to. It doubles as the
+            cache, since derivatives are named by content hash.
+
+        max_workers: int (optional, default=None)
+            The number of worker processes used by `process_many`. If not
+            provided, one per CPU is used.
+
+        ### Usage:
+        ----
+            >>> from finbrain.utils import Preprocessor
+            >>> preprocessor = Preprocessor()
+            >>> report = preprocessor.process_many(files=assistant.files)
+            >>> assistant.files.upload_all()
+        """
+
+        self._output_dir = pathlib.Path(output_dir)
+        self._output_dir.mkdir(parents=True, exist_ok=True)
+        self._max_workers = max_workers
+
+    @property
+    def output_dir(self) -> pathlib.Path:
+        """Returns the folder the derivatives are written to."""
+        return self._output_dir
+
+    def _apply(self, file: File, result: dict) -> dict:
+        """Points a file at its derivative and returns the report for it."""
+
+        file._upload_path = pathlib.Path(result["output"])
+        file._digest = result["digest"]
+        file._digest_key = (result["size"], result["mtime_ns"])
+        file._notify()
+
+        logging.info(
+            f"Preprocessed {file.name}: {result['bytes_before']} -> "
+            f"{result['bytes_after']} bytes."
+        )
+
+        return {
+            "name": file.name,
+            "output": result["output"],
+            "digest": result["digest"],
+            "bytes_before": result["bytes_before"],
+            "bytes_after": result["bytes_after"],
+            "cached": result["cached"],
+            "skipped": False
+        }
+
+    @staticmethod
+    def _skip(file: File) -> dict:
+        """Returns the report of a file that is not HTML, which keeps its original upload path."""
+
+        logging.info(f"Skipped preprocessing {file.name}, it is not HTML.")
+
+        # Drop a derivative written before non-HTML files were skipped.
+        if file._upload_path is not None:
+            file._upload_path = None
+            file._notify()
+
+        return {
+            "name": file.name,
+            "output": file._path.as_posix(),
+            "digest": file._digest,
+            "bytes_before": file.size,
+            "bytes_after": file.size,
+            "cached": False,
+            "skipped": True
+        }
+
+    @staticmethod
+    def _is_html(file: File) -> bool:
+        """Returns whether a file is converted, from its suffix."""
+        return file._path.suffix.lower() in HTML_SUFFIXES
+
+    def process(self, file: File) -> dict:
+        """Preprocesses a single file in the current process.
+
+        ### Parameters:
+        ----
+        file: File
+            The file to preprocess.
+
+        ### Returns:
+        ----
+        dict :
+            The output path and the bytes before and after preprocessing.
+            Files that are not HTML are skipped, and report their own path.
+        """
+
+        if not self._is_html(file=file):
+            return self._skip(file=file)
+
+        result = _preprocess_path(
+            source=file._path.as_posix(),
+            output_dir=self._output_dir.as_posix()
+        )
+
+        return self._apply(file=file, result=result)
+
+    def process_many(self, files: list) -> list:
+        """Preprocesses many files in a pool of worker processes.
+
+        ### Parameters:
+        ----
+        files: list
+            The files to preprocess.
+
+        ### Returns:
+        ----
+        list :
+            One report per file, in the order the files were given.
+            Files that are not HTML are skipped, and report their own path.
+        """
+
+        # Worker processes pull in multiprocessing, only pay for it when they are used.
+        from concurrent.futures import ProcessPoolExecutor
+
+        files = list(files)
+        html_files = [file for file in files if self._is_html(file=file)]
+        reports = {}
+
+        with ProcessPoolExecutor(max_workers=self._max_workers) as executor:
+            results = executor.map(
+                _preprocess_path,
+                [file._path.as_posix() for file in html_files],
+                [self._output_dir.as_posix()] * len(html_files),
+                chunksize=max(1, len(html_files) // 64)
+            )
+            for file, result in zip(html_files, results):
+                reports[id(file)] = self._apply(file=file, result=result)
+
+        reports = [reports.get(id(file), None) or self._skip(file=file) for file in files]
+
+        before = sum(report["bytes_before"] for report in reports)
+        after = sum(report["bytes_after"] for report in reports)
+        logging.info(f"Preprocessed {len(reports)} files: {before} -> {after} bytes.")
+
+        return reports
@@ -1,17 +1,111 @@
 import json
-from jsonschema import validate
-from jsonschema import ValidationError
+import hashlib
+import threading
+import collections
+from typing import Iterable
+from typing import Iterator
+from typing import Union
+from finbrain.schemas import default_registry
+
+# The number of compiled validators kept, the least recently used are dropped first.
+MAX_COMPILED = 256
 
 
 class Validator:
 
-    def validate_json_schema(self, json_string: str, schema: dict) -> dict:
+    # Compiled validators shared by every `Validator`, keyed by schema fingerprint.
+    _compiled = collections.OrderedDict()
+    _compiled_lock = threading.Lock()
+
+    def __init__(self) -> None:
+        """Initializes the Validator object."""
+
+        # Maps `id(schema)` to `(schema, validator)`, so a schema object that
+        # is passed over and over again is never fingerprinted twice. The
+        # entry holds the schema, so its ID cannot be reused while cached.
+        self._by_identity = collections.OrderedDict()
+        self._identity_lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(schema: dict) -> str:
+        """Returns a stable fingerprint of a JSON schema.
+
+        ### Parameters:
+        ----
+        schema: dict
+            The JSON schema to fingerprint.
+
+        ### Returns:
+        ----
+        str:
+            The SHA-256 digest of the canonical JSON form of the schema.
+        """
+
+        canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def compile(self, schema: dict):
+        """Returns a compiled validator for a JSON schema.
+
+        ### Overview:
+        ----
+        The schema is checked and its validator is built only the first
+        time it is seen, after that the cached instance is returned. Both
+        caches keep the `MAX_COMPILED` most recently used schemas.
+
+        ### Parameters:
+        ----
+        schema: dict
+            The JSON schema to compile.
+
+        ### Returns:
+        ----
+        jsonschema.protocols.Validator:
+            The validator instance for the schema.
+
+        ### Raises:
+        ----
+        jsonschema.SchemaError:
+            If the schema itself is invalid.
+        """
+
+        with self._identity_lock:
+            entry = self._by_identity.get(id(schema), None)
+            if entry is not None and entry[0] is schema:
+                self._by_identity.move_to_end(id(schema))
+                return entry[1]
+
+        key = self.fingerprint(schema=schema)
+
+        with self._compiled_lock:
+            compiled = self._compiled.get(key, None)
+            if compiled is None:
+                # Import jsonschema on first use, it is slow to import.
+                from jsonschema.validators import validator_for
+                cls = validator_for(schema)
+                cls.check_schema(schema)
+                compiled = cls(schema)
+                self._compiled[key] = compiled
+                if len(self._compiled) > MAX_COMPILED:
+                    self._compiled.popitem(last=False)
+            else:
+                self._compiled.move_to_end(key)
+
+        with self._identity_lock:
+            self._by_identity[id(schema)] = (schema, compiled)
+            if len(self._by_identity) > MAX_COMPILED:
+                self._by_identity.popitem(last=False)
+
+        return compiled
+
+    def validate_json_schema(self, json_string: Union[str, dict], schema: dict) -> dict:
         """Validates a JSON string against a JSON schema.
 
         ### Parameters:
         ----
-        json_string: str
-            The JSON string to be validated.
+        json_string: str | dict
+            The JSON string to be validated. An already parsed object is
+            validated as is, without being parsed again.
 
         schema: dict
             The JSON schema to validate the JSON string against.
@@ -29,9 +123,15 @@ class Validator:
         ValidationError:
             If the JSON string does not match the schema.
         """
+
+        from jsonschema import ValidationError
+
         try:
-            json_obj = json.loads(json_string)
-            validate(instance=json_obj, schema=schema)
+            if isinstance(json_string, (str, bytes)):
+                json_obj = json.loads(json_string)
+            else:
+                json_obj = json_string
+            self.compile(schema=schema).validate(json_obj)
             return {
                 "status": "success",
                 "message": "JSON object is valid",
@@ -43,3 +143,95 @@ class Validator:
                 "message": f"Invalid JSON object: {e}",
                 "object": json_string
             }
+
+    def validate_prompt(self, json_string: Union[str, dict], prompt_key: str = "summary_prompt") -> dict:
+        """Validates a JSON string against a schema from the prompt registry.
+
+        ### Parameters:
+        ----
+        json_string: str | dict
+            The JSON string, or already parsed object, to validate.
+
+        prompt_key: str (optional, default="summary_prompt")
+            The key of the prompt whose schema should be used.
+
+        ### Returns:
+        ----
+        dict:
+            The same result as `validate_json_schema`.
+        """
+
+        return self.validate_json_schema(
+            json_string=json_string,
+            schema=default_registry().get_schema(prompt_key=prompt_key)
+        )
+
+    def validate_many(self, json_strings: Iterable[Union[str, dict]], schema: dict) -> Iterator[dict]:
+        """Validates many JSON strings against the same JSON schema.
+
+        ### Overview:
+        ----
+        The schema is compiled once and every error in each object is
+        collected, instead of stopping at the first one. Results are
+        yielded as they are produced, so large batches are never held
+        in memory.
+
+        ### Parameters:
+        ----
+        json_strings: Iterable[str | dict]
+            The JSON strings, or already parsed objects, to validate.
+
+        schema: dict
+            The JSON schema to validate against.
+
+        ### Returns:
+        ----
+        Iterator[dict]:
+            One result per item, with an `errors` list that is empty
+            when the object is valid.
+
+        ### Usage:
+        ----
+            >>> validator = Validator()
+            >>> for result in validator.validate_many(summaries, schema):
+            ...     if result["status"] == "error":
+            ...         print(result["errors"])
+        """
+
+        compiled = self.compile(schema=schema)
+
+        for json_string in json_strings:
+
+            try:
+                if isinstance(json_string, (str, bytes)):
+                    json_obj = json.loads(json_string)
+                else:
+                    json_obj = json_string
+            except json.JSONDecodeError as e:
+                yield {
+                    "status": "error",
+                    "message": f"Invalid JSON object: {e}",
+                    "object": json_string,
+                    "errors": [str(e)]
+                }
+                continue
+
+            errors = [
+                f"{'/'.join(str(p) for p in error.absolute_path) or '<root>'}: {error.message}"
+                for error in compiled.iter_errors(json_obj)
+            ]
+
+            if errors:
+                yield {
+                    "status": "error",
+                    "message": f"Invalid JSON object: {len(errors)} errors",
+                    "object": json_obj,
+                    "errors": errors
+                }
+            else:
+                yield {
+                    "status": "success",
+                    "message": "JSON object is valid",
+                    "object": json_obj,
+                    "errors": []
+                }
@@ -0,0 +1,205 @@
+"""This module contains the VectorStore class."""
+
+from __future__ import annotations
+
+import logging
+from typing import Iterable
+from typing import TYPE_CHECKING
+
+from finbrain.utils import File
+from finbrain.thread import Thread
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+    from openai.types.beta import Assistant
+
+# The most file IDs the API accepts in a single file batch.
+MAX_BATCH_SIZE = 500
+
+
+class VectorStore:
+
+    """A class to create, reuse and fill a named vector store on the OpenAI platform."""
+
+    def __init__(self, client: OpenAI, name: str = "FinanceAgentStore", vector_store_id: str = "") -> None:
+        """Initializes the VectorStore object.
+
+        ### Parameters:
+        ----
+        client: OpenAI
+            The OpenAI client object.
+
+        name: str (optional, default="FinanceAgentStore")
+            The name of the vector store. If no ID is provided, an existing
+            store with this name is reused before a new one is created.
+
+        vector_store_id: str (optional, default="")
+            The ID of the vector store to retrieve.
+
+        ### Usage:
+        ----
+            >>> from finbrain.vector_store import VectorStore
+            >>> vector_store = VectorStore(client=client)
+            >>> vector_store.add_files(files=assistant.files)
+            >>> vector_store.attach_to_assistant(assistant=assistant.assistant)
+        """
+
+        self._client = client
+        self._name = name
+        self._vector_store_id = vector_store_id
+        self._file_ids = None
+        self._vector_store = self.initialize_vector_store()
+
+    @property
+    def _vector_stores(self):
+        """Returns the vector stores resource, wherever this SDK version keeps it."""
+
+        vector_stores = getattr(self._client, "vector_stores", None)
+        if vector_stores is None:
+            vector_stores = self._client.beta.vector_stores
+
+        return vector_stores
+
+    @property
+    def vector_store(self):
+        """Returns the vector store object."""
+        return self._vector_store
+
+    @property
+    def id(self) -> str:
+        """Returns the ID of the vector store."""
+        return self._vector_store.id
+
+    @property
+    def file_ids(self) -> set:
+        """Returns the IDs of the files in the vector store, listing them only once."""
+
+        if self._file_ids is None:
+            self._file_ids = {
+                file.id for file in self._vector_stores.files.list(
+                    vector_store_id=self.id,
+                    limit=100
+                )
+            }
+
+        return self._file_ids
+
+    def initialize_vector_store(self):
+        """Retrieves, reuses or creates the vector store."""
+
+        if self._vector_store_id != "":
+            return self._vector_stores.retrieve(
+                vector_store_id=self._vector_store_id
+            )
+
+        for vector_store in self._vector_stores.list(limit=100):
+            if vector_store.name == self._name:
+                logging.info(f"Reusing vector store {vector_store.id} named {self._name}.")
+                return vector_store
+
+        logging.info(f"Creating vector store named {self._name}.")
+        return self._vector_stores.create(name=self._name)
+
+    def add_files(self, files: Iterable[File], batch_size: int = MAX_BATCH_SIZE) -> dict:
+        """Adds files to the vector store with the file batch API.
+
+        ### Overview:
+        ----
+        Files that are not uploaded yet are uploaded first, and files
+        already in the store are skipped, so the store is only indexed
+        again for new documents. Each batch is polled once until it is
+        done, instead of building a temporary store for every message.
+
+        ### Parameters:
+        ----
+        files: Iterable[File]
+            The files to add.
+
+        batch_size: int (optional, default=500)
+            The number of files sent in each batch.
+
+        ### Returns:
+        ----
+        dict :
+            The number of files added and skipped, and the status and
+            file counts of each batch.
+        """
+
+        if not 1 <= batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_SIZE}.")
+
+        new_ids = []
+        skipped = 0
+
+        for file in files:
+            file.upload()
+            if file.file_id in self.file_ids or file.file_id in new_ids:
+                skipped += 1
+            else:
+                new_ids.append(file.file_id)
+
+        batches = []
+
+        for start in range(0, len(new_ids), batch_size):
+
+            chunk = new_ids[start:start + batch_size]
+            batch = self._vector_stores.file_batches.create_and_poll(
+                vector_store_id=self.id,
+                file_ids=chunk
+            )
+
+            logging.info(
+                f"Vector store batch {batch.id} finished with status {batch.status}."
+            )
+
+            if batch.status == "completed":
+                self._file_ids.update(chunk)
+
+            batches.append({
+                "id": batch.id,
+                "status": batch.status,
+                "file_counts": batch.file_counts.to_dict() if batch.file_counts else {}
+            })
+
+        return {
+            "added": len(new_ids),
+            "skipped": skipped,
+            "batches": batches
+        }
+
+    def _tool_resources(self) -> dict:
+        """Returns the tool resources that point file search at this store."""
+        return {"file_search": {"vector_store_ids": [self.id]}}
+
+    def attach_to_assistant(self, assistant: Assistant) -> Assistant:
+        """Attaches the vector store to an assistant.
+
+        ### Parameters:
+        ----
+        assistant: Assistant
+            The assistant to attach the store to.
+
+        ### Returns:
+        ----
+        Assistant :
+            The updated assistant.
+        """
+
+        return self._client.beta.assistants.update(
+            assistant_id=assistant.id,
+            tool_resources=self._tool_resources()
+        )
+
+    def attach_to_thread(self, thread: Thread) -> None:
+        """Attaches the vector store to a thread.
+
+        ### Parameters:
+        ----
+        thread: Thread
+            The thread to attach the store to.
+        """
+
+        thread._thread = self._client.beta.threads.update(
+            thread_id=thread._thread.id,
+            tool_resources=self._tool_resources()
+        )
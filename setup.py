@@ -43,7 +43,9 @@ setup(
         'python-docx',
         'PyPDF2',
         'docx2pdf',
-        'markdown'
+        'markdown',
+        'httpx',
+        'jsonschema'
     ],
 
     # some keywords for my library.
@@ -0,0 +1,86 @@
+"""Tests for the AsyncFinBrainAssistant and its files."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from finbrain.utils import AsyncFiles
+from finbrain.client import AsyncFinBrainAssistant
+
+
+def test_warm_up_starts_the_assistant():
+
+    assistant = AsyncFinBrainAssistant(api_key="test")
+
+    with mock.patch.object(assistant, "start", mock.AsyncMock(return_value=assistant)) as start:
+        assert asyncio.run(assistant.warm_up()) is assistant
+
+    start.assert_awaited_once()
+
+
+def test_the_assistant_id_asks_for_start_first():
+
+    assistant = AsyncFinBrainAssistant(api_key="test")
+
+    with pytest.raises(ValueError, match="start"):
+        assistant.assistant_id
+
+
+def test_async_files_upload_and_delete_through_the_async_client(tmp_path):
+
+    document = tmp_path.joinpath("10k.html")
+    document.write_text("<p>Annual report</p>", encoding="utf-8")
+
+    client = mock.MagicMock()
+    client.files.create = mock.AsyncMock(return_value=SimpleNamespace(id="file_1", created_at=1723262877))
+    client.files.delete = mock.AsyncMock()
+
+    files = AsyncFiles(client=client)
+    files.add(file_path=document.as_posix())
+    file = files.get_by_name(name="10k.html")
+
+    async def _main() -> list:
+        results = await files.aupload_all()
+        await file.adelete()
+        return results
+
+    results = asyncio.run(_main())
+
+    assert results[0]["status"] == "success"
+    assert results[0]["file_id"] == "file_1"
+    client.files.delete.assert_awaited_once_with(file_id="file_1")
+    assert not file.is_uploaded
+
+
+def test_the_blocking_upload_refuses_an_async_client(tmp_path):
+
+    document = tmp_path.joinpath("10k.html")
+    document.write_text("<p>Annual report</p>", encoding="utf-8")
+
+    client = mock.MagicMock()
+    client.files.create = mock.AsyncMock()
+
+    files = AsyncFiles(client=client)
+    files.add(file_path=document.as_posix())
+
+    with pytest.raises(ValueError, match="aupload_all"):
+        files.upload_all()
+
+    with pytest.raises(ValueError, match="aupload"):
+        files.get_by_name(name="10k.html").upload()
+
+    client.files.create.assert_not_called()
+
+
+def test_start_returns_early_once_started():
+
+    assistant = AsyncFinBrainAssistant(api_key="test")
+    assistant.assistant = mock.MagicMock()
+    assistant.thread = mock.MagicMock()
+
+    with mock.patch("finbrain.client.AsyncThread.open") as open_thread:
+        assert asyncio.run(assistant.start()) is assistant
+
+    open_thread.assert_not_called()
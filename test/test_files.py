@@ -0,0 +1,62 @@
+"""Tests for the Files collection and the state journal it feeds."""
+
+import json
+from types import SimpleNamespace
+from unittest import mock
+
+from finbrain.utils import Files
+from finbrain.client import FinBrainAssistant
+
+
+def _uploading_client() -> mock.MagicMock:
+    """Returns a client whose uploads succeed without touching the network."""
+
+    client = mock.MagicMock()
+    client.files.create.return_value = SimpleNamespace(id="file_removed", created_at=1723262877)
+
+    return client
+
+
+def test_removed_file_no_longer_notifies_the_collection(tmp_path):
+
+    document = tmp_path.joinpath("10k.html")
+    document.write_text("<p>Annual report</p>", encoding="utf-8")
+
+    changes = []
+    files = Files(client=None)
+    files.on_change = lambda file, removed: changes.append((file.name, removed))
+
+    files.add(file_path=document.as_posix())
+    file = files.get_by_name(name="10k.html")
+    files.delete_by_name(name="10k.html")
+
+    file.client = _uploading_client()
+    file.upload()
+
+    assert changes == [("10k.html", False), ("10k.html", True)]
+    assert len(files) == 0
+
+
+def test_remove_then_upload_keeps_the_file_out_of_the_state(tmp_path):
+
+    document = tmp_path.joinpath("10k.html")
+    document.write_text("<p>Annual report</p>", encoding="utf-8")
+
+    state_file = tmp_path.joinpath("state.json")
+    state_file.write_text(json.dumps({"assistant_id": "", "thread": "", "files": []}), encoding="utf-8")
+
+    assistant = FinBrainAssistant(api_key="test", save_state=True, state_file=state_file.as_posix())
+
+    try:
+        assistant.files.add(file_path=document.as_posix())
+        file = assistant.files.get_by_name(name="10k.html")
+        assistant.files.delete_by_name(name="10k.html")
+
+        file.client = _uploading_client()
+        file.upload()
+
+        assert file.is_uploaded
+        assert assistant.state["files"] == []
+    finally:
+        assistant._store.close()
+        assistant._store = None
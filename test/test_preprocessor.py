@@ -0,0 +1,48 @@
+"""Tests for the HTML to text Preprocessor."""
+
+from finbrain.utils import File
+from finbrain.utils import Preprocessor
+from finbrain.utils import _preprocess_path
+
+_FORM_10K = "FORM 10-K\nItem 1. Business\nWe make filings.\n"
+
+
+def test_text_filings_are_left_as_they_are(tmp_path):
+
+    document = tmp_path.joinpath("10k.txt")
+    document.write_text(_FORM_10K, encoding="utf-8")
+    output_dir = tmp_path.joinpath("text")
+
+    file = File(path=document.as_posix())
+    report = Preprocessor(output_dir=output_dir.as_posix()).process(file=file)
+
+    assert report["skipped"]
+    assert file.upload_path == document
+    assert file.upload_path.read_text(encoding="utf-8") == _FORM_10K
+    assert list(output_dir.iterdir()) == []
+
+
+def test_process_many_only_converts_html(tmp_path):
+
+    html = tmp_path.joinpath("10k.html")
+    html.write_text("<p>Item 1. Business</p><p>We make filings.</p>", encoding="utf-8")
+    pdf = tmp_path.joinpath("10k.pdf")
+    pdf.write_bytes(b"%PDF-1.7\n\x00\x01binary")
+
+    files = [File(path=html.as_posix()), File(path=pdf.as_posix())]
+    reports = Preprocessor(output_dir=tmp_path.joinpath("text").as_posix(), max_workers=1).process_many(files=files)
+
+    assert [report["skipped"] for report in reports] == [False, True]
+    assert files[0].upload_path.suffix == ".md"
+    assert files[1].upload_path == pdf
+
+
+def test_preprocess_path_passes_text_through(tmp_path):
+
+    document = tmp_path.joinpath("10k.txt")
+    document.write_text(_FORM_10K, encoding="utf-8")
+
+    result = _preprocess_path(source=document.as_posix(), output_dir=tmp_path.as_posix())
+
+    assert result["output"] == document.as_posix()
+    assert not result["converted"]
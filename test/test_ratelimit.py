@@ -0,0 +1,55 @@
+"""Tests for the RateLimiter and the rate limit headers it learns from."""
+
+import httpx
+
+from finbrain.metrics import default_metrics
+from finbrain.ratelimit import RateLimiter
+
+
+def test_the_limits_follow_the_ratelimit_headers():
+
+    limiter = RateLimiter(requests_per_minute=500, tokens_per_minute=200000)
+
+    limiter.update_from_headers(
+        headers=httpx.Headers({
+            "x-ratelimit-limit-requests": "60",
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-limit-tokens": "1000",
+            "x-ratelimit-remaining-tokens": "400"
+        })
+    )
+
+    assert limiter.requests_per_minute == 60
+    assert limiter.tokens_per_minute == 1000
+
+    # No request is left, the next one waits for a request to refill, one per second.
+    assert 0 < limiter._try_acquire(tokens=0) <= 1.0
+
+
+def test_a_429_pauses_every_caller_until_the_limit_resets():
+
+    metrics = default_metrics()
+    metrics.reset()
+
+    limiter = RateLimiter()
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(429, headers={"x-ratelimit-reset-requests": "2s", "x-ratelimit-reset-tokens": "20ms"})
+
+    with limiter.http_client(transport=httpx.MockTransport(_handler)) as client:
+        assert client.get("https://api.openai.com/v1/files").status_code == 429
+
+    assert metrics.counter("finbrain_rate_limited_total") == 1
+    assert 1.5 < limiter._try_acquire(tokens=0) <= 2.0
+
+
+def test_retry_after_wins_over_the_reset_headers():
+
+    limiter = RateLimiter()
+
+    limiter.update_from_headers(
+        headers=httpx.Headers({"retry-after": "5", "x-ratelimit-reset-requests": "1s"}),
+        status_code=429
+    )
+
+    assert 4.5 < limiter._try_acquire(tokens=0) <= 5.0
@@ -0,0 +1,107 @@
+"""Tests for the segments and compaction of the local search index."""
+
+from unittest import mock
+
+from finbrain.utils import File
+from finbrain.utils import Files
+from finbrain.utils import _hash_file
+from finbrain.search import SearchIndex
+
+
+def _index(tmp_path, **kwargs) -> SearchIndex:
+    """Returns an index stored under the test folder."""
+    return SearchIndex(
+        path=tmp_path.joinpath("index").as_posix(),
+        text_dir=tmp_path.joinpath("text").as_posix(),
+        **kwargs
+    )
+
+
+def _segment_files(index: SearchIndex) -> list:
+    """Returns the names of the segment files on disk."""
+    return sorted(path.name for path in index.path.glob("segment_*"))
+
+
+def test_files_with_the_same_name_are_indexed_side_by_side(tmp_path):
+
+    files = []
+    for folder, text in (("2019", "Revenue grew to 10 billion."), ("2020", "Revenue fell to 8 billion.")):
+        document = tmp_path.joinpath(folder, "10k.txt")
+        document.parent.mkdir()
+        document.write_text(text, encoding="utf-8")
+        files.append(File(path=document.as_posix()))
+
+    with _index(tmp_path) as index:
+        assert index.add_files(files=files)["added"] == 2
+        assert index.add_files(files=files)["segment"] is None
+        assert len(index.documents) == 2
+        assert _segment_files(index) == [
+            "segment_000000.passages",
+            "segment_000000.postings",
+            "segment_000000.terms.json"
+        ]
+
+
+def test_replaced_documents_are_compacted_away(tmp_path):
+
+    document = tmp_path.joinpath("10k.txt")
+    document.write_text("Revenue grew.", encoding="utf-8")
+
+    files = Files(client=None)
+    files.add(file_path=document.as_posix())
+
+    with _index(tmp_path, compact_ratio=0.25) as index:
+        index.add_files(files=files)
+
+        document.write_text("Revenue fell.", encoding="utf-8")
+        files.get_by_name(name="10k.txt")._digest = None
+        index.add_files(files=files)
+
+        assert index.dead_ratio == 0.0
+        assert _segment_files(index) == [
+            "segment_000002.passages",
+            "segment_000002.postings",
+            "segment_000002.terms.json"
+        ]
+        assert index.search(query="revenue")[0]["text"] == "Revenue fell."
+
+
+def test_a_compacted_segment_stays_open_while_a_search_reads_it(tmp_path):
+
+    document = tmp_path.joinpath("10k.txt")
+    document.write_text("Revenue grew.", encoding="utf-8")
+
+    files = Files(client=None)
+    files.add(file_path=document.as_posix())
+
+    with _index(tmp_path, compact_ratio=None) as index:
+        index.add_files(files=files)
+
+        _, segments = index._acquire_view()
+        index.compact()
+
+        assert segments[0].passage(0)[3] == 2
+        assert "segment_000000.postings" in _segment_files(index)
+
+        index._release_view(segments=segments)
+
+        assert "segment_000000.postings" not in _segment_files(index)
+
+
+def test_a_second_pass_over_indexed_files_hashes_nothing(tmp_path):
+
+    document = tmp_path.joinpath("10k.html")
+    document.write_text("<p>Revenue grew.</p>", encoding="utf-8")
+
+    files = Files(client=None)
+    files.add(file_path=document.as_posix())
+
+    with _index(tmp_path) as index:
+        index.add_files(files=files)
+
+        with mock.patch("finbrain.utils._hash_file", wraps=_hash_file) as hash_file:
+            report = index.add_files(files=files)
+
+        assert report["skipped"] == 1
+        assert hash_file.call_count == 0
+        assert files.get_by_name(name="10k.html").upload_path.parent == tmp_path.joinpath("text")
@@ -0,0 +1,103 @@
+"""Tests for splitting filings into Items and merging their summaries."""
+
+import json
+from unittest import mock
+
+from finbrain.utils import Files
+from finbrain.chunking import SectionChunker
+from finbrain.client import FinBrainAssistant
+
+_FORM_10Q = """FORM 10-Q
+PART I
+Item 1. Financial Statements
+The balance sheet.
+Item 2. Management's Discussion and Analysis
+Revenue grew.
+PART II
+Item 1A. Risk Factors
+Nothing new.
+"""
+
+
+def _filing(tmp_path):
+    """Adds a plain text 10-Q to a new collection and returns it."""
+
+    document = tmp_path.joinpath("10q.txt")
+    document.write_text(_FORM_10Q, encoding="utf-8")
+
+    files = Files(client=None)
+    files.add(file_path=document.as_posix())
+
+    return files.get_by_name(name="10q.txt")
+
+
+def test_a_text_filing_keeps_its_headings(tmp_path):
+
+    chunker = SectionChunker(text_dir=tmp_path.joinpath("text").as_posix())
+    keys = [chunk.key for chunk in chunker.chunk_file(file=_filing(tmp_path))]
+
+    assert keys == ["cover", "financial_statements", "md&a", "risk_factors"]
+
+
+def test_a_10q_reports_the_business_section_as_missing(tmp_path):
+
+    state_file = tmp_path.joinpath("state.json")
+    state_file.write_text(json.dumps({"assistant_id": "", "thread": "", "files": []}), encoding="utf-8")
+
+    assistant = FinBrainAssistant(api_key="test", save_state=False, state_file=state_file.as_posix())
+    chunker = SectionChunker(text_dir=tmp_path.joinpath("text").as_posix())
+
+    def _summarize_section(document_name, chunk, thread_pool=None):
+        return dict(chunk.to_dict(), status="success", summary=f"Summary of {chunk.key}.")
+
+    with mock.patch.object(assistant, "_summarize_section", side_effect=_summarize_section):
+        result = assistant.summarize_sections(file=_filing(tmp_path), chunker=chunker)
+
+    assert result["status"] == "success"
+    assert result["missing"] == ["business"]
+    assert result["object"]["sections_summary"]["md&a"] == "Summary of md&a."
+
+
+def test_the_trimmed_schema_is_built_once_per_set_of_sections(tmp_path):
+
+    state_file = tmp_path.joinpath("state.json")
+    state_file.write_text(json.dumps({"assistant_id": "", "thread": "", "files": []}), encoding="utf-8")
+
+    assistant = FinBrainAssistant(api_key="test", save_state=False, state_file=state_file.as_posix())
+    chunker = SectionChunker(text_dir=tmp_path.joinpath("text").as_posix())
+
+    def _summarize_section(document_name, chunk, thread_pool=None):
+        return dict(chunk.to_dict(), status="success", summary=f"Summary of {chunk.key}.")
+
+    validate = mock.Mock(wraps=assistant.json_validator.validate_json_schema)
+
+    with mock.patch.object(assistant, "_summarize_section", side_effect=_summarize_section):
+        with mock.patch.object(assistant.json_validator, "validate_json_schema", validate):
+            for _ in range(3):
+                assistant.summarize_sections(file=_filing(tmp_path), chunker=chunker)
+
+    schemas = {id(call.kwargs["schema"]) for call in validate.call_args_list}
+    assert len(schemas) == 1
+    assert len(assistant._section_schemas) == 1
+
+
+def test_a_filing_without_items_is_an_error(tmp_path):
+
+    state_file = tmp_path.joinpath("state.json")
+    state_file.write_text(json.dumps({"assistant_id": "", "thread": "", "files": []}), encoding="utf-8")
+
+    document = tmp_path.joinpath("letter.txt")
+    document.write_text("A letter to shareholders, with no Items.\n", encoding="utf-8")
+
+    files = Files(client=None)
+    files.add(file_path=document.as_posix())
+
+    assistant = FinBrainAssistant(api_key="test", save_state=False, state_file=state_file.as_posix())
+    chunker = SectionChunker(text_dir=tmp_path.joinpath("text").as_posix())
+
+    with mock.patch.object(assistant, "_summarize_section") as summarize_section:
+        result = assistant.summarize_sections(file=files.get_by_name(name="letter.txt"), chunker=chunker)
+
+    summarize_section.assert_not_called()
+    assert result["status"] == "error"
+    assert result["message"] == "No Items found in the filing."
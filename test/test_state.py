@@ -0,0 +1,42 @@
+"""Tests for replaying the StateStore journal."""
+
+import json
+
+from finbrain.state import StateStore
+
+
+def _file(path: str, file_id: str) -> dict:
+    """Returns a file record, as `File.to_dict` builds it."""
+    return {"path": path, "file_id": file_id, "is_uploaded": True}
+
+
+def test_a_torn_last_line_is_skipped_on_replay(tmp_path):
+
+    state_file = tmp_path.joinpath("state.json")
+    state_file.write_text(json.dumps({"assistant_id": "asst_1", "files": []}), encoding="utf-8")
+
+    store = StateStore(path=state_file.as_posix())
+    store.load()
+    store.set(key="thread", value="thread_1")
+    store.upsert_file(file=_file(path="a.html", file_id="file_a"))
+    store.close()
+
+    # A kill mid-write leaves half of the next entry behind.
+    with open(file=store.journal_path, mode="a", encoding="utf-8") as journal:
+        journal.write(json.dumps({"op": "upsert_file", "file": _file(path="b.html", file_id="file_b")})[:25])
+
+    store = StateStore(path=state_file.as_posix())
+    state = store.load()
+
+    assert store.journal_length == 2
+    assert state["assistant_id"] == "asst_1"
+    assert state["thread"] == "thread_1"
+    assert state["files"] == [_file(path="a.html", file_id="file_a")]
+
+    # The next entry starts on its own line, so it survives the following replay.
+    store.upsert_file(file=_file(path="c.html", file_id="file_c"))
+    store.close()
+
+    state = StateStore(path=state_file.as_posix()).load()
+
+    assert [file["path"] for file in state["files"]] == ["a.html", "c.html"]
@@ -0,0 +1,41 @@
+"""Tests for reading summaries from the SummaryCache."""
+
+import json
+from unittest import mock
+
+from finbrain.cache import SummaryCache
+from finbrain.client import FinBrainAssistant
+
+
+def test_a_cache_hit_makes_no_api_call(tmp_path):
+
+    document = tmp_path.joinpath("10k.html")
+    document.write_text("<p>Annual report</p>", encoding="utf-8")
+
+    state_file = tmp_path.joinpath("state.json")
+    state_file.write_text(json.dumps({"assistant_id": "asst_1", "thread": "", "files": []}), encoding="utf-8")
+
+    client = mock.MagicMock()
+    with mock.patch.object(FinBrainAssistant, "_create_client", return_value=client):
+        assistant = FinBrainAssistant(api_key="test", state_file=state_file.as_posix())
+
+    try:
+        assistant.files.add(file_path=document.as_posix())
+        file = assistant.files.get_by_name(name="10k.html")
+
+        cache = SummaryCache(directory=tmp_path.joinpath("summaries").as_posix())
+        key = SummaryCache.key(
+            file_digest=file.digest,
+            prompt=assistant.prompt.create_prompt(file=file),
+            schema=assistant.prompt.schema,
+            upload_digest=file.upload_digest
+        )
+        cache.put(key=key, result={"status": "success", "message": "", "object": {}, "name": "10k.html"})
+
+        results = assistant.summarize_many(files=[file], cache=cache)
+    finally:
+        assistant._store.close()
+        assistant._store = None
+
+    assert results[0]["cached"]
+    assert client.mock_calls == []
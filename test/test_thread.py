@@ -0,0 +1,79 @@
+"""Tests for the run bookkeeping of Thread and AsyncThread."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from finbrain.thread import Thread
+from finbrain.thread import ThreadPool
+from finbrain.thread import REPLENISH_ATTEMPTS
+from finbrain.thread import AsyncThread
+from finbrain.metrics import default_metrics
+
+
+def _run(status: str) -> SimpleNamespace:
+    """Returns a run with token usage, as the API reports it."""
+    return SimpleNamespace(
+        id="run_1",
+        status=status,
+        usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5)
+    )
+
+
+def test_a_polled_run_is_recorded_once():
+
+    metrics = default_metrics()
+    metrics.reset()
+
+    client = mock.MagicMock()
+    client.beta.threads.create.return_value = SimpleNamespace(id="thread_1")
+    client.beta.threads.runs.create.return_value = _run(status="completed")
+
+    thread = Thread(client=client)
+    thread.assistant = SimpleNamespace(id="asst_1")
+    thread.create_run(poll=False)
+    thread.poll_run_status()
+
+    assert metrics.counter("finbrain_runs_total", status="completed") == 1
+    assert metrics.counter("finbrain_tokens_total", kind="prompt") == 10
+
+
+def test_an_async_polled_run_is_recorded_once():
+
+    metrics = default_metrics()
+    metrics.reset()
+
+    client = mock.MagicMock()
+    client.beta.threads.create = mock.AsyncMock(return_value=SimpleNamespace(id="thread_1"))
+    client.beta.threads.runs.create = mock.AsyncMock(return_value=_run(status="completed"))
+
+    async def _main() -> None:
+        thread = await AsyncThread.open(client=client)
+        thread.assistant = SimpleNamespace(id="asst_1")
+        await thread.create_run(poll=False)
+        await thread.poll_run_status()
+
+    asyncio.run(_main())
+
+    assert metrics.counter("finbrain_runs_total", status="completed") == 1
+    assert metrics.counter("finbrain_tokens_total", kind="completion") == 5
+
+
+def test_a_lease_raises_once_the_pool_cannot_create_threads():
+
+    client = mock.MagicMock()
+    client.beta.threads.create.side_effect = ConnectionError("API unreachable")
+
+    with mock.patch("finbrain.thread.time.sleep"):
+        pool = ThreadPool(client=client, size=1)
+
+        with pytest.raises(RuntimeError, match="API unreachable"):
+            with pool.lease():
+                pass
+
+        pool.close()
+
+    assert client.beta.threads.create.call_count >= REPLENISH_ATTEMPTS
+    assert pool.stats["recycle_errors"] >= REPLENISH_ATTEMPTS
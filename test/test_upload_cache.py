@@ -0,0 +1,86 @@
+"""Tests for the persistent upload cache."""
+
+import json
+import itertools
+from types import SimpleNamespace
+from unittest import mock
+
+from finbrain.utils import File
+from finbrain.utils import Files
+from finbrain.utils import UploadCache
+
+
+def _uploading_client() -> mock.MagicMock:
+    """Returns a client that hands out a new file ID for every upload."""
+
+    ids = itertools.count()
+    client = mock.MagicMock()
+    client.files.create.side_effect = lambda **kwargs: SimpleNamespace(
+        id=f"file_{next(ids)}",
+        created_at=1723262877
+    )
+
+    return client
+
+
+def test_a_cache_hit_skips_the_upload(tmp_path):
+
+    for name in ("10k.html", "10k_copy.html"):
+        tmp_path.joinpath(name).write_text("<p>Annual report</p>", encoding="utf-8")
+
+    client = _uploading_client()
+    cache = UploadCache(path=tmp_path.joinpath("cache.json").as_posix())
+
+    first = File(path=tmp_path.joinpath("10k.html").as_posix())
+    second = File(path=tmp_path.joinpath("10k_copy.html").as_posix())
+    for file in (first, second):
+        file.client = client
+        file.upload_cache = cache
+        file.upload()
+
+    assert client.files.create.call_count == 1
+    assert second.file_id == first.file_id
+    assert json.loads(tmp_path.joinpath("cache.json").read_text()) == {first.digest: "file_0"}
+
+
+def test_loading_a_state_saves_the_cache_once(tmp_path):
+
+    cache = UploadCache(path=tmp_path.joinpath("cache.json").as_posix())
+    files = Files(client=None, upload_cache=cache)
+    state = [
+        {"file_id": f"file_{i}", "is_uploaded": True, "path": f"{i}.html", "digest": f"{i:064x}"}
+        for i in range(100)
+    ]
+
+    with mock.patch.object(UploadCache, "_save", autospec=True, side_effect=UploadCache._save) as save:
+        files._load(files=state)
+
+    assert save.call_count == 1
+    assert len(cache) == 100
+
+
+def test_upload_all_saves_the_cache_once(tmp_path):
+
+    cache = UploadCache(path=tmp_path.joinpath("cache.json").as_posix())
+    files = Files(client=_uploading_client(), upload_cache=cache)
+    for i in range(10):
+        document = tmp_path.joinpath(f"{i}.html")
+        document.write_text(f"<p>Report {i}</p>", encoding="utf-8")
+        files.add(file_path=document.as_posix())
+
+    with mock.patch.object(UploadCache, "_save", autospec=True, side_effect=UploadCache._save) as save:
+        results = files.upload_all(max_workers=4)
+
+    assert all(result["status"] == "success" for result in results)
+    assert save.call_count == 1
+    assert len(UploadCache(path=tmp_path.joinpath("cache.json").as_posix())) == 10
+
+
+def test_discard_drops_every_digest_of_a_file_id(tmp_path):
+
+    cache = UploadCache(path=tmp_path.joinpath("cache.json").as_posix())
+    cache.update(entries={"a": "file_1", "b": "file_1", "c": "file_2"})
+    cache.discard(file_id="file_1")
+
+    assert "a" not in cache and "b" not in cache
+    assert UploadCache(path=tmp_path.joinpath("cache.json").as_posix()).get("c") == "file_2"
@@ -0,0 +1,29 @@
+"""Tests for the compiled schema caches of the Validator."""
+
+import collections
+
+from finbrain import validator as validator_module
+from finbrain.validator import Validator
+
+
+def test_the_schema_caches_are_bounded(monkeypatch):
+
+    monkeypatch.setattr(validator_module, "MAX_COMPILED", 4)
+    monkeypatch.setattr(Validator, "_compiled", collections.OrderedDict())
+
+    validator = Validator()
+    for index in range(20):
+        schema = {"type": "object", "required": [f"key_{index}"]}
+        assert validator.validate_json_schema(json_string={f"key_{index}": 1}, schema=schema)["status"] == "success"
+
+    assert len(validator._by_identity) == 4
+    assert len(Validator._compiled) == 4
+
+
+def test_a_reused_schema_stays_cached():
+
+    validator = Validator()
+    schema = {"type": "object"}
+
+    assert validator.compile(schema=schema) is validator.compile(schema=schema)
+    assert validator.compile(schema=dict(schema)) is validator.compile(schema=schema)
@@ -1,7 +1,11 @@
+import logging
 from configparser import ConfigParser
 
 from finbrain.client import FinBrainAssistant
 
+# Log the assistant's activity, importing finbrain no longer configures logging.
+logging.basicConfig(filename="agent_log.log", level=logging.INFO)
+
 # Path to the configuration file.
 config = ConfigParser()
 config.read('configs/config.ini')